@@ -0,0 +1,17 @@
+// Shown under a list while the server has more pages of it
+function LoadMoreButton({ onClick, loading }) {
+  return (
+    <div className="d-flex justify-content-center my-4">
+      <button
+        type="button"
+        className="btn btn-outline-primary"
+        onClick={onClick}
+        disabled={loading}
+      >
+        {loading ? "Loading..." : "Load more"}
+      </button>
+    </div>
+  );
+}
+
+export default LoadMoreButton;
@@ -18,10 +18,7 @@ function ConversationCard({ conv, onUpdate }) {
       shown.join(", ") + (extraCount > 0 ? ` +${extraCount} more` : "");
   }
 
-  const unreadCount = Array.isArray(conv.messages)
-    ? conv.messages.filter((m) => m.sender?.id !== myId && m.read === false)
-        .length
-    : 0;
+  const unreadCount = conv.unread_count ?? 0;
 
   const isOnlyUser =
     conv.participants === 1 && conv.participants[0].id === myId;
@@ -1,9 +1,11 @@
 import React, { useState, useEffect, useRef } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import api from "../../api.js";
+import { fetchPage } from "../../fetchAllPages.js";
 import "../../styles/forms.css";
 import { useProfileContext } from "../../contexts/ProfileContext.jsx";
 import RoommateCard from "../cards/RoommateCard.jsx";
+import LoadMoreButton from "../LoadMoreButton.jsx";
 
 function FormGroup({ method, group }) {
   const { id } = useParams(); // listing id for POST, group id for EDIT
@@ -18,6 +20,9 @@ function FormGroup({ method, group }) {
   });
   const [searchName, setSearchName] = useState("");
   const [allRoommates, setAllRoommates] = useState([]);
+  // URL of the next page of search results, null once they are all loaded
+  const [nextRoommates, setNextRoommates] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedToAdd, setSelectedToAdd] = useState([]);
   const [invited, setInvited] = useState([]);
   const [error, setError] = useState(null);
@@ -74,6 +79,7 @@ function FormGroup({ method, group }) {
   const handleSearch = async (e) => {
     e.preventDefault();
     setAllRoommates([]);
+    setNextRoommates(null);
     setSelectedToAdd([]);
     if (!searchName.trim()) {
       setError(["Please enter a name to search."]);
@@ -83,9 +89,10 @@ function FormGroup({ method, group }) {
       const params = {};
       params.group_id = group.id;
       if (searchName) params.name = searchName;
-      const res = await api.get("/roommates/", { params });
-      setAllRoommates(res.data);
-      if (res.data.length === 0) {
+      const { results, next } = await fetchPage("/roommates/", { params });
+      setAllRoommates(results);
+      setNextRoommates(next);
+      if (results.length === 0) {
         setError(["No roommates found with that name."]);
       } else {
         setError(null);
@@ -95,6 +102,19 @@ function FormGroup({ method, group }) {
     }
   };
 
+  const loadMoreRoommates = async () => {
+    setLoadingMore(true);
+    try {
+      const { results, next } = await fetchPage(nextRoommates);
+      setAllRoommates((prev) => [...prev, ...results]);
+      setNextRoommates(next);
+    } catch {
+      setError(["Failed to fetch roommates."]);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSelectChange = (e) => {
     const selectedIds = Array.from(e.target.selectedOptions, (opt) =>
       Number(opt.value)
@@ -335,6 +355,12 @@ function FormGroup({ method, group }) {
               <small className="text-muted">
                 Select roommates and click "Add" to include them in the group.
               </small>
+              {nextRoommates && (
+                <LoadMoreButton
+                  onClick={loadMoreRoommates}
+                  loading={loadingMore}
+                />
+              )}
             </div>
           )}
           {(formData.member_ids.length > 0 || invited.length > 0) && (
@@ -1,5 +1,6 @@
 import { createContext, useState, useContext, useEffect } from "react";
 import api from "../api";
+import fetchAllPages from "../fetchAllPages";
 import { useLocation } from "react-router-dom";
 
 const ProfileContext = createContext();
@@ -52,8 +53,7 @@ export const ProfileProvider = ({ children }) => {
     setMessagesLoading(true);
     setMessagesError(null);
     try {
-      const response = await api.get("/messages");
-      setMessages(response.data);
+      setMessages(await fetchAllPages("/messages"));
     } catch (err) {
       setMessages([]);
       setMessagesError("Failed to fetch messages.");
@@ -67,8 +67,7 @@ export const ProfileProvider = ({ children }) => {
     setApplicationsLoading(true);
     setApplicationsError(null);
     try {
-      const response = await api.get("/applications");
-      setApplications(response.data);
+      setApplications(await fetchAllPages("/applications"));
     } catch (err) {
       setApplications([]);
       setApplicationsError("Failed to fetch applications.");
@@ -82,8 +81,7 @@ export const ProfileProvider = ({ children }) => {
     setInvitationsLoading(true);
     setInvitationsError(null);
     try {
-      const response = await api.get("/groups/invitations");
-      setInvitations(response.data);
+      setInvitations(await fetchAllPages("/groups/invitations"));
     } catch (err) {
       setInvitations([]);
       setInvitationsError("Failed to fetch invitations.");
@@ -138,6 +136,51 @@ export const ProfileProvider = ({ children }) => {
     }
   }, [profile]);
 
+  // Live unread messages, pushed by the server over Server-Sent Events
+  useEffect(() => {
+    if (!profile || typeof EventSource === "undefined") return;
+    let stream = null;
+    let retry = null;
+    let closed = false;
+
+    const openStream = async () => {
+      let ticket;
+      try {
+        // EventSource cannot send the Authorization header, so the stream is opened with a
+        // short-lived ticket. Servers that cannot hold streams open answer 503: no live updates.
+        const response = await api.post("/messages/stream/ticket");
+        ticket = response.data.ticket;
+      } catch {
+        return;
+      }
+      if (closed) return;
+
+      stream = new EventSource(
+        `${import.meta.env.VITE_API_URL}/messages/stream?ticket=${encodeURIComponent(ticket)}`
+      );
+      stream.addEventListener("message", (event) => {
+        const { message } = JSON.parse(event.data);
+        if (message.sender?.id !== profile.id) {
+          setMessages((prev) =>
+            prev.some((m) => m.id === message.id) ? prev : [...prev, message]
+          );
+        }
+      });
+      stream.onerror = () => {
+        // The browser would reconnect with the same, by then expired, ticket
+        stream.close();
+        retry = setTimeout(openStream, 3000);
+      };
+    };
+
+    openStream();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      if (stream) stream.close();
+    };
+  }, [profile?.id]);
+
   useEffect(() => {
     if (roommate && !roommateLoading) {
       fetchApplications();
@@ -0,0 +1,34 @@
+import api from "./api";
+
+// List endpoints return one page at a time, with the neighbouring pages' URLs
+// in a `Link: <url>; rel="next", <url>; rel="prev"` header.
+export const pageUrl = (linkHeader, rel) => {
+  const link = (linkHeader || "")
+    .split(",")
+    .find((part) => part.includes(`rel="${rel}"`));
+  const match = link && link.match(/<([^>]+)>/);
+  return match ? match[1] : null;
+};
+
+export const nextPageUrl = (linkHeader) => pageUrl(linkHeader, "next");
+
+// GET one page of a list endpoint: its results and the URL of the next page
+// (null on the last one). The next page URL already carries the query params.
+export const fetchPage = async (url, config) => {
+  const response = await (config ? api.get(url, config) : api.get(url));
+  return { results: response.data, next: nextPageUrl(response.headers?.link) };
+};
+
+// GET every page of a list endpoint and return all the results. Only for
+// small sets that are needed whole, list views load pages on demand.
+const fetchAllPages = async (url, config) => {
+  let { results, next } = await fetchPage(url, config);
+  while (next) {
+    const page = await fetchPage(next);
+    results = [...results, ...page.results];
+    next = page.next;
+  }
+  return results;
+};
+
+export default fetchAllPages;
@@ -1,10 +1,22 @@
-import React, { useState, useEffect, useRef, useMemo } from "react";
+import React, {
+  useState,
+  useEffect,
+  useLayoutEffect,
+  useRef,
+  useMemo,
+} from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import api from "../../api";
+import { pageUrl } from "../../fetchAllPages";
 import "../../styles/chat.css";
 import { useProfileContext } from "../../contexts/ProfileContext";
 import ListingCard from "../../components/cards/ListingCard";
 
+// The conversation comes with its latest messages, at most one history page
+const MESSAGE_PAGE_SIZE = 50;
+// Older messages are loaded when scrolled this close to the top (px)
+const LOAD_OLDER_THRESHOLD = 80;
+
 function ConversationWindow() {
   const { conversationId } = useParams();
   const [conversation, setConversation] = useState(null);
@@ -13,8 +25,13 @@ function ConversationWindow() {
   const [listing, setListing] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const { isProfileSelf } = useProfileContext();
   const messagesEndRef = useRef(null);
+  const messagesRef = useRef(null);
+  // Scroll height before older messages were prepended, to keep the view in place
+  const prependedFrom = useRef(null);
   const navigate = useNavigate();
 
   const fetchConversation = async () => {
@@ -22,7 +39,9 @@ function ConversationWindow() {
     try {
       const response = await api.get(`/conversations/${conversationId}/`);
       setConversation(response.data);
-      setMessages(response.data.messages || []);
+      const latest = response.data.messages || [];
+      setMessages(latest);
+      setHasOlder(latest.length >= MESSAGE_PAGE_SIZE);
 
       const primaryImage = response.data.listing.pictures?.find(
         (p) => p.is_primary
@@ -46,11 +65,45 @@ function ConversationWindow() {
     fetchConversation();
   }, [conversationId]);
 
-  // Scroll to bottom when messages update
-  useEffect(() => {
+  // Scroll to bottom when messages update, or stay on the same message when older ones were prepended
+  useLayoutEffect(() => {
+    const container = messagesRef.current;
+    if (prependedFrom.current !== null && container) {
+      container.style.scrollBehavior = "auto";
+      container.scrollTop += container.scrollHeight - prependedFrom.current;
+      container.style.scrollBehavior = "";
+      prependedFrom.current = null;
+      return;
+    }
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [messages]);
 
+  const fetchOlderMessages = async () => {
+    if (!hasOlder || loadingOlder || messages.length === 0) return;
+
+    setLoadingOlder(true);
+    try {
+      const response = await api.get(
+        `/conversations/${conversationId}/messages/`,
+        { params: { before: messages[0].id } }
+      );
+      prependedFrom.current = messagesRef.current?.scrollHeight ?? null;
+      setMessages((prev) => [...response.data, ...prev]);
+      setHasOlder(Boolean(pageUrl(response.headers?.link, "prev")));
+    } catch (error) {
+      setError("Failed to load older messages.");
+      console.error("Error fetching older messages:", error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
+  const handleMessagesScroll = (e) => {
+    if (e.currentTarget.scrollTop <= LOAD_OLDER_THRESHOLD) {
+      fetchOlderMessages();
+    }
+  };
+
   const handleSendMessage = async () => {
     if (!newMessage.trim()) return;
 
@@ -130,7 +183,20 @@ function ConversationWindow() {
           </div>
         ) : conversation ? (
           <>
-            <main className="chat-messages" aria-live="polite">
+            <main
+              className="chat-messages"
+              aria-live="polite"
+              ref={messagesRef}
+              onScroll={handleMessagesScroll}
+            >
+              {loadingOlder && (
+                <div className="d-flex justify-content-center py-2">
+                  <div
+                    className="spinner-border spinner-border-sm text-primary"
+                    role="status"
+                  ></div>
+                </div>
+              )}
               {messages.length === 0 && (
                 <div className="chat-no-messages">
                   No messages yet. Start the conversation!
@@ -171,7 +171,7 @@ function GroupView() {
         return;
       }
       // If not, create a new conversation
-      const payload = { participants: chatIds };
+      const payload = { participants: chatIds, group: group.id };
       const res = await api.post(
         `/listing/${listing.id}/start_conversation`,
         payload
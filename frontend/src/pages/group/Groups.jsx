@@ -1,13 +1,18 @@
 import React, { useEffect, useState, useRef } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import api from "../../api";
+import { fetchPage } from "../../fetchAllPages";
 import "../../styles/groups.css";
 import { useProfileContext } from "../../contexts/ProfileContext";
 import GroupCard from "../../components/cards/GroupCard";
+import LoadMoreButton from "../../components/LoadMoreButton";
 
 function Groups() {
   const { id } = useParams();
   const [groups, setGroups] = useState([]);
+  // URL of the next page of groups, null once they are all loaded
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [listing, setListing] = useState(null);
   const [error, setError] = useState(null);
   const [loadingListing, setLoadingListing] = useState(true);
@@ -19,8 +24,9 @@ function Groups() {
   const fetchGroups = async () => {
     setLoadingGroup(true);
     try {
-      const response = await api.get(`/listings/${id}/groups`);
-      setGroups(response.data);
+      const { results, next } = await fetchPage(`/listings/${id}/groups`);
+      setGroups(results);
+      setNextPage(next);
     } catch (err) {
       console.error("Failed to fetch groups.", err);
       setError("Failed to fetch groups.");
@@ -29,6 +35,20 @@ function Groups() {
     }
   };
 
+  const loadMoreGroups = async () => {
+    setLoadingMore(true);
+    try {
+      const { results, next } = await fetchPage(nextPage);
+      setGroups((prev) => [...prev, ...results]);
+      setNextPage(next);
+    } catch (err) {
+      console.error("Failed to fetch groups.", err);
+      setError("Failed to fetch groups.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchListing = async () => {
     setLoadingListing(true);
     try {
@@ -123,13 +143,19 @@ function Groups() {
                 <span className="apps-section-title">
                   <i className="bi bi-people-fill"></i> Available Groups
                 </span>
-                <span className="chip-strong">{groups.length} found</span>
+                <span className="chip-strong">
+                  {groups.length}
+                  {nextPage ? "+" : ""} found
+                </span>
               </summary>
               <div className="apps-grid">
                 {groups.map((group) => (
                   <GroupCard key={group.id} group={group} />
                 ))}
               </div>
+              {nextPage && (
+                <LoadMoreButton onClick={loadMoreGroups} loading={loadingMore} />
+              )}
             </section>
           )}
         </>
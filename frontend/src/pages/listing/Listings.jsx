@@ -1,10 +1,12 @@
 import React, { useState, useEffect, useRef } from "react";
 import api from "../../api.js";
+import { fetchPage } from "../../fetchAllPages.js";
 import { useLocation } from "react-router-dom";
 import ListingCard from "../../components/cards/ListingCard.jsx";
 import { useProfileContext } from "../../contexts/ProfileContext.jsx";
 import SortDropdown from "../../components/SortDropdown.jsx";
 import Pagination from "../../components/Pagination.jsx";
+import LoadMoreButton from "../../components/LoadMoreButton.jsx";
 import useGoogleMaps from "../../hooks/useGoogleMaps";
 import MultiSelectDropdown from "../../components/MultiSelectDropdown.jsx";
 import "../../styles/listings.css";
@@ -12,6 +14,9 @@ import "../../styles/listings.css";
 function Listings() {
   const location = useLocation();
   const [listings, setListings] = useState(location.state?.listings || []);
+  // URL of the next page of results, null once they are all loaded
+  const [nextPage, setNextPage] = useState(location.state?.nextPage || null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [sortOption, setSortOption] = useState("newest");
   const [filters, setFilters] = useState({
     location: location.state?.city || "",
@@ -52,6 +57,8 @@ function Listings() {
   ];
 
   const errorRef = useRef(null);
+  // Filters of the current results, applied to the pages loaded after them
+  const appliedFilters = useRef(filters);
   const locationInputRef = useRef(null);
   const autocompleteRef = useRef(null);
   const { profile } = useProfileContext();
@@ -99,7 +106,7 @@ function Listings() {
   // --- Reset page on filters change ---
   useEffect(() => {
     setCurrentPage(1);
-  }, [filters, listings.length]);
+  }, [filters]);
 
   // --- Fetch User Income ---
   useEffect(() => {
@@ -111,6 +118,33 @@ function Listings() {
     }
   }, [profile]);
 
+  const processListings = (listings, customFilters) => {
+    let processedListings = listings.map((listing) => {
+      const primaryImage = listing.pictures?.find((p) => p.is_primary);
+      return { ...listing, primary_image: primaryImage };
+    });
+
+    if (customFilters.affordability && userIncome) {
+      const monthlyIncome = userIncome / 12;
+      processedListings = processedListings.filter((listing) => {
+        switch (customFilters.affordability) {
+          case "affordable":
+            return listing.price <= monthlyIncome * 0.25;
+          case "recommended":
+            return (
+              listing.price > monthlyIncome * 0.25 &&
+              listing.price <= monthlyIncome * 0.4
+            );
+          case "tooExpensive":
+            return listing.price > monthlyIncome * 0.4;
+          default:
+            return true;
+        }
+      });
+    }
+    return processedListings;
+  };
+
   // --- Fetch Listings API ---
   const fetchListings = async (
     customFilters = filters,
@@ -130,42 +164,40 @@ function Listings() {
         delete params.radius;
       }
 
-      const response = await api.get("/listings/viewAll", { params });
-      let processedListings = response.data.map((listing) => {
-        const primaryImage = listing.pictures?.find((p) => p.is_primary);
-        return { ...listing, primary_image: primaryImage };
+      const { results, next } = await fetchPage("/listings/viewAll", {
+        params,
       });
-
-      if (customFilters.affordability && userIncome) {
-        const monthlyIncome = userIncome / 12;
-        processedListings = processedListings.filter((listing) => {
-          switch (customFilters.affordability) {
-            case "affordable":
-              return listing.price <= monthlyIncome * 0.25;
-            case "recommended":
-              return (
-                listing.price > monthlyIncome * 0.25 &&
-                listing.price <= monthlyIncome * 0.4
-              );
-            case "tooExpensive":
-              return listing.price > monthlyIncome * 0.4;
-            default:
-              return true;
-          }
-        });
-      }
-
-      setListings(processedListings);
+      appliedFilters.current = customFilters;
+      setListings(processListings(results, customFilters));
+      setNextPage(next);
       setCurrentPage(1);
       setError(null);
     } catch (err) {
       setError("Failed to fetch listings.");
       setListings([]);
+      setNextPage(null);
     } finally {
       setLoadingListings(false);
     }
   };
 
+  // --- Load the next page of results ---
+  const loadMoreListings = async () => {
+    setLoadingMore(true);
+    try {
+      const { results, next } = await fetchPage(nextPage);
+      setListings((prev) => [
+        ...prev,
+        ...processListings(results, appliedFilters.current),
+      ]);
+      setNextPage(next);
+    } catch (err) {
+      setError("Failed to fetch listings.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // --- Initial Load ---
   useEffect(() => {
     if (!location.state?.listings) {
@@ -176,6 +208,7 @@ function Listings() {
         return { ...listing, primary_image: primaryImage };
       });
       setListings(processed);
+      setNextPage(location.state.nextPage || null);
     }
   }, [location.state]);
 
@@ -234,6 +267,7 @@ function Listings() {
 
     if (!filters.location.trim()) {
       setListings([]);
+      setNextPage(null);
       setError(null);
       return;
     }
@@ -567,6 +601,13 @@ function Listings() {
                 setCurrentPage(1);
               }}
             />
+
+            {nextPage && (
+              <LoadMoreButton
+                onClick={loadMoreListings}
+                loading={loadingMore}
+              />
+            )}
           </>
         )}
       </div>
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef } from "react";
 import api from "../../api.js";
+import { fetchPage } from "../../fetchAllPages.js";
 import { useNavigate } from "react-router-dom";
 import "../../styles/listings.css";
 import { useProfileContext } from "../../contexts/ProfileContext.jsx";
@@ -84,11 +85,14 @@ function ListingsHome() {
         params.lng = latLng.lng;
       }
 
-      const response = await api.get("/listings/viewAll", { params });
+      const { results, next } = await fetchPage("/listings/viewAll", {
+        params,
+      });
 
       navigate("/listings/results", {
         state: {
-          listings: response.data,
+          listings: results,
+          nextPage: next,
           city,
           radius,
           latLng,
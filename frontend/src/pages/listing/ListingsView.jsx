@@ -12,7 +12,7 @@ function ListingsView() {
   const [listing, setListing] = useState();
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(true);
-  const [reviews, setReviews] = useState([]);
+  const [reviewCount, setReviewCount] = useState(0);
   const [averageRating, setAverageRating] = useState(null);
   const {
     profile,
@@ -60,16 +60,19 @@ function ListingsView() {
     }
   };
 
-  const fetchReviews = async () => {
+  // The owner's review totals, from their profile rather than every review
+  const fetchReviews = async (ownerId) => {
     try {
-      const response = await api.get(`/profile/reviews`, {
-        params: { reviewee: id },
-      });
-      setReviews(response.data);
-      const total = response.data.reduce((acc, r) => acc + r.rating, 0);
-      setAverageRating((total / response.data.length).toFixed(1));
+      const response = await api.get(`/profile/${ownerId}`);
+      setReviewCount(response.data.review_count || 0);
+      setAverageRating(
+        response.data.average_rating != null
+          ? Number(response.data.average_rating).toFixed(1)
+          : null
+      );
     } catch (err) {
-      setReviews(null);
+      setReviewCount(0);
+      setAverageRating(null);
       setError("Failed to fetch reviews.");
       console.error("Failed to fetch reviews.", err);
     }
@@ -77,10 +80,15 @@ function ListingsView() {
 
   useEffect(() => {
     fetchListing();
-    fetchReviews();
     sendInteraction("click");
   }, [id]);
 
+  useEffect(() => {
+    if (listing?.owner?.id) {
+      fetchReviews(listing.owner.id);
+    }
+  }, [listing?.owner?.id]);
+
   useEffect(() => {
     if (profile) {
       setIncome(profile.yearly_income);
@@ -513,7 +521,7 @@ function ListingsView() {
                       ★
                     </span>
                   ))}
-                  <span className="ms-2 text-muted">({reviews.length})</span>
+                  <span className="ms-2 text-muted">({reviewCount})</span>
                 </div>
               )}
             </div>
@@ -1,9 +1,11 @@
 import { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import api from "../../api";
+import { fetchPage } from "../../fetchAllPages";
 import "../../styles/profile.css";
 import { useProfileContext } from "../../contexts/ProfileContext";
 import ReviewCard from "../../components/cards/ReviewCard";
+import LoadMoreButton from "../../components/LoadMoreButton";
 
 function Profile() {
   const { id } = useParams();
@@ -11,6 +13,10 @@ function Profile() {
   const [profile, setProfile] = useState(null);
   const [listings, setListings] = useState([]);
   const [reviews, setReviews] = useState([]);
+  // URLs of the next pages of listings and reviews, null once all are loaded
+  const [nextListings, setNextListings] = useState(null);
+  const [nextReviews, setNextReviews] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [averageRating, setAverageRating] = useState(null);
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -20,36 +26,40 @@ function Profile() {
 
   const [roommate, setRoommate] = useState(null);
 
+  const processListings = (listings) =>
+    listings.map((listing) => {
+      const primaryImage = listing.pictures.find((p) => p.is_primary);
+      return {
+        ...listing,
+        pictures: primaryImage
+          ? [
+              primaryImage,
+              ...listing.pictures.filter((p) => p.id !== primaryImage.id),
+            ]
+          : listing.pictures,
+      };
+    });
+
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [profileRes, listingsRes, reviewsRes] = await Promise.all([
+      const [profileRes, listingsPage, reviewsPage] = await Promise.all([
         api.get(`/profile/${id}`),
-        api.get(`/listings/viewAll`, { params: { owner: id } }),
-        api.get(`/profile/reviews`, { params: { reviewee: id } }),
+        fetchPage(`/listings/viewAll`, { params: { owner: id } }),
+        fetchPage(`/profile/reviews`, { params: { reviewee: id } }),
       ]);
 
       setProfile(profileRes.data);
 
-      const processedListings = listingsRes.data.map((listing) => {
-        const primaryImage = listing.pictures.find((p) => p.is_primary);
-        return {
-          ...listing,
-          pictures: primaryImage
-            ? [
-                primaryImage,
-                ...listing.pictures.filter((p) => p.id !== primaryImage.id),
-              ]
-            : listing.pictures,
-        };
-      });
-      setListings(processedListings);
+      setListings(processListings(listingsPage.results));
+      setNextListings(listingsPage.next);
 
-      setReviews(reviewsRes.data);
-      const total = reviewsRes.data.reduce((acc, r) => acc + r.rating, 0);
+      setReviews(reviewsPage.results);
+      setNextReviews(reviewsPage.next);
+      // Totals over all the reviews, not only the loaded pages
       setAverageRating(
-        reviewsRes.data.length > 0
-          ? (total / reviewsRes.data.length).toFixed(1)
+        profileRes.data.average_rating != null
+          ? Number(profileRes.data.average_rating).toFixed(1)
           : null
       );
     } catch (err) {
@@ -60,6 +70,34 @@ function Profile() {
     }
   };
 
+  const loadMoreListings = async () => {
+    setLoadingMore(true);
+    try {
+      const { results, next } = await fetchPage(nextListings);
+      setListings((prev) => [...prev, ...processListings(results)]);
+      setNextListings(next);
+    } catch (err) {
+      console.error(err);
+      setError("Failed to load profile data.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const loadMoreReviews = async () => {
+    setLoadingMore(true);
+    try {
+      const { results, next } = await fetchPage(nextReviews);
+      setReviews((prev) => [...prev, ...results]);
+      setNextReviews(next);
+    } catch (err) {
+      console.error(err);
+      setError("Failed to load profile data.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchRoommate = async () => {
     setLoadingRoommate(true);
     try {
@@ -154,7 +192,9 @@ function Profile() {
                         ★
                       </span>
                     ))}
-                    <span className="ms-2 text-muted">({reviews.length})</span>
+                    <span className="ms-2 text-muted">
+                      ({profile.review_count})
+                    </span>
                   </div>
                 )}
 
@@ -298,6 +338,12 @@ function Profile() {
                 ) : (
                   <p className="text-muted fst-italic">No listings found.</p>
                 )}
+                {nextListings && (
+                  <LoadMoreButton
+                    onClick={loadMoreListings}
+                    loading={loadingMore}
+                  />
+                )}
               </>
             ) : (
               <>
@@ -313,6 +359,12 @@ function Profile() {
                 ) : (
                   <p className="text-muted fst-italic">No reviews yet.</p>
                 )}
+                {nextReviews && (
+                  <LoadMoreButton
+                    onClick={loadMoreReviews}
+                    loading={loadingMore}
+                  />
+                )}
               </>
             )}
           </div>
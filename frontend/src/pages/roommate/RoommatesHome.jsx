@@ -1,6 +1,8 @@
 import React, { useState, useEffect, useRef } from "react";
 import api from "../../api.js";
+import { fetchPage } from "../../fetchAllPages.js";
 import Pagination from "../../components/Pagination.jsx";
+import LoadMoreButton from "../../components/LoadMoreButton.jsx";
 import RoommateCard from "../../components/cards/RoommateCard.jsx";
 import useGoogleMaps from "../../hooks/useGoogleMaps";
 import MultiSelectDropdown from "../../components/MultiSelectDropdown.jsx";
@@ -8,6 +10,9 @@ import "../../styles/listings.css";
 
 function Roommates() {
   const [roommates, setRoommates] = useState([]);
+  // URL of the next page of results, null once they are all loaded
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState({
     city: "",
     budget_min: "",
@@ -49,7 +54,7 @@ function Roommates() {
   // Reset to page 1 whenever filters or data changes
   useEffect(() => {
     setCurrentPage(1);
-  }, [filters, roommates.length]);
+  }, [filters]);
 
   // Initialize Autocomplete when googleMaps loads
   useEffect(() => {
@@ -108,18 +113,34 @@ function Roommates() {
         params.occupation = customFilters.occupation;
       if (customFilters.gender) params.gender = customFilters.gender;
 
-      const response = await api.get("/roommates/", { params });
-      setRoommates(response.data);
+      const { results, next } = await fetchPage("/roommates/", { params });
+      setRoommates(results);
+      setNextPage(next);
       setCurrentPage(1);
       setError(null);
     } catch (err) {
       setError("Failed to fetch roommates.");
       setRoommates([]);
+      setNextPage(null);
     } finally {
       setLoading(false);
     }
   };
 
+  // Load the next page of results
+  const loadMoreRoommates = async () => {
+    setLoadingMore(true);
+    try {
+      const { results, next } = await fetchPage(nextPage);
+      setRoommates((prev) => [...prev, ...results]);
+      setNextPage(next);
+    } catch (err) {
+      setError("Failed to fetch roommates.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchRoommates();
   }, []);
@@ -321,6 +342,10 @@ function Roommates() {
               setCurrentPage(1);
             }}
           />
+
+          {nextPage && (
+            <LoadMoreButton onClick={loadMoreRoommates} loading={loadingMore} />
+          )}
         </>
       )}
     </div>
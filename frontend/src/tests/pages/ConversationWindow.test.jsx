@@ -133,4 +133,41 @@ describe("ConversationWindow", () => {
       expect(screen.getByText("Test message")).toBeInTheDocument()
     );
   });
+
+  test("loads older messages when scrolled to the top", async () => {
+    const message = (id) => ({
+      id,
+      sender: { id: 2, first_name: "Them", last_name: "Else" },
+      content: `Message ${id}`,
+      timestamp: new Date().toISOString()
+    });
+    // A full page of latest messages, so older ones may exist
+    const latest = Array.from({ length: 50 }, (_, i) => message(i + 11));
+
+    api.get
+      .mockResolvedValueOnce({ data: { ...mockConversation, messages: latest } })
+      .mockResolvedValueOnce({
+        data: Array.from({ length: 10 }, (_, i) => message(i + 1)),
+        headers: {}
+      });
+
+    render(<ConversationWindow />);
+
+    await waitFor(() =>
+      expect(screen.getByText("Message 11")).toBeInTheDocument()
+    );
+
+    fireEvent.scroll(screen.getByRole("main"), { target: { scrollTop: 0 } });
+
+    await waitFor(() =>
+      expect(screen.getByText("Message 1")).toBeInTheDocument()
+    );
+    expect(api.get).toHaveBeenLastCalledWith("/conversations/123/messages/", {
+      params: { before: 11 }
+    });
+
+    // No rel="prev" link, so there is nothing older left to load
+    fireEvent.scroll(screen.getByRole("main"), { target: { scrollTop: 0 } });
+    expect(api.get).toHaveBeenCalledTimes(2);
+  });
 });
@@ -311,7 +311,7 @@ describe("GroupView", () => {
 
     expect(api.post).toHaveBeenCalledWith(
       "/listing/456/start_conversation",
-      { participants: ["1", "2"] }
+      { participants: ["1", "2"], group: 123 }
     );
     expect(mockNavigate).toHaveBeenCalledWith("/conversations/999");
   });
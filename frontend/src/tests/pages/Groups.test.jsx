@@ -94,6 +94,36 @@ describe("Groups page", () => {
     expect(screen.getByText("Second Group")).toBeInTheDocument();
   });
 
+  test("loads the next page of groups on demand", async () => {
+    const nextUrl = "http://testserver/listings/888/groups?cursor=abc";
+    api.get.mockImplementation((url) => {
+      if (url.endsWith("/groups"))
+        return Promise.resolve({
+          data: fakeGroups,
+          headers: { link: `<${nextUrl}>; rel="next"` },
+        });
+      if (url === nextUrl)
+        return Promise.resolve({ data: [{ id: 3, name: "Third Group" }], headers: {} });
+      if (url.endsWith("/listings/888")) return Promise.resolve({ data: { owner: { id: fakeOwnerId } } });
+      return Promise.reject(new Error("404"));
+    });
+    isProfileSelfMock.mockReturnValue(false);
+
+    render(<Groups />);
+    await waitFor(() =>
+      expect(screen.getByText("Second Group")).toBeInTheDocument()
+    );
+    // Only the first page is requested until more are asked for
+    expect(api.get).not.toHaveBeenCalledWith(nextUrl);
+
+    fireEvent.click(screen.getByRole("button", { name: /Load more/i }));
+
+    await waitFor(() =>
+      expect(screen.getByText("Third Group")).toBeInTheDocument()
+    );
+    expect(screen.queryByRole("button", { name: /Load more/i })).toBeNull();
+  });
+
   test("shows empty message if no groups", async () => {
     api.get.mockImplementation((url) => {
       if (url.endsWith("/groups")) return Promise.resolve({ data: [] });
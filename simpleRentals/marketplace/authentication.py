@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core import signing
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from .realtime import ticket_user_id
+
+class StreamTicketAuthentication(BaseAuthentication):
+    """
+    Short-lived ?ticket= from MessageStreamTicketView. Only for MessageStreamView: the browser's EventSource
+    cannot send headers, and a JWT in the URL would stay valid long after it was written to an access log.
+    """
+
+    def authenticate(self, request):
+        ticket = request.query_params.get('ticket')
+        if not ticket:
+            return None
+        try:
+            user = get_user_model().objects.get(pk=ticket_user_id(ticket), is_active=True)
+        except (signing.BadSignature, get_user_model().DoesNotExist):
+            raise AuthenticationFailed("Invalid or expired stream ticket.")
+        return user, None
+
+    def authenticate_header(self, request):
+        return 'Ticket'
@@ -0,0 +1,131 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from django.conf import settings
+from django.db.models import Count, Value
+from django.db.models.functions import Replace, Substr, Upper
+from .models import Listing
+from .popularity import normalize_city
+
+# Location typeahead served from memory: every process keeps the distinct listing cities and postal code
+# prefixes (forward sortation areas, e.g. "N2L") with their listing counts in sorted arrays, a prefix query
+# is two binary searches. Listing saves and deletes in this process update the counts as they commit,
+# changes made by other processes are picked up by a full resync every AUTOCOMPLETE_REFRESH_SECONDS.
+
+POSTAL_PREFIX_LENGTH = 3
+
+def postal_prefix(postal_code):
+    return "".join((postal_code or "").split()).upper()[:POSTAL_PREFIX_LENGTH]
+
+class PrefixIndex:
+    """Sorted keys with a display value and a count each, queried by prefix. Not thread safe on its own."""
+
+    def __init__(self):
+        self.keys = []  # Sorted
+        self.entries = {}  # key -> [display value, count]
+
+    @classmethod
+    def from_counts(cls, counts):
+        """Build from {key: (display value, count)}."""
+        index = cls()
+        index.entries = {key: [value, count] for key, (value, count) in counts.items() if count > 0}
+        index.keys = sorted(index.entries)
+        return index
+
+    def add(self, key, value, delta):
+        if not key:
+            return
+        entry = self.entries.get(key)
+        if entry is None:
+            if delta <= 0:
+                return
+            self.entries[key] = [value, delta]
+            insort(self.keys, key)
+            return
+        entry[1] += delta
+        if entry[1] <= 0:
+            del self.entries[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def search(self, prefix, limit):
+        """(value, count) of the `limit` keys starting with `prefix` that have the most listings."""
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", start)
+        top = heapq.nlargest(limit, self.keys[start:end], key=lambda key: self.entries[key][1])
+        return [tuple(self.entries[key]) for key in top]
+
+class LocationAutocomplete:
+    """Process-wide city / postal prefix suggestions, loaded on first use and resynced every `refresh_interval` seconds."""
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._cities = None
+        self._postal_codes = None
+        self._loaded_at = 0.0
+
+    def _load(self):
+        cities, spellings = Counter(), {}
+        for city, count in Listing.objects.order_by().values_list('city').annotate(count=Count('id')):
+            key = normalize_city(city)
+            cities[key] += count
+            # Shown with the spelling most listings use
+            if key not in spellings or count > spellings[key][1]:
+                spellings[key] = (" ".join(city.split()), count)
+
+        prefix = Upper(Substr(Replace('postal_code', Value(' '), Value('')), 1, POSTAL_PREFIX_LENGTH))
+        postal_codes = (
+            Listing.objects.order_by().annotate(prefix=prefix).values_list('prefix').annotate(count=Count('id'))
+        )
+
+        return (
+            PrefixIndex.from_counts({key: (spellings[key][0], count) for key, count in cities.items()}),
+            PrefixIndex.from_counts({key: (key, count) for key, count in postal_codes}),
+        )
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._cities is not None and now - self._loaded_at < self.refresh_interval:
+            return
+        with self._lock:
+            if self._cities is not None and now - self._loaded_at < self.refresh_interval:
+                return
+            cities, postal_codes = self._load()
+            self._cities, self._postal_codes, self._loaded_at = cities, postal_codes, time.monotonic()
+
+    def suggest(self, query, limit=8):
+        """Cities and postal prefixes starting with `query`, most listings first."""
+        self._ensure_loaded()
+        with self._lock:
+            suggestions = [
+                {'type': 'city', 'value': value, 'count': count}
+                for value, count in self._cities.search(normalize_city(query), limit)
+            ]
+            postal_query = "".join(query.split()).upper()
+            if postal_query:
+                suggestions += [
+                    {'type': 'postal_code', 'value': value, 'count': count}
+                    for value, count in self._postal_codes.search(postal_query[:POSTAL_PREFIX_LENGTH], limit)
+                    if value.startswith(postal_query) or postal_query.startswith(value)
+                ]
+        suggestions.sort(key=lambda suggestion: -suggestion['count'])
+        return suggestions[:limit]
+
+    def update(self, city=None, postal_code=None, delta=1):
+        """Count a listing in (delta=1) or out of (delta=-1) a city and postal prefix."""
+        with self._lock:
+            if self._cities is None:
+                return  # Not loaded yet, the first load reads the current counts
+            if city:
+                self._cities.add(normalize_city(city), " ".join(city.split()), delta)
+            if postal_code:
+                prefix = postal_prefix(postal_code)
+                self._postal_codes.add(prefix, prefix, delta)
+
+    def reset(self):
+        with self._lock:
+            self._cities = self._postal_codes = None
+
+location_autocomplete = LocationAutocomplete(settings.AUTOCOMPLETE_REFRESH_SECONDS)
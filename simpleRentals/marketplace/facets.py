@@ -0,0 +1,118 @@
+from decimal import Decimal, InvalidOperation
+from django.db.models import Count, Max, Min, Q
+
+# Filter panel counts for the listing search. Every count is a conditional aggregate
+# (COUNT(*) FILTER (WHERE ...)) over the listings in the search scope (location, text query, map area),
+# so the whole panel is a single scan however many options it shows.
+#
+# An option is counted with every other active filter applied but not the one of its own facet, so it shows
+# what picking it instead would return (e.g. the Condo count stays visible while House is selected).
+# Amenities and utilities are cumulative checkboxes and are counted on top of the current selection instead.
+
+PROPERTY_TYPES = ['H', 'A', 'C', 'T', 'O']
+ROOM_COUNTS = range(6)  # Exact counts 0-5, larger ones are grouped under "6+"
+AMENITIES = ['ac', 'fridge', 'heating', 'internet']
+UTILITIES = ['heat', 'hydro', 'water']
+BOOLEAN_FACETS = ['furnished', 'pet_friendly', 'shareable']
+MAX_PRICE_BUCKETS = 50
+
+def _is_true(value):
+    return value.lower() in ["true", "1"]
+
+def listing_filter_conditions(filters):
+    """The active attribute filters of a listing search, as {facet: Q}."""
+    conditions = {}
+
+    price = Q()
+    if filters.get('min_price'):
+        price &= Q(price__gte=filters.get('min_price'))
+    if filters.get('max_price'):
+        price &= Q(price__lte=filters.get('max_price'))
+    if price:
+        conditions['price'] = price
+
+    for facet in ['bedrooms', 'bathrooms', 'property_type']:
+        if filters.get(facet):
+            conditions[facet] = Q(**{facet: filters.get(facet)})
+
+    for facet in BOOLEAN_FACETS:
+        if filters.get(facet):
+            conditions[facet] = Q(**{facet: _is_true(filters.get(facet))})
+
+    for facet, options in [('amenities', AMENITIES), ('utilities', UTILITIES)]:
+        selected = [option.strip().lower() for option in filters.getlist(f'{facet}[]')]
+        selected = [option for option in options if option in selected]
+        if selected:
+            conditions[facet] = Q(**{option: True for option in selected})
+
+    return conditions
+
+def parse_price_buckets(value):
+    """Parse '0,1000,1500,2000' into increasing bucket boundaries, raising ValueError if invalid."""
+    try:
+        boundaries = [Decimal(part) for part in value.split(',')]
+    except InvalidOperation:
+        raise ValueError("Price buckets must be numbers.")
+    if not 1 <= len(boundaries) <= MAX_PRICE_BUCKETS:
+        raise ValueError(f"Between 1 and {MAX_PRICE_BUCKETS} price buckets can be requested.")
+    if any(not boundary.is_finite() or boundary < 0 for boundary in boundaries):
+        raise ValueError("Price buckets must be positive numbers.")
+    if any(low >= high for low, high in zip(boundaries, boundaries[1:])):
+        raise ValueError("Price buckets must be in increasing order.")
+    return boundaries
+
+def listing_facets(queryset, filters, price_buckets):
+    """
+    Counts per filter option for the listings of `queryset` (the search scope, without attribute filters)
+    and a price histogram with a bucket from each boundary of `price_buckets` to the next, the last one open.
+    """
+    conditions = listing_filter_conditions(filters)
+
+    def matching(*ignored_facets, **option):
+        return Q(*[condition for facet, condition in conditions.items() if facet not in ignored_facets], **option)
+
+    aggregates = {'total': Count('id', filter=matching())}
+    facets = {}
+
+    for facet, options in [
+        ('property_type', {value: {'property_type': value} for value in PROPERTY_TYPES}),
+        ('bedrooms', {str(count): {'bedrooms': count} for count in ROOM_COUNTS}),
+        ('bathrooms', {str(count): {'bathrooms': count} for count in ROOM_COUNTS}),
+        *[(facet, {'true': {facet: True}, 'false': {facet: False}}) for facet in BOOLEAN_FACETS],
+    ]:
+        if facet in ('bedrooms', 'bathrooms'):
+            options[f'{len(ROOM_COUNTS)}+'] = {f'{facet}__gte': len(ROOM_COUNTS)}
+        facets[facet] = {}
+        for option, lookup in options.items():
+            alias = f'{facet}__{option}'
+            aggregates[alias] = Count('id', filter=matching(facet, **lookup))
+            facets[facet][option] = alias
+
+    for facet, options in [('amenities', AMENITIES), ('utilities', UTILITIES)]:
+        facets[facet] = {}
+        for option in options:
+            alias = f'{facet}__{option}'
+            aggregates[alias] = Count('id', filter=matching(**{option: True}))
+            facets[facet][option] = alias
+
+    aggregates['price__min'] = Min('price', filter=matching('price'))
+    aggregates['price__max'] = Max('price', filter=matching('price'))
+    buckets = list(zip(price_buckets, price_buckets[1:] + [None]))
+    for i, (low, high) in enumerate(buckets):
+        lookup = {'price__gte': low} if high is None else {'price__gte': low, 'price__lt': high}
+        aggregates[f'price__bucket{i}'] = Count('id', filter=matching('price', **lookup))
+
+    results = queryset.order_by().aggregate(**aggregates)
+
+    response = {'total': results['total']}
+    for facet, options in facets.items():
+        response[facet] = {option: results[alias] for option, alias in options.items()}
+    response['price'] = {
+        'min': results['price__min'],
+        'max': results['price__max'],
+        'histogram': [
+            {'min': low, 'max': high, 'count': results[f'price__bucket{i}']}
+            for i, (low, high) in enumerate(buckets)
+        ],
+    }
+    return response
@@ -0,0 +1,151 @@
+import hashlib
+import numpy as np
+from django.db.models import F, Q
+
+# Feature extraction shared by train_recommender and ListingRecommendationList.
+# Both build their matrices from FEATURE_COLUMNS so training and serving always use the same column order.
+
+USER_FEATURES = ['user_id', 'preferred_location', 'budget_min', 'budget_max']
+LISTING_FEATURES = [
+    'listing_price', 'listing_lat', 'listing_lng', 'pet_friendly',
+    # Amenities and Utilities
+    'heating', 'ac', 'fridge', 'laundry_type', 'heat', 'hydro', 'water', 'internet', 'furnished', 'shareable',
+]
+FEATURE_COLUMNS = USER_FEATURES + LISTING_FEATURES
+
+# Listing model fields read for each listing feature, in LISTING_FEATURES order
+LISTING_FIELDS = [
+    'price', 'latitude', 'longitude', 'pet_friendly',
+    'heating', 'ac', 'fridge', 'laundry_type', 'heat', 'hydro', 'water', 'internet', 'furnished', 'shareable',
+]
+USER_FIELDS = ['id', 'preferred_location', 'budget_min', 'budget_max']
+
+# Listing attributes compared by the "similar listings" index
+SIMILARITY_FIELDS = [
+    'price', 'bedrooms', 'bathrooms', 'sqft_area', 'latitude', 'longitude', 'pet_friendly',
+    'heating', 'ac', 'fridge', 'laundry_type', 'heat', 'hydro', 'water', 'internet', 'furnished', 'shareable',
+]
+
+LAUNDRY_CODES = {'I': 2, 'S': 1, 'N': 0}
+
+# Keyed hashing trick for preferred_location. Unlike the built-in hash(), which is salted per process,
+# blake2b gives the same bucket in every worker and across restarts, so inference sees the trained feature.
+LOCATION_HASH_KEY = b"simpleRentals.preferred_location"
+LOCATION_HASH_BUCKETS = 2 ** 20
+
+def encode_location(value):
+    normalized = " ".join((value or "").split()).casefold()
+    if not normalized:
+        return 0
+    digest = hashlib.blake2b(normalized.encode(), digest_size=8, key=LOCATION_HASH_KEY).digest()
+    # Bucket 0 is reserved for "no preferred location"
+    return 1 + int.from_bytes(digest, "big") % (LOCATION_HASH_BUCKETS - 1)
+
+def _encode_strings(values, encoder):
+    """Encode a column of strings, calling `encoder` once per distinct value."""
+    uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    codes = np.array([encoder(value) for value in uniques], dtype=np.float64)
+    return codes[inverse] if len(uniques) else np.zeros(0)
+
+def _float_column(values):
+    # None (missing coordinates/budgets) becomes NaN, then 0
+    return np.nan_to_num(np.array(values, dtype=np.float64), nan=0.0)
+
+def _listing_columns(columns, fields=LISTING_FIELDS):
+    """Turn listing columns (tuples of raw values, one per field) into a 2D float matrix."""
+    encoded = []
+    for field, values in zip(fields, columns):
+        if field == 'laundry_type':
+            encoded.append(_encode_strings(values, lambda code: LAUNDRY_CODES.get(code, -1)))
+        else:
+            encoded.append(_float_column(values))
+    return np.column_stack(encoded)
+
+def _user_columns(columns):
+    """Turn the USER_FIELDS columns (tuples of raw values) into a 2D float matrix."""
+    user_ids, locations, budget_min, budget_max = columns
+    locations = [location or "" for location in locations]
+    return np.column_stack([
+        _float_column(user_ids),
+        _encode_strings(locations, encode_location),
+        _float_column(budget_min),
+        _float_column(budget_max),
+    ])
+
+def user_feature_row(user):
+    return _user_columns([[getattr(user, field)] for field in USER_FIELDS])[0]
+
+def user_feature_matrix(users):
+    """Return (user_ids, user feature matrix) for a MarketplaceUser queryset, read with a single values_list."""
+    rows = list(users.values_list(*USER_FIELDS))
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(USER_FEATURES)))
+
+    columns = list(zip(*rows))
+    return np.array(columns[0], dtype=np.int64), _user_columns(columns)
+
+def listing_feature_matrix(listings):
+    """Return (listing_ids, listing feature matrix) for a Listing queryset, read with a single values_list."""
+    rows = list(listings.values_list('id', *LISTING_FIELDS))
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(LISTING_FEATURES)))
+
+    ids, *columns = zip(*rows)
+    return np.array(ids, dtype=np.int64), _listing_columns(columns)
+
+def listing_content_matrix(listings):
+    """Return (listing_ids, attribute matrix) used to find similar listings, in SIMILARITY_FIELDS order."""
+    rows = list(listings.values_list('id', *SIMILARITY_FIELDS))
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(SIMILARITY_FIELDS)))
+
+    ids, *columns = zip(*rows)
+    return np.array(ids, dtype=np.int64), _listing_columns(columns, SIMILARITY_FIELDS)
+
+def scoring_matrix(user, listings):
+    """Return (listing_ids, feature matrix) to score every listing in `listings` for `user`."""
+    listing_ids, listing_matrix = listing_feature_matrix(listings)
+    user_matrix = np.tile(user_feature_row(user), (len(listing_ids), 1))
+    return listing_ids, np.hstack([user_matrix, listing_matrix])
+
+def in_budget_interactions(interactions):
+    """Keep interactions with listings inside the user's budget (or where the budget is not set)."""
+    return interactions.filter(
+        Q(user__budget_min__isnull=True) | Q(user__budget_max__isnull=True) |
+        Q(listing__price__gte=F('user__budget_min'), listing__price__lte=F('user__budget_max'))
+    )
+
+def _training_rows(columns):
+    user_columns = columns[:len(USER_FIELDS)]
+    listing_columns = columns[len(USER_FIELDS):-1]
+    interaction_types = np.array(columns[-1], dtype=object)
+
+    X = np.hstack([_user_columns(user_columns), _listing_columns(listing_columns)])
+    y = np.where(interaction_types == 'favourite', 1.0, 0.5)
+    return X, y
+
+def interaction_training_chunks(interactions, chunk_size=10_000):
+    """
+    Yield (X, y) blocks of at most chunk_size rows for a ListingInteraction queryset, X in FEATURE_COLUMNS order.
+
+    Rows are streamed with a server-side cursor, so memory stays bounded by chunk_size whatever the history size.
+    """
+    user_fields = [f'user__{field}' for field in USER_FIELDS]
+    listing_fields = [f'listing__{field}' for field in LISTING_FIELDS]
+    rows = interactions.order_by('id').values_list(*user_fields, *listing_fields, 'interaction_type')
+
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield _training_rows(list(zip(*chunk)))
+            chunk = []
+    if chunk:
+        yield _training_rows(list(zip(*chunk)))
+
+def interaction_training_data(interactions):
+    """Return (X, y) for a ListingInteraction queryset, X in FEATURE_COLUMNS order."""
+    blocks = list(interaction_training_chunks(interactions))
+    if not blocks:
+        return np.zeros((0, len(FEATURE_COLUMNS))), np.zeros(0)
+    return np.vstack([X for X, _ in blocks]), np.concatenate([y for _, y in blocks])
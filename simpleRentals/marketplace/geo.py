@@ -0,0 +1,191 @@
+from math import radians, cos
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt, Substr
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.045  # Length of one degree of latitude (in km)
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # Precision stored on Listing (~5m x 5m cells)
+MAX_VIEWPORT_CELLS = 32  # Upper bound on the prefixes used to cover a viewport
+MAX_CLUSTER_CELLS = 1024  # Upper bound on the clusters returned for a viewport
+
+# Map zoom level (web mercator, 0-22) -> geohash precision used to cluster listings.
+# Each precision step is roughly 2.5 zoom levels, keeping a handful of clusters per screen tile.
+ZOOM_PRECISIONS = [(3, 1), (5, 2), (8, 3), (10, 4), (13, 5), (15, 6), (18, 7), (20, 8)]
+MAX_ZOOM = 22
+
+def bounding_box(lat, lng, radius_km):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing a circle of radius_km around lat/lng."""
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    # Degrees of longitude shrink towards the poles, clamp to avoid dividing by ~0
+    lng_delta = radius_km / (KM_PER_DEGREE_LAT * max(cos(radians(lat)), 0.01))
+    return (
+        max(lat - lat_delta, -90), min(lat + lat_delta, 90),
+        max(lng - lng_delta, -180), min(lng + lng_delta, 180),
+    )
+
+def distance_km_expression(lat, lng, lat_field='latitude', lng_field='longitude'):
+    """Database expression computing the great-circle (haversine) distance in km from lat/lng."""
+    origin_lat = Radians(Value(lat, output_field=FloatField()))
+    origin_lng = Radians(Value(lng, output_field=FloatField()))
+    dlat = Radians(F(lat_field)) - origin_lat
+    dlng = Radians(F(lng_field)) - origin_lng
+
+    a = (
+        Power(Sin(dlat / 2), 2)
+        + Cos(origin_lat) * Cos(Radians(F(lat_field))) * Power(Sin(dlng / 2), 2)
+    )
+    # Least() guards against rounding pushing sqrt(a) slightly above 1
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0, output_field=FloatField())))
+
+def filter_within_radius(queryset, lat, lng, radius_km):
+    """Filter a Listing queryset to rows within radius_km of lat/lng, annotated with distance_km."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    return (
+        queryset
+        .filter(
+            latitude__range=(min_lat, max_lat),
+            longitude__range=(min_lng, max_lng),
+        )
+        .annotate(distance_km=distance_km_expression(lat, lng))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km')
+    )
+
+### GEOHASH SECTION - START ###
+# Listings store a geohash so map viewports can be answered with indexed prefix lookups
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Encode lat/lng as a geohash string, or None when either coordinate is missing."""
+    if lat is None or lng is None:
+        return None
+
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash bits alternate between longitude and latitude, starting with longitude
+
+    while len(geohash) < precision:
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            bounds[0] = mid
+        else:
+            bits = bits << 1
+            bounds[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+def geohash_cell_size(precision):
+    """Return (lat_degrees, lng_degrees) covered by a single cell at the given precision."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+def _cells_per_axis(min_value, max_value, cell_size):
+    return int(max_value // cell_size) - int(min_value // cell_size) + 1
+
+def bbox_cell_count(min_lat, min_lng, max_lat, max_lng, precision):
+    """Number of geohash cells of the given precision a bounding box overlaps."""
+    lat_size, lng_size = geohash_cell_size(precision)
+    lat_cells = _cells_per_axis(min_lat + 90, max_lat + 90, lat_size)
+    lng_cells = _cells_per_axis(min_lng + 180, max_lng + 180, lng_size)
+    return lat_cells * lng_cells
+
+def finest_precision(min_lat, min_lng, max_lat, max_lng, max_cells, max_precision=GEOHASH_PRECISION):
+    """The finest precision, up to max_precision, at which a bounding box overlaps at most max_cells cells."""
+    for precision in range(max_precision, 0, -1):
+        if bbox_cell_count(min_lat, min_lng, max_lat, max_lng, precision) <= max_cells:
+            return precision
+    return 1
+
+def geohash_cells_covering(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_VIEWPORT_CELLS):
+    """
+    Return the geohash prefixes covering a bounding box, using the finest precision that
+    needs at most max_cells prefixes.
+    """
+    precision = finest_precision(min_lat, min_lng, max_lat, max_lng, max_cells)
+
+    lat_size, lng_size = geohash_cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            cells.add(encode_geohash(lat, lng, precision))
+            if lng >= max_lng:
+                break
+            lng = min(lng + lng_size, max_lng)
+        if lat >= max_lat:
+            break
+        lat = min(lat + lat_size, max_lat)
+
+    return sorted(cells)
+
+def parse_bbox(value):
+    """Parse a 'minLat,minLng,maxLat,maxLng' string into floats, raising ValueError if invalid."""
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError("A bbox needs exactly 4 values.")
+
+    min_lat, min_lng, max_lat, max_lng = parts
+    if not (-90 <= min_lat <= max_lat <= 90) or not (-180 <= min_lng <= max_lng <= 180):
+        raise ValueError("The bbox coordinates are out of range or in the wrong order.")
+    return min_lat, min_lng, max_lat, max_lng
+
+def filter_within_bbox(queryset, min_lat, min_lng, max_lat, max_lng):
+    """Filter a Listing queryset to a viewport using geohash prefixes, then trim to the exact box."""
+    cells = geohash_cells_covering(min_lat, min_lng, max_lat, max_lng)
+    prefix_filter = Q()
+    for cell in cells:
+        prefix_filter |= Q(geohash__startswith=cell)
+
+    return queryset.filter(prefix_filter).filter(
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    )
+
+def zoom_to_precision(zoom):
+    """Return the geohash precision used to cluster listings at a given map zoom level."""
+    for max_zoom, precision in ZOOM_PRECISIONS:
+        if zoom < max_zoom:
+            return precision
+    return GEOHASH_PRECISION
+
+def cluster_precision(zoom, min_lat, min_lng, max_lat, max_lng, max_cells=MAX_CLUSTER_CELLS):
+    """
+    The precision to cluster a viewport at: the zoom level's, coarsened until the viewport spans at most
+    max_cells cells, so a large bbox sent with a high zoom cannot ask for one row per listing.
+    """
+    return finest_precision(min_lat, min_lng, max_lat, max_lng, max_cells, max_precision=zoom_to_precision(zoom))
+
+def cluster_listings(queryset, precision):
+    """Group a Listing queryset by geohash cell in the database, one row per non-empty cell."""
+    return (
+        queryset
+        .exclude(geohash__isnull=True)
+        .annotate(cell=Substr('geohash', 1, precision))
+        .values('cell')
+        .annotate(
+            count=Count('id'),
+            latitude=Avg('latitude'),
+            longitude=Avg('longitude'),
+            min_price=Min('price'),
+            max_price=Max('price'),
+        )
+        .order_by('cell')
+    )
+
+### GEOHASH SECTION - END ###
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from marketplace.models import Listing, ListingInteraction
+from marketplace.similarity import build_similarity_index, similarity_registry
+
+class Command(BaseCommand):
+    help = "Builds the item-to-item index behind the 'similar listings' endpoint and saves it to disk"
+
+    def handle(self, *args, **kwargs):
+        index = build_similarity_index(Listing.objects.all(), ListingInteraction.objects.all())
+
+        # Atomic write, running servers pick the new index up on their next mtime check
+        similarity_registry.save(index)
+
+        self.stdout.write(self.style.SUCCESS(f"Similarity index built for {len(index)} listings and saved."))
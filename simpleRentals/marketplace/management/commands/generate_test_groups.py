@@ -220,6 +220,8 @@ class Command(BaseCommand):
                         group_status=random.choice(['O', 'P', 'F', 'S', 'U'])
                     )
                     group.members.set(member_roommates)
+                    convo.group = group
+                    convo.save(update_fields=['group'])
                     total_groups += 1
 
             Message.objects.bulk_create(msgs)
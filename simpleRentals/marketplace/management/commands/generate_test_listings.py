@@ -6,6 +6,7 @@ from django.core.exceptions import FieldDoesNotExist
 
 from marketplace.models import MarketplaceUser
 from ...models import Listing
+from ...geo import encode_geohash
 
 # Real addresses + coords (Waterloo/Kitchener)
 ADDRESSES = [
@@ -124,6 +125,7 @@ class Command(BaseCommand):
                     internet=random.choice([True, False]),
                     furnished=random.choice([True, False]),
                     owner=owner,
+                    geohash=encode_geohash(lat, lng),
                     **{lat_field: lat, lng_field: lng}
                 )
 
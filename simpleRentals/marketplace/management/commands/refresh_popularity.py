@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from marketplace.popularity import rebuild_popularity
+
+class Command(BaseCommand):
+    help = "Rebuilds the time-decayed listing popularity counters from all listing interactions, from a new epoch"
+
+    def handle(self, *args, **kwargs):
+        # Counters are kept up to date as interactions come in, this resyncs them (e.g. after seeding data).
+        # Run it periodically (e.g. weekly): it also moves the score epoch to today, before the scores overflow
+        rows = rebuild_popularity()
+        self.stdout.write(self.style.SUCCESS(f"Popularity rebuilt for {rows} listings."))
@@ -0,0 +1,90 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+from marketplace.models import MarketplaceUser, Listing, Favorites, ListingRecommendation
+from marketplace.recommender import recommender_registry, rank_listings_for_users
+from marketplace.features import user_feature_matrix, listing_feature_matrix
+
+# Set once per worker process (or once in-process when running without a pool)
+_state = {}
+
+def _init_scoring(model, listing_ids, listing_matrix, top_n):
+    _state.update(model=model, listing_ids=listing_ids, listing_matrix=listing_matrix, top_n=top_n)
+
+def _refresh_batch(user_ids):
+    """Score a batch of users and replace their stored top-N lists. Returns the number of users written."""
+    users = MarketplaceUser.objects.filter(id__in=user_ids).order_by('id')
+    batch_ids, user_matrix = user_feature_matrix(users)
+
+    favourites = {}
+    for user_id, listing_id in (Favorites.favorite_listings.through.objects
+                                .filter(favorites__user_id__in=user_ids)
+                                .values_list('favorites__user_id', 'listing_id')):
+        favourites.setdefault(user_id, set()).add(listing_id)
+
+    ranked = rank_listings_for_users(
+        _state['model'], batch_ids, user_matrix, favourites,
+        _state['listing_ids'], _state['listing_matrix'], _state['top_n'],
+    )
+
+    computed_at = timezone.now()
+    rows = [
+        ListingRecommendation(user_id=user_id, listing_id=listing_id, rank=rank, score=score, computed_at=computed_at)
+        for user_id, top in ranked.items()
+        for rank, (listing_id, score) in enumerate(top)
+    ]
+    with transaction.atomic():
+        ListingRecommendation.objects.filter(user_id__in=user_ids).delete()
+        ListingRecommendation.objects.bulk_create(rows, batch_size=1000)
+
+    return len(ranked)
+
+class Command(BaseCommand):
+    help = "Scores all active users in batches and stores their top-N recommended listings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-n", type=int, default=10,
+                            help="Listings to store per user (default 10).")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Users scored per batch (default 500).")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Worker processes used to score batches (default 1, no pool).")
+
+    def handle(self, *args, **opts):
+        model = recommender_registry.get()
+        if model is None:
+            self.stdout.write(self.style.WARNING("No trained model found. Run train_recommender first."))
+            return
+
+        top_n = max(1, opts["top_n"])
+        batch_size = max(1, opts["batch_size"])
+        workers = max(1, opts["workers"])
+
+        # Listing features are read once and shared by every batch
+        listing_ids, listing_matrix = listing_feature_matrix(Listing.objects.order_by('id'))
+        user_ids = list(MarketplaceUser.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+        batches = [user_ids[i:i + batch_size] for i in range(0, len(user_ids), batch_size)]
+
+        if workers == 1:
+            _init_scoring(model, listing_ids, listing_matrix, top_n)
+            written = sum(_refresh_batch(batch) for batch in batches)
+        else:
+            # Workers are forked whatever the platform default (spawn on macOS, forkserver from Python 3.14):
+            # a spawned process would import this module, and the models, before Django is set up
+            try:
+                mp_context = multiprocessing.get_context('fork')
+            except ValueError:
+                raise CommandError("--workers needs the fork start method, which this platform lacks.")
+            # Forked workers must open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=mp_context, initializer=_init_scoring,
+                initargs=(model, listing_ids, listing_matrix, top_n),
+            ) as pool:
+                written = sum(pool.map(_refresh_batch, batches))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored top {top_n} recommendations for {written} users ({len(batches)} batches)."
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from marketplace.search import rebuild_search_terms
+
+class Command(BaseCommand):
+    help = "Rebuilds the listing search vocabulary used to correct misspelled search words"
+
+    def handle(self, *args, **kwargs):
+        # Words are added as listings are saved, this also drops the words of deleted listings
+        words = rebuild_search_terms()
+        self.stdout.write(self.style.SUCCESS(f"Search vocabulary rebuilt with {words} words."))
@@ -1,64 +1,137 @@
+import os
+import tempfile
+import numpy as np
 from django.core.management.base import BaseCommand
-from marketplace.models import ListingInteraction, MarketplaceUser, Listing
-import joblib
-import pandas as pd
+from django.db.models import Max, Q
+from marketplace.models import ListingInteraction, RecommenderModelVersion
+from marketplace.recommender import recommender_registry
+from marketplace.features import FEATURE_COLUMNS, in_budget_interactions, interaction_training_chunks
 from sklearn.ensemble import RandomForestRegressor
-import os
 
 class Command(BaseCommand):
     help = "Trains the recommendation model and saves it to disk"
 
-    def handle(self, *args, **kwargs):
-        interactions = ListingInteraction.objects.select_related('user', 'listing')
-
-        rows = []
-        for i in interactions:
-            user = i.user
-            listing = i.listing
-
-            # Only include if budget is set and price is within budget
-            if user.budget_min is not None and user.budget_max is not None:
-                if not (user.budget_min <= listing.price <= user.budget_max):
-                    continue
-
-            rows.append({
-                'user_id': user.id,
-                'preferred_location': hash(user.preferred_location or ""),
-                'budget_min': user.budget_min or 0,
-                'budget_max': user.budget_max or 0,
-                'listing_price': float(listing.price),
-                'listing_lat': listing.latitude,
-                'listing_lng': listing.longitude,
-                'pet_friendly': int(listing.pet_friendly),
-
-                # Amenities and Utilities
-                'heating': int(listing.heating),
-                'ac': int(listing.ac),
-                'fridge': int(listing.fridge),
-                'laundry_type': {'I': 2, 'S': 1, 'N': 0}.get(listing.laundry_type, -1),
-                'heat': int(listing.heat),
-                'hydro': int(listing.hydro),
-                'water': int(listing.water),
-                'internet': int(listing.internet),
-                'furnished': int(listing.furnished),
-                'shareable': int(listing.shareable),
-
-                'score': 1 if i.interaction_type == 'favourite' else 0.5,
-            })
-
-        df = pd.DataFrame(rows)
-
-        if df.empty:
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=10_000,
+                            help="Interactions streamed from the database per chunk (default 10000).")
+        parser.add_argument("--n-jobs", type=int, default=-1,
+                            help="Parallel jobs used to fit the forest (default -1, all cores).")
+        parser.add_argument("--buffer-dir", default=None,
+                            help="Directory for the on-disk feature buffer (default: system temp dir).")
+        parser.add_argument("--incremental", action="store_true",
+                            help="Only train on interactions since the last run, adding trees to the last model.")
+        parser.add_argument("--trees", type=int, default=100,
+                            help="Trees in a full model (default 100).")
+        parser.add_argument("--trees-per-run", type=int, default=20,
+                            help="Trees added by an incremental run (default 20).")
+        parser.add_argument("--max-trees", type=int, default=500,
+                            help="Incremental runs retrain from scratch once the forest would exceed this (default 500).")
+        parser.add_argument("--keep-versions", type=int, default=2,
+                            help="Model versions kept on disk, the live one included (default 2: live + rollback).")
+
+    def handle(self, *args, **opts):
+        last_run = RecommenderModelVersion.objects.order_by('-version').first()
+        base_model = None
+        if opts["incremental"] and last_run:
+            if last_run.n_estimators + opts["trees_per_run"] > opts["max_trees"]:
+                self.stdout.write(self.style.WARNING("Forest reached --max-trees, retraining from scratch."))
+            else:
+                try:
+                    base_model = recommender_registry.load_artifact(last_run.artifact)
+                except FileNotFoundError:
+                    self.stdout.write(self.style.WARNING(
+                        f"Artifact {last_run.artifact} is missing, retraining from scratch."
+                    ))
+
+        # Watermark: everything up to the newest interaction right now is covered by this run
+        watermark = ListingInteraction.objects.order_by('-timestamp', '-id').values_list('timestamp', 'id').first()
+        if not watermark:
             self.stdout.write(self.style.WARNING("No data to train the model. Skipping."))
             return
+        last_timestamp, last_id = watermark
+
+        interactions = ListingInteraction.objects.filter(
+            Q(timestamp__lt=last_timestamp) | Q(timestamp=last_timestamp, id__lte=last_id)
+        )
+        if base_model is not None:
+            interactions = interactions.filter(
+                Q(timestamp__gt=last_run.last_interaction_timestamp) |
+                Q(timestamp=last_run.last_interaction_timestamp, id__gt=last_run.last_interaction_id)
+            )
+
+        # Only include interactions where the listing price is within the user's budget (if set)
+        interactions = in_budget_interactions(interactions)
+
+        if base_model is not None:
+            # Warm start: keep the existing trees and fit the new ones on the new interactions only
+            model = base_model
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + opts["trees_per_run"], n_jobs=opts["n_jobs"])
+        else:
+            model = RandomForestRegressor(n_estimators=opts["trees"], n_jobs=opts["n_jobs"])
+
+        rows = self.fit_streamed(model, interactions, opts)
+        if not rows:
+            if base_model is not None:
+                self.stdout.write(self.style.SUCCESS("No new interactions since the last run. Model is up to date."))
+            else:
+                self.stdout.write(self.style.WARNING("No data to train the model. Skipping."))
+            return
+
+        # Requests score a few hundred rows at a time, parallel predict() would only add thread overhead
+        model.set_params(warm_start=False, n_jobs=None)
+
+        version = (RecommenderModelVersion.objects.aggregate(Max('version'))['version__max'] or 0) + 1
+        artifact = f"recommender-v{version}.pkl"
+        # Atomic write, running servers pick the new model up on their next mtime check
+        recommender_registry.save(model, artifact_name=artifact)
+
+        RecommenderModelVersion.objects.create(
+            version=version,
+            mode='I' if base_model is not None else 'F',
+            artifact=artifact,
+            n_estimators=model.n_estimators,
+            interactions_trained=rows,
+            last_interaction_timestamp=last_timestamp,
+            last_interaction_id=last_id,
+        )
+        self.prune_versions(max(1, opts["keep_versions"]))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Model v{version} trained on {rows} {'new ' if base_model is not None else ''}interactions "
+            f"({model.n_estimators} trees) and saved."
+        ))
+
+    def prune_versions(self, keep):
+        """Delete the artifacts, and their version rows, of all but the `keep` newest versions."""
+        old = list(RecommenderModelVersion.objects.order_by('-version')[keep:])
+        RecommenderModelVersion.objects.filter(id__in=[version.id for version in old]).delete()
+        for version in old:
+            recommender_registry.delete_artifact(version.artifact)
+
+    def fit_streamed(self, model, interactions, opts):
+        """Stream the interactions into an on-disk feature buffer and fit the model on it. Returns the row count."""
+        total = interactions.count()
+        if not total:
+            return 0
 
-        X = df.drop('score', axis=1)
-        y = df['score']
+        with tempfile.TemporaryDirectory(dir=opts["buffer_dir"]) as buffer_dir:
+            # float32 is what the forest trains on, so fitting reads the memmap without another full copy
+            X = np.lib.format.open_memmap(
+                os.path.join(buffer_dir, "X.npy"), mode="w+", dtype=np.float32, shape=(total, len(FEATURE_COLUMNS))
+            )
+            y = np.lib.format.open_memmap(os.path.join(buffer_dir, "y.npy"), mode="w+", dtype=np.float64, shape=(total,))
 
-        model = RandomForestRegressor()
-        model.fit(X, y)
+            # Same columns, in the same order, as the features scored by ListingRecommendationList
+            rows = 0
+            for X_chunk, y_chunk in interaction_training_chunks(interactions, max(1, opts["chunk_size"])):
+                take = min(len(y_chunk), total - rows)
+                X[rows:rows + take] = X_chunk[:take]
+                y[rows:rows + take] = y_chunk[:take]
+                rows += take
+                if rows == total:
+                    break
 
-        os.makedirs("ml_model", exist_ok=True)
-        joblib.dump(model, 'ml_model/recommender.pkl')
+            model.fit(X[:rows], y[:rows])
+            del X, y
 
-        self.stdout.write(self.style.SUCCESS("Model trained and saved."))
+        return rows
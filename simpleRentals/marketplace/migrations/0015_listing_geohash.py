@@ -0,0 +1,69 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:53
+
+from django.db import migrations, models
+
+# Copy of geo.encode_geohash as it was when this migration was written, so later changes to the app code
+# cannot change what the backfill does
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash bits alternate between longitude and latitude, starting with longitude
+
+    while len(geohash) < precision:
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            bounds[0] = mid
+        else:
+            bits = bits << 1
+            bounds[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def backfill_geohash(apps, schema_editor):
+    Listing = apps.get_model('marketplace', 'Listing')
+    listings = Listing.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude')
+    batch = []
+    for listing in listings.iterator(chunk_size=1000):
+        listing.geohash = encode_geohash(listing.latitude, listing.longitude)
+        batch.append(listing)
+        if len(batch) >= 1000:
+            Listing.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Listing.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0014_listing_lat_lng_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['geohash', 'price'], name='listing_geohash_price_idx', opclasses=['varchar_pattern_ops', 'numeric_ops']),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0016_listingrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommenderModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True)),
+                ('mode', models.CharField(choices=[('F', 'Full'), ('I', 'Incremental')], max_length=1)),
+                ('artifact', models.CharField(max_length=255)),
+                ('n_estimators', models.PositiveIntegerField()),
+                ('interactions_trained', models.PositiveIntegerField()),
+                ('last_interaction_timestamp', models.DateTimeField()),
+                ('last_interaction_id', models.BigIntegerField()),
+                ('trained_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='listinginteraction',
+            index=models.Index(fields=['timestamp', 'id'], name='interaction_watermark_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0017_recommendermodelversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingPopularity',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='marketplace.listing')),
+                ('city', models.CharField(max_length=100)),
+                ('price_band', models.IntegerField()),
+                ('score', models.FloatField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('favourites', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['city', 'price_band', '-score'], name='popularity_city_band_idx'), models.Index(fields=['price_band', '-score'], name='popularity_band_idx'), models.Index(fields=['-score'], name='popularity_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_conversation_group(apps, schema_editor):
+    """Link each existing group chat (participants == group members) to its group."""
+    Group = apps.get_model('marketplace', 'Group')
+    Conversation = apps.get_model('marketplace', 'Conversation')
+
+    # listing id -> [(frozenset of member user ids, group id)]
+    groups_by_listing = {}
+    for group in Group.objects.prefetch_related('members').iterator(chunk_size=1000):
+        member_ids = frozenset(member.user_id for member in group.members.all())
+        if len(member_ids) > 1:
+            groups_by_listing.setdefault(group.listing_id, []).append((member_ids, group.id))
+
+    conversations = Conversation.objects.filter(listing_id__in=groups_by_listing).prefetch_related('participants')
+    batch = []
+    for conversation in conversations.iterator(chunk_size=1000):
+        participant_ids = frozenset(participant.id for participant in conversation.participants.all())
+        for member_ids, group_id in groups_by_listing[conversation.listing_id]:
+            if participant_ids == member_ids:
+                conversation.group_id = group_id
+                batch.append(conversation)
+                break
+        if len(batch) >= 1000:
+            Conversation.objects.bulk_update(batch, ['group'])
+            batch = []
+    if batch:
+        Conversation.objects.bulk_update(batch, ['group'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0020_message_history_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='marketplace.group'),
+        ),
+        migrations.RunPython(backfill_conversation_group, migrations.RunPython.noop),
+    ]
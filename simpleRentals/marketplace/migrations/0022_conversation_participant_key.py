@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:29
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_participant_key(apps, schema_editor):
+    """Fingerprint existing participant sets. Where a listing already has duplicates, the oldest one keeps the key."""
+    Conversation = apps.get_model('marketplace', 'Conversation')
+    seen = set()
+    batch = []
+    for conversation in Conversation.objects.order_by('id').prefetch_related('participants').iterator(chunk_size=1000):
+        user_ids = sorted(participant.id for participant in conversation.participants.all())
+        if not user_ids:
+            continue
+        key = hashlib.sha256(",".join(map(str, user_ids)).encode()).hexdigest()
+        if (conversation.listing_id, key) in seen:
+            continue
+        seen.add((conversation.listing_id, key))
+        conversation.participant_key = key
+        batch.append(conversation)
+        if len(batch) >= 1000:
+            Conversation.objects.bulk_update(batch, ['participant_key'])
+            batch = []
+    if batch:
+        Conversation.objects.bulk_update(batch, ['participant_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0021_conversation_group'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='participant_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_participant_key, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('listing', 'participant_key'), name='conversation_participants_unique'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_read_states(apps, schema_editor):
+    """
+    A read cursor for every participant from the old Message.read flags: the cursor sits just before the
+    participant's oldest unread message from someone else, everything after it counts as unread.
+    """
+    Conversation = apps.get_model('marketplace', 'Conversation')
+    ConversationReadState = apps.get_model('marketplace', 'ConversationReadState')
+    batch = []
+    for conversation in Conversation.objects.order_by('id').prefetch_related('participants').iterator(chunk_size=500):
+        messages = list(conversation.messages.order_by('id').values_list('id', 'sender_id', 'read'))
+        for participant in conversation.participants.all():
+            from_others = [(message_id, read) for message_id, sender_id, read in messages if sender_id != participant.id]
+            first_unread = next((message_id for message_id, read in from_others if not read), None)
+            if first_unread is None:
+                last_read_id = messages[-1][0] if messages else 0
+            else:
+                last_read_id = max((message_id for message_id, _, _ in messages if message_id < first_unread), default=0)
+            batch.append(ConversationReadState(
+                conversation=conversation, user=participant, last_read_id=last_read_id,
+                unread_count=sum(1 for message_id, _ in from_others if message_id > last_read_id),
+            ))
+        if len(batch) >= 1000:
+            ConversationReadState.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ConversationReadState.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0022_conversation_participant_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_id', models.BigIntegerField(default=0)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='marketplace.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('conversation', 'user'), name='conversation_read_state_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_read_states, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='read',
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:03
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0024_message_search'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='ListingSearchTerm',
+            fields=[
+                ('word', models.TextField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='search_text',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(django.db.models.functions.text.Concat('street_address', models.Value(' '), 'city', models.Value(' '), 'postal_code', output_field=models.TextField())), output_field=models.TextField()),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('street_address', 'city', 'postal_code', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('description', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='listing_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='listing_search_text_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='listingsearchterm',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['word'], name='listing_search_term_idx', opclasses=['gin_trgm_ops']),
+        ),
+        # Spelling vocabulary from the existing listings
+        migrations.RunSQL(
+            "INSERT INTO marketplace_listingsearchterm (word) "
+            "SELECT word FROM ts_stat('SELECT search_vector FROM marketplace_listing')",
+            migrations.RunSQL.noop,
+        ),
+    ]
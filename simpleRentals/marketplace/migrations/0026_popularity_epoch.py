@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:37
+
+from datetime import datetime, timezone
+from django.db import migrations, models
+
+# The epoch existing scores were computed from (popularity.POPULARITY_EPOCH when this migration was written)
+INITIAL_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def create_epoch(apps, schema_editor):
+    apps.get_model('marketplace', 'PopularityEpoch').objects.create(pk=1, epoch=INITIAL_EPOCH)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0025_listing_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularityEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_epoch, migrations.RunPython.noop),
+    ]
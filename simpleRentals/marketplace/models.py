@@ -1,4 +1,9 @@
-from django.db import models
+import hashlib
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Concat, Lower
+from django.dispatch import Signal
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
@@ -50,6 +55,13 @@ class RoommateUser(models.Model):
     gender_preference = models.CharField(max_length=1, choices=[('F', 'Female'), ('M', 'Male'), ('O', 'Open')])
     open_to_message = models.BooleanField(default=True)
 
+LISTING_SEARCH_CONFIG = 'english'  # Text search configuration of Listing.search_vector
+
+class ListingManager(models.Manager):
+    def get_queryset(self):
+        # The search columns are only used inside search queries, don't load them with every listing
+        return super().get_queryset().defer('search_vector', 'search_text')
+
 class Listing(models.Model):
     # Basic Details
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -82,6 +94,7 @@ class Listing(models.Model):
     postal_code = models.CharField(max_length=20)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)  # Spatial cell key, see geo.py
 
     # Additional fees and costs
     heat = models.BooleanField(default=False)
@@ -93,6 +106,55 @@ class Listing(models.Model):
     # Foreign Keys
     owner = models.ForeignKey(MarketplaceUser, related_name="listings", on_delete=models.CASCADE)
 
+    # Search columns computed by Postgres (see search.py): a weighted full-text document, and the address
+    # lowercased for trigram indexed substring matching
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('street_address', 'city', 'postal_code', weight='A', config=LISTING_SEARCH_CONFIG) +
+            SearchVector('description', weight='B', config=LISTING_SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    search_text = models.GeneratedField(
+        expression=Lower(Concat(
+            'street_address', models.Value(' '), 'city', models.Value(' '), 'postal_code',
+            output_field=models.TextField(),
+        )),
+        output_field=models.TextField(),
+        db_persist=True,
+    )
+
+    objects = ListingManager()
+
+    class Meta:
+        indexes = [
+            # Supports the bounding box prefilter used by radius searches
+            models.Index(fields=['latitude', 'longitude'], name='listing_lat_lng_idx'),
+            # Viewport queries are geohash prefix lookups, pattern ops let LIKE 'prefix%' use the index
+            models.Index(
+                fields=['geohash', 'price'], name='listing_geohash_price_idx',
+                opclasses=['varchar_pattern_ops', 'numeric_ops'],
+            ),
+            # Keyset pagination of listing results (newest first)
+            models.Index(fields=['created_at', 'id'], name='listing_created_idx'),
+            # Search: full-text, and trigram so LIKE '%term%' on the address is an index lookup
+            GinIndex(fields=['search_vector'], name='listing_search_idx'),
+            GinIndex(fields=['search_text'], name='listing_search_text_idx', opclasses=['gin_trgm_ops']),
+        ]
+
+class ListingSearchTerm(models.Model):
+    """
+    A word (lexeme) of some listing's search_vector. Search words no listing contains are corrected to the
+    closest known word with a trigram lookup on this small table, instead of fuzzy matching every listing.
+    """
+    word = models.TextField(primary_key=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['word'], name='listing_search_term_idx', opclasses=['gin_trgm_ops']),
+        ]
+
 class ListingInteraction(models.Model):
     INTERACTION_TYPES = [('click', 'Click'), ('favourite', 'Favourite')]
 
@@ -101,6 +163,57 @@ class ListingInteraction(models.Model):
     interaction_type = models.CharField(max_length=10, choices=INTERACTION_TYPES)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Incremental training reads interactions past the last (timestamp, id) watermark
+            models.Index(fields=['timestamp', 'id'], name='interaction_watermark_idx'),
+        ]
+
+class ListingPopularity(models.Model):
+    """Rolling, time-decayed interaction counters per listing (see popularity.py)."""
+    listing = models.OneToOneField(Listing, primary_key=True, related_name="popularity", on_delete=models.CASCADE)
+    # Denormalized from the listing so each ranking is a single index scan
+    city = models.CharField(max_length=100)  # Normalized (casefolded) city
+    price_band = models.IntegerField()
+    score = models.FloatField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+    favourites = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['city', 'price_band', '-score'], name='popularity_city_band_idx'),
+            models.Index(fields=['price_band', '-score'], name='popularity_band_idx'),
+            models.Index(fields=['-score'], name='popularity_score_idx'),
+        ]
+
+class PopularityEpoch(models.Model):
+    """Single row: the time ListingPopularity scores are measured from, moved forward by `refresh_popularity`."""
+    epoch = models.DateTimeField()
+
+class RecommenderModelVersion(models.Model):
+    """One row per recommender artifact written by `manage.py train_recommender`."""
+    version = models.PositiveIntegerField(unique=True)
+    mode = models.CharField(max_length=1, choices=[('F', 'Full'), ('I', 'Incremental')])
+    artifact = models.CharField(max_length=255)  # File name inside the ml_model directory
+    n_estimators = models.PositiveIntegerField()
+    interactions_trained = models.PositiveIntegerField()  # Rows used by this run only
+    # Watermark: the last interaction processed, incremental runs continue after it
+    last_interaction_timestamp = models.DateTimeField()
+    last_interaction_id = models.BigIntegerField()
+    trained_at = models.DateTimeField(default=timezone.now)
+
+class ListingRecommendation(models.Model):
+    """Precomputed top-N recommendations, written in batch by `manage.py refresh_recommendations`."""
+    user = models.ForeignKey(MarketplaceUser, related_name="recommendations", on_delete=models.CASCADE)
+    listing = models.ForeignKey(Listing, related_name="recommendations", on_delete=models.CASCADE)
+    rank = models.PositiveIntegerField()  # 0 = best match
+    score = models.FloatField()
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('user', 'rank')
+
 class Location(models.TextChoices):
     AERIAL = 'A', 'Aerial View'
     FRONT = 'F', 'Front Yard / Property Front'
@@ -138,6 +251,13 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     reviewee_role = models.CharField(max_length=1, choices=[('T', 'Tenant'), ('L', 'Landlord'), ('R', 'Roommate')])
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's reviews (newest first)
+            models.Index(fields=['reviewee', 'created_at', 'id'], name='review_reviewee_created_idx'),
+            models.Index(fields=['reviewer', 'created_at', 'id'], name='review_reviewer_created_idx'),
+        ]
+
 class Favorites(models.Model):
     user = models.ForeignKey(MarketplaceUser, related_name="wishlist", on_delete=models.CASCADE)
     favorite_listings = models.ManyToManyField(Listing, related_name='favorited_by', blank=True)
@@ -145,23 +265,103 @@ class Favorites(models.Model):
 class Conversation(models.Model):
     participants = models.ManyToManyField(MarketplaceUser, related_name='conversations')
     listing = models.ForeignKey(Listing, related_name='conversations', on_delete=models.CASCADE)
+    # Set for a roommate group's chat, so joining/leaving/deleting the group finds its conversation directly
+    group = models.ForeignKey(Group, related_name='conversations', null=True, blank=True, on_delete=models.SET_NULL)
+    # Fingerprint of the participant set, kept in sync by marketplace.signals. Unique per listing,
+    # so there is at most one conversation per set of people and listing
+    participant_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
     last_updated = models.DateTimeField(auto_now=True) 
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'participant_key'], name='conversation_participants_unique'),
+        ]
+
+    @staticmethod
+    def participant_key_for(user_ids):
+        """Order-independent fingerprint of a set of user ids (None for nobody)."""
+        user_ids = sorted({int(user_id) for user_id in user_ids})
+        if not user_ids:
+            return None
+        return hashlib.sha256(",".join(map(str, user_ids)).encode()).hexdigest()
+
     def get_last_message(self):
         return self.messages.order_by('-timestamp').first()
 
+MESSAGE_SEARCH_CONFIG = 'english'  # Text search configuration (stemming, stop words) of Message.search_vector
+
+# Sent by MessageQuerySet.bulk_create, which skips post_save, with the list of messages created
+messages_bulk_created = Signal()
+
+class MessageQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert messages and move each conversation's last_updated to its newest one, in one transaction."""
+        with transaction.atomic(using=self.db):
+            messages = super().bulk_create(objs, *args, **kwargs)
+            latest = {}
+            for message in messages:
+                latest[message.conversation_id] = max(latest.get(message.conversation_id, message.timestamp), message.timestamp)
+            if latest:
+                Conversation.objects.filter(pk__in=latest).update(last_updated=models.Case(
+                    *[models.When(pk=pk, then=models.Value(timestamp)) for pk, timestamp in latest.items()],
+                    default=models.F('last_updated'),
+                ))
+            messages_bulk_created.send(sender=Message, messages=messages)
+        return messages
+
+class MessageManager(models.Manager.from_queryset(MessageQuerySet)):
+    def get_queryset(self):
+        # search_vector is only used inside search queries, don't load it with every message
+        return super().get_queryset().defer('search_vector')
+
 class Message(models.Model):
     conversation = models.ForeignKey(Conversation, related_name='messages', on_delete=models.CASCADE)
     sender = models.ForeignKey(MarketplaceUser, related_name='sent_messages', on_delete=models.CASCADE)
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
-    read = models.BooleanField(default=False)
+    # Full-text search document, computed by Postgres from content (MessageSearchView)
+    search_vector = models.GeneratedField(
+        expression=SearchVector('content', config=MESSAGE_SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of messages (newest first)
+            models.Index(fields=['timestamp', 'id'], name='message_timestamp_idx'),
+            # Keyset pagination of a conversation's history
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='message_history_idx'),
+            # Full-text search
+            GinIndex(fields=['search_vector'], name='message_search_idx'),
+        ]
+
+    objects = MessageManager()
 
     def save(self, *args, **kwargs):
-        """Update conversation timestamp when a message is sent."""
-        super().save(*args, **kwargs)
-        self.conversation.last_updated = self.timestamp
-        self.conversation.save()
+        """Save the message and, when it is new, move its conversation's last_updated to it with one UPDATE."""
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if adding:
+                Conversation.objects.filter(pk=self.conversation_id).update(last_updated=self.timestamp)
+        if adding and Message.conversation.is_cached(self):
+            self.conversation.last_updated = self.timestamp
+
+class ConversationReadState(models.Model):
+    """
+    A participant's read cursor in a conversation: the last message they have read and how many messages
+    from others arrived since. Kept in sync by marketplace.signals, so unread badges are a single row read.
+    """
+    conversation = models.ForeignKey(Conversation, related_name='read_states', on_delete=models.CASCADE)
+    user = models.ForeignKey(MarketplaceUser, related_name='conversation_read_states', on_delete=models.CASCADE)
+    last_read_id = models.BigIntegerField(default=0)  # Id of the last message read, 0 for none
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='conversation_read_state_unique'),
+        ]
 
 class GroupInvitation(models.Model):
     group = models.ForeignKey(Group, related_name="invitations", on_delete=models.CASCADE)
@@ -0,0 +1,121 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+def link_header(links):
+    """Build a `Link` header from (url, rel) pairs, skipping missing urls."""
+    links = [f'<{url}>; rel="{rel}"' for url, rel in links if url]
+    return {'Link': ', '.join(links)} if links else None
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination: a page is read with `WHERE <ordering> < <cursor> ORDER BY ... LIMIT n`
+    on indexed columns, so page 500 costs the same as page 1.
+
+    The body stays a plain list of results, the cursors for the neighbouring pages are sent in a
+    `Link: <url>; rel="next", <url>; rel="prev"` header (exposed to the frontend via CORS).
+    Clients can ask for ?page_size=, capped at max_page_size.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        # Views whose order depends on the request (e.g. radius searches) expose a cursor_ordering property
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+    def get_paginated_response(self, data):
+        return Response(data, headers=link_header([(self.get_next_link(), 'next'), (self.get_previous_link(), 'prev')]))
+
+    def get_paginated_response_schema(self, schema):
+        return schema
+
+class ListingPagination(KeysetPagination):
+    page_size = 50
+    ordering = ('-created_at', '-id')
+
+class ReviewPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+class MessagePagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
+    ordering = ('-timestamp', '-id')
+
+class MessageSearchPagination(KeysetPagination):
+    ordering = ('-rank', '-id')  # Best matches first, the cursor holds the last rank
+
+class MessageHistoryPagination(BasePagination):
+    """
+    Pages a conversation's history around a message id: ?before=<id> returns the older messages,
+    ?after=<id> the newer ones and neither returns the latest page. Pages are always oldest first.
+
+    Both directions are keyset reads on (timestamp, id), the Link header holds the neighbouring pages
+    (rel="prev" for older messages, rel="next" for newer ones).
+    """
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "limit must be a number."})
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_anchor(self, queryset, param):
+        message_id = self.request.query_params.get(param)
+        if message_id is None:
+            return None
+        try:
+            anchor = queryset.filter(id=int(message_id)).values_list('timestamp', 'id').first()
+        except ValueError:
+            anchor = None
+        if anchor is None:
+            raise ValidationError({param: "Unknown message in this conversation."})
+        return anchor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        before = self.get_anchor(queryset, 'before')
+        after = self.get_anchor(queryset, 'after')
+        if before and after:
+            raise ValidationError({"before/after": "Use either before or after, not both."})
+        page_size = self.get_page_size(request)
+
+        if after:
+            timestamp, message_id = after
+            newer = queryset.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=message_id))
+            page = list(newer.order_by('timestamp', 'id')[:page_size + 1])
+            self.has_newer, self.has_older = len(page) > page_size, True
+            page = page[:page_size]
+        else:
+            if before:
+                timestamp, message_id = before
+                queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id))
+            page = list(queryset.order_by('-timestamp', '-id')[:page_size + 1])
+            self.has_older, self.has_newer = len(page) > page_size, before is not None
+            page = page[:page_size][::-1]
+
+        self.page = page
+        return page
+
+    def get_link(self, param, message):
+        url = remove_query_param(self.request.build_absolute_uri(), 'before' if param == 'after' else 'after')
+        return replace_query_param(url, param, message.id)
+
+    def get_paginated_response(self, data):
+        links = []
+        if self.page and self.has_newer:
+            links.append((self.get_link('after', self.page[-1]), 'next'))
+        if self.page and self.has_older:
+            links.append((self.get_link('before', self.page[0]), 'prev'))
+        return Response(data, headers=link_header(links))
+
+    def get_paginated_response_schema(self, schema):
+        return schema
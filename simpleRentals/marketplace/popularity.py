@@ -0,0 +1,149 @@
+from datetime import datetime, timezone as dt_timezone
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, FloatField, Func, Q, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .models import ListingInteraction, ListingPopularity, PopularityEpoch
+from .querysets import listing_queryset, prefetch_listings
+
+# Time-decayed popularity with forward decay: an interaction at time t adds
+#     weight * 2 ** ((t - epoch) / half-life)
+# to its listing's score. Every score shrinks by the same factor as time passes, so ranking by the stored
+# score is ranking by decayed popularity, and recording an interaction is a single counter increment.
+#
+# The increments double every half-life and would overflow a float ~20 years after the epoch, so the epoch
+# (PopularityEpoch) is moved to the present whenever `refresh_popularity` rebuilds the scores.
+POPULARITY_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)  # Before the first rebase
+POPULARITY_HALF_LIFE_DAYS = 7
+MIN_DECAY_EXPONENT = -1000  # Interactions older than ~19 years before the epoch count as 0 (2 ** -1000 ~ 1e-301)
+INTERACTION_WEIGHTS = {'click': 1.0, 'favourite': 3.0}
+PRICE_BAND_WIDTH = 500  # Listings are bucketed in $500 price bands
+
+def price_band(price):
+    return int(price // PRICE_BAND_WIDTH)
+
+def normalize_city(city):
+    return " ".join((city or "").split()).casefold()
+
+def decayed_weight(interaction_type, timestamp, epoch=POPULARITY_EPOCH):
+    elapsed_days = (timestamp - epoch).total_seconds() / 86400
+    exponent = max(elapsed_days / POPULARITY_HALF_LIFE_DAYS, MIN_DECAY_EXPONENT)
+    return INTERACTION_WEIGHTS.get(interaction_type, 0) * 2 ** exponent
+
+def popularity_epoch(lock=None):
+    """
+    The epoch the stored scores are measured from. lock='share' / 'update' holds the row until the end of the
+    transaction: scores are only added to under a share lock and rebased under an exclusive one, so an
+    increment can never be computed against an epoch the scores were just moved off.
+    """
+    clause = {None: "", 'share': " FOR SHARE", 'update': " FOR UPDATE"}[lock]
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT epoch FROM {PopularityEpoch._meta.db_table} WHERE id = 1{clause}")
+        row = cursor.fetchone()
+    return row[0] if row else POPULARITY_EPOCH
+
+def record_interaction(interaction):
+    """Fold one ListingInteraction into its listing's popularity counters."""
+    listing = interaction.listing
+    clicks = int(interaction.interaction_type == 'click')
+    favourites = int(interaction.interaction_type == 'favourite')
+
+    with transaction.atomic():
+        increment = decayed_weight(interaction.interaction_type, interaction.timestamp, popularity_epoch(lock='share'))
+        counters = {
+            'score': F('score') + increment,
+            'clicks': F('clicks') + clicks,
+            'favourites': F('favourites') + favourites,
+        }
+
+        if ListingPopularity.objects.filter(listing=listing).update(**counters):
+            return
+        try:
+            with transaction.atomic():
+                ListingPopularity.objects.create(
+                    listing=listing, city=normalize_city(listing.city), price_band=price_band(listing.price),
+                    score=increment, clicks=clicks, favourites=favourites,
+                )
+        except IntegrityError:
+            # Created concurrently by another request
+            ListingPopularity.objects.filter(listing=listing).update(**counters)
+
+def sync_listing(listing):
+    """Keep the denormalized city / price band in step after a listing is edited."""
+    ListingPopularity.objects.filter(listing=listing).update(
+        city=normalize_city(listing.city), price_band=price_band(listing.price)
+    )
+
+def rebuild_popularity():
+    """
+    Recompute every listing's counters from ListingInteraction with one aggregate query, measured from a new
+    epoch at the start of today (UTC). Returns rows written.
+    """
+    now = timezone.now()
+    epoch = datetime(now.year, now.month, now.day, tzinfo=dt_timezone.utc)
+    half_life_seconds = POPULARITY_HALF_LIFE_DAYS * 86400
+    age = Func(
+        F('timestamp'), Value(epoch),
+        template="EXTRACT(EPOCH FROM (%(expressions)s))", arg_joiner=" - ", output_field=FloatField()
+    )
+    # Clamped, Postgres raises on underflow where Python returns 0
+    exponent = Greatest(age / half_life_seconds, Value(float(MIN_DECAY_EXPONENT)), output_field=FloatField())
+    weight = Func(Value(2.0), exponent, function='POWER', output_field=FloatField())
+
+    totals = (
+        ListingInteraction.objects
+        .values('listing_id', 'listing__city', 'listing__price')
+        .annotate(
+            score=(
+                Sum(weight, filter=Q(interaction_type='click'), default=0.0) * INTERACTION_WEIGHTS['click'] +
+                Sum(weight, filter=Q(interaction_type='favourite'), default=0.0) * INTERACTION_WEIGHTS['favourite']
+            ),
+            clicks=Count('id', filter=Q(interaction_type='click')),
+            favourites=Count('id', filter=Q(interaction_type='favourite')),
+        )
+    )
+    with transaction.atomic():
+        # Interactions recorded meanwhile wait, then add to the rebuilt scores from the new epoch
+        popularity_epoch(lock='update')
+        rows = [
+            ListingPopularity(
+                listing_id=total['listing_id'], city=normalize_city(total['listing__city']),
+                price_band=price_band(total['listing__price']), score=total['score'],
+                clicks=total['clicks'], favourites=total['favourites'], updated_at=timezone.now(),
+            )
+            for total in totals
+        ]
+        ListingPopularity.objects.exclude(listing_id__in=[row.listing_id for row in rows]).delete()
+        ListingPopularity.objects.bulk_create(
+            rows, batch_size=1000, update_conflicts=True, unique_fields=['listing'],
+            update_fields=['city', 'price_band', 'score', 'clicks', 'favourites', 'updated_at'],
+        )
+        PopularityEpoch.objects.update_or_create(pk=1, defaults={'epoch': epoch})
+    return len(rows)
+
+def popular_listings(user=None, limit=10):
+    """
+    Most popular listings, narrowed to the user's city and budget bands when they are known.
+    Falls back to newest listings when there is no interaction data at all (cold start).
+    """
+    popularity = ListingPopularity.objects.prefetch_related(prefetch_listings('listing')).order_by('-score')
+    if user is not None:
+        popularity = popularity.exclude(listing__favorited_by__user=user)
+
+    narrowed = popularity
+    if user is not None:
+        city = normalize_city(user.preferred_location or user.city)
+        if city:
+            narrowed = narrowed.filter(city=city)
+        if user.budget_min is not None or user.budget_max is not None:
+            narrowed = narrowed.filter(price_band__range=(
+                price_band(user.budget_min or 0),
+                price_band(user.budget_max) if user.budget_max is not None else 2 ** 31 - 1,
+            ))
+
+    listings = [entry.listing for entry in narrowed[:limit]]
+    if not listings and narrowed is not popularity:
+        listings = [entry.listing for entry in popularity[:limit]]
+    if not listings:
+        listings = list(listing_queryset().order_by('-created_at')[:limit])
+    return listings
@@ -0,0 +1,47 @@
+from django.db.models import IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Listing, ListingPicture, Conversation, ConversationReadState, Message
+
+# Querysets shared by every endpoint that serializes listings.
+# ListingSerializer / ListingBasicSerializer nest the owner (with its roommate_profile id) and all pictures,
+# loading them here keeps a page of listings at a fixed number of queries instead of 2 per listing.
+
+def listing_queryset(queryset=None):
+    """Listings with the owner joined and the pictures prefetched."""
+    if queryset is None:
+        queryset = Listing.objects.all()
+    return queryset.select_related('owner__roommate_profile').prefetch_related('pictures')
+
+def listing_card_queryset(queryset=None):
+    """Listings for ListingCardSerializer: no owner join, only the primary picture is prefetched."""
+    if queryset is None:
+        queryset = Listing.objects.all()
+    primary_pictures = ListingPicture.objects.filter(is_primary=True)
+    return queryset.prefetch_related(Prefetch('pictures', queryset=primary_pictures, to_attr='primary_pictures'))
+
+def prefetch_listings(lookup, queryset=None):
+    """Prefetch a relation to listings (e.g. 'favorite_listings') with everything the listing serializers read."""
+    return Prefetch(lookup, queryset=queryset if queryset is not None else listing_queryset())
+
+def inbox_queryset(user):
+    """
+    The user's conversations with everything ConversationSerializer reads, in a fixed number of queries:
+    unread counter as a subquery, then participants, listing pictures and the last message of every conversation,
+    each prefetched in one query.
+    """
+    unread = ConversationReadState.objects.filter(conversation=OuterRef('pk'), user=user).values('unread_count')
+    # DISTINCT ON (conversation_id): the newest message of each conversation in a single query
+    last_messages = (
+        Message.objects.select_related('sender__roommate_profile')
+        .order_by('conversation_id', '-timestamp', '-id').distinct('conversation_id')
+    )
+    return (
+        Conversation.objects.filter(participants=user)
+        .annotate(unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)))
+        .select_related('listing__owner__roommate_profile')
+        .prefetch_related(
+            'participants',
+            'listing__pictures',
+            Prefetch('messages', queryset=last_messages, to_attr='last_messages'),
+        )
+    )
@@ -0,0 +1,149 @@
+import json
+import queue
+import threading
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.renderers import BaseRenderer
+
+# Push channel for new messages: MessageStreamView holds a Server-Sent Events stream per browser tab,
+# new messages are published to every participant's open streams through a broker.
+#
+# The broker is pluggable (settings.REALTIME_BROKER). InProcessBroker fans out inside one server process,
+# which is enough for a single process and for tests. A multi-process deployment plugs in a broker with the
+# same subscribe / unsubscribe / publish interface backed by a shared pub/sub (e.g. Redis).
+#
+# A stream stays open for up to REALTIME_STREAM_MAX_SECONDS. Under an ASGI server that is a parked coroutine,
+# under WSGI it is a whole worker, so streams are refused there unless REALTIME_STREAM_WSGI is set (runserver).
+# EventSource cannot send an Authorization header: the browser first trades its JWT for a ticket, a signed
+# user id valid for REALTIME_TICKET_MAX_AGE seconds, and passes that in the URL, where it may end up in logs.
+
+TICKET_SALT = 'marketplace.realtime.stream'
+
+def streams_supported(request):
+    """Whether this server can hold event streams open (ASGI, or WSGI when explicitly allowed)."""
+    return isinstance(request, ASGIRequest) or settings.REALTIME_STREAM_WSGI
+
+def stream_ticket(user):
+    return signing.dumps(user.pk, salt=TICKET_SALT)
+
+def ticket_user_id(ticket):
+    """The user id a ticket was issued to, raising signing.BadSignature if it is forged or expired."""
+    return signing.loads(ticket, salt=TICKET_SALT, max_age=settings.REALTIME_TICKET_MAX_AGE)
+
+class Subscription:
+    """One open stream: a bounded queue of events for a user."""
+
+    def __init__(self, user_id, max_events):
+        self.user_id = user_id
+        self.events = queue.Queue(maxsize=max_events)
+
+    def put(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # A stalled client loses its oldest event rather than holding memory for ever
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                pass
+            self.events.put_nowait(event)
+
+    def get(self, timeout=None):
+        """The next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class InProcessBroker:
+    """Fans events out to the subscriptions open in this process."""
+
+    def __init__(self, max_events=100):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # user id -> set of Subscription
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.max_events)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def publish(self, user_ids, event):
+        with self._lock:
+            targets = [s for user_id in user_ids for s in self._subscriptions.get(user_id, ())]
+        for subscription in targets:
+            subscription.put(event)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.REALTIME_BROKER)()
+    return _broker
+
+def publish_message(message):
+    """Push a new message to its conversation's participants once the transaction commits."""
+    from .serializers import MessageSerializer
+
+    def publish():
+        user_ids = list(message.conversation.participants.values_list('id', flat=True))
+        get_broker().publish(user_ids, {
+            'type': 'message',
+            'conversation': message.conversation_id,
+            'message': MessageSerializer(message).data,
+        })
+
+    transaction.on_commit(publish)
+
+def encode_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+def event_stream(subscription):
+    """Server-Sent Events for a subscription, with keepalive comments. Ends after REALTIME_STREAM_MAX_SECONDS."""
+    deadline = time.monotonic() + settings.REALTIME_STREAM_MAX_SECONDS
+    try:
+        # The browser reconnects on its own once the stream ends
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            event = subscription.get(timeout=settings.REALTIME_KEEPALIVE_SECONDS)
+            yield encode_event(event) if event else ": keepalive\n\n"
+    finally:
+        get_broker().unsubscribe(subscription)
+
+async def async_event_stream(subscription):
+    """event_stream() for ASGI servers, waiting on the queue in a worker thread instead of blocking the loop."""
+    deadline = time.monotonic() + settings.REALTIME_STREAM_MAX_SECONDS
+    wait = sync_to_async(subscription.get, thread_sensitive=False)
+    try:
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            event = await wait(timeout=settings.REALTIME_KEEPALIVE_SECONDS)
+            yield encode_event(event) if event else ": keepalive\n\n"
+    finally:
+        get_broker().unsubscribe(subscription)
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF negotiate `Accept: text/event-stream`. Only error responses go through it, as JSON."""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode() if data is not None else b''
@@ -0,0 +1,165 @@
+import os
+import shutil
+import threading
+import time
+import joblib
+import numpy as np
+from django.conf import settings
+
+class ModelRegistry:
+    """
+    Process-wide cache for a pickled artifact (the recommender model, the similarity index).
+
+    The model is unpickled once and kept in memory. The file's mtime is re-checked at most
+    every `check_interval` seconds, a newer file is loaded on the side and then swapped in,
+    so requests never wait on (or see) a half loaded model.
+    """
+
+    def __init__(self, path, check_interval=5):
+        self.path = str(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._model = None
+        self._version = None  # mtime_ns of the file the cached model was loaded from
+        self._last_check = 0.0
+
+    @property
+    def version(self):
+        return self._version
+
+    def _current_file_version(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def get(self):
+        """Return the current model, or None if no model has been trained yet."""
+        now = time.monotonic()
+        if self._model is not None and now - self._last_check < self.check_interval:
+            return self._model
+
+        with self._lock:
+            # Another thread may have refreshed the model while we waited on the lock
+            if self._model is not None and now - self._last_check < self.check_interval:
+                return self._model
+
+            file_version = self._current_file_version()
+            self._last_check = now
+            if file_version is None:
+                self._model, self._version = None, None
+            elif file_version != self._version:
+                model = joblib.load(self.path)
+                self._model, self._version = model, file_version
+            return self._model
+
+    def artifact_path(self, name):
+        """Path of a versioned artifact, stored next to the live model file."""
+        return os.path.join(os.path.dirname(self.path), name)
+
+    def load_artifact(self, name):
+        return joblib.load(self.artifact_path(name))
+
+    def delete_artifact(self, name):
+        try:
+            os.remove(self.artifact_path(name))
+        except FileNotFoundError:
+            pass
+
+    def _write_atomic(self, path, write):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def save(self, model, artifact_name=None):
+        """
+        Persist a model atomically (temp file + rename) and make it the live model.
+        With artifact_name, the model is also kept as a versioned artifact next to the live file.
+        """
+        if artifact_name:
+            artifact = self.artifact_path(artifact_name)
+            self._write_atomic(artifact, lambda tmp_path: joblib.dump(model, tmp_path))
+            self._write_atomic(self.path, lambda tmp_path: shutil.copyfile(artifact, tmp_path))
+        else:
+            self._write_atomic(self.path, lambda tmp_path: joblib.dump(model, tmp_path))
+
+        with self._lock:
+            self._model, self._version = model, self._current_file_version()
+            self._last_check = time.monotonic()
+
+recommender_registry = ModelRegistry(settings.RECOMMENDER_MODEL_PATH)
+
+DEFAULT_BUDGET_MAX = 1_000_000  # Used when a user has no budget_max set
+
+def top_n_indices(scores, n):
+    """Indices of the n highest scores, best first. Ties go to the earlier indices."""
+    n = min(n, len(scores))
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    # argpartition picks arbitrarily among scores tied with the n-th best, take those in index order instead
+    threshold = np.partition(scores, len(scores) - n)[len(scores) - n]
+    above = np.flatnonzero(scores > threshold)
+    top = np.concatenate([above, np.flatnonzero(scores == threshold)[:n - len(above)]])
+    return top[np.argsort(-scores[top], kind='stable')]
+
+PREDICT_MAX_ROWS = 250_000  # (user, listing) rows per predict() call, bounds memory whatever the batch size
+
+def rank_listings_for_users(model, user_ids, user_matrix, favourites, listing_ids, listing_matrix, n,
+                            max_rows=PREDICT_MAX_ROWS):
+    """
+    Score every in-budget, non favourited listing for a batch of users, in predict() calls of at most
+    `max_rows` rows. Only the running top n of each user is kept between calls.
+
+    `favourites` maps user id -> set of favourited listing ids. Returns a dict of
+    user id -> [(listing_id, score), ...] holding the top n listings, best first.
+    """
+    prices = listing_matrix[:, 0]
+    user_width = user_matrix.shape[1]
+    features = np.empty(
+        (min(max_rows, len(user_ids) * len(listing_ids)), user_width + listing_matrix.shape[1]),
+        np.result_type(user_matrix, listing_matrix),
+    )
+    # user id -> (listing indices, scores) of its best listings so far, best first
+    best = {int(user_id): (np.zeros(0, dtype=np.int64), np.zeros(0)) for user_id in user_ids}
+    pieces, rows = [], 0  # (user id, listing indices) whose rows are filled in `features`
+
+    def score_pieces():
+        scores = model.predict(features[:rows])
+        offset = 0
+        for user_id, piece in pieces:
+            piece_scores = scores[offset:offset + len(piece)]
+            offset += len(piece)
+            # Earlier candidates stay first, so ties keep the listing order as with a single predict() call
+            kept_indices, kept_scores = best[user_id]
+            indices = np.concatenate([kept_indices, piece])
+            user_scores = np.concatenate([kept_scores, piece_scores])
+            top = top_n_indices(user_scores, n)
+            best[user_id] = (indices[top], user_scores[top])
+
+    for user_id, user_row in zip(user_ids, user_matrix):
+        # Same budget rules as the live scoring in ListingRecommendationList
+        budget_min = user_row[2]
+        budget_max = user_row[3] or DEFAULT_BUDGET_MAX
+        mask = (prices >= budget_min) & (prices <= budget_max)
+        user_favourites = favourites.get(int(user_id))
+        if user_favourites:
+            mask &= ~np.isin(listing_ids, list(user_favourites))
+
+        indices = np.flatnonzero(mask)
+        for start in range(0, len(indices), max_rows):
+            piece = indices[start:start + max_rows]
+            if rows + len(piece) > max_rows:
+                score_pieces()
+                pieces, rows = [], 0
+            features[rows:rows + len(piece), :user_width] = user_row
+            features[rows:rows + len(piece), user_width:] = listing_matrix[piece]
+            pieces.append((int(user_id), piece))
+            rows += len(piece)
+    if pieces:
+        score_pieces()
+
+    return {
+        user_id: [(int(listing_ids[i]), float(score)) for i, score in zip(indices, scores)]
+        for user_id, (indices, scores) in best.items()
+    }
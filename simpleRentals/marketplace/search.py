@@ -0,0 +1,120 @@
+import operator
+import re
+from functools import reduce
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Func, TextField
+from django.db.models.functions import Cast
+from .models import LISTING_SEARCH_CONFIG, Listing, ListingSearchTerm
+
+# Listing text search, served by GIN indexes on Listing:
+#   search_vector  full-text document (address, city and postal code weighted above the description)
+#   search_text    lowercased "street city postal code", trigram indexed for substring matches (?location=)
+#
+# Typos are handled on the query side: words no listing contains are corrected against ListingSearchTerm,
+# the vocabulary of every listing's words, so a search is always one ranked full-text index lookup.
+# Fuzzy matching the listings themselves would score every listing sharing a few trigrams with the query.
+
+def normalize_search_text(value):
+    return " ".join((value or "").split()).lower()
+
+def filter_location(queryset, location):
+    """Listings whose address, city or postal code contains `location`, a LIKE '%term%' on the trigram index."""
+    return queryset.filter(search_text__contains=normalize_search_text(location))
+
+def search_listings(queryset, terms):
+    """
+    Listings matching `terms` (web search syntax) in their address, city, postal code or description,
+    annotated with a relevance `rank`. Words no listing contains are first corrected to the closest known word.
+    """
+    query = correct_spelling(terms) or SearchQuery(terms, config=LISTING_SEARCH_CONFIG, search_type='websearch')
+    # ts_rank is float4, read back as a rounded string: the ?q= cursor needs the exact float8 value
+    return queryset.filter(search_vector=query).annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+
+# websearch syntax: "quoted phrases", -negated words or phrases, `or` between alternatives, bare words ANDed
+SEARCH_TOKEN_RE = re.compile(r'-?"[^"]*"?|\S+')
+
+def _quote_lexeme(lexeme):
+    return "'" + lexeme.replace("\\", "\\\\").replace("'", "''") + "'"
+
+def _word_lexemes(words):
+    """{word: [lexemes]} for the search words, as the listings' documents store them."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT t.word, unnest(tsvector_to_array(to_tsvector(%s::regconfig, t.word))) "
+            "FROM unnest(%s::text[]) AS t(word)",
+            [LISTING_SEARCH_CONFIG, words],
+        )
+        lexemes = {word: [] for word in words}
+        for word, lexeme in cursor.fetchall():
+            lexemes[word].append(lexeme)
+    return lexemes
+
+def correct_spelling(terms):
+    """
+    The web search query `terms` with every word no listing contains replaced by the most similar known one,
+    keeping its phrases, negations and `or`s. None when all words are known, or when one of them resembles
+    no known word.
+    """
+    tokens = SEARCH_TOKEN_RE.findall(terms)
+    words = list({
+        token.lstrip('-') for token in tokens
+        if token.lower() != 'or' and not token.lstrip('-').startswith('"')
+    })
+    word_lexemes = _word_lexemes(words)
+    lexemes = {lexeme for found in word_lexemes.values() for lexeme in found}
+    known = set(ListingSearchTerm.objects.filter(word__in=lexemes).values_list('word', flat=True))
+    if known.issuperset(lexemes):
+        return None
+
+    corrections = {}
+    for lexeme in lexemes - known:
+        corrections[lexeme] = (
+            ListingSearchTerm.objects.filter(word__trigram_similar=lexeme)
+            .annotate(similarity=TrigramSimilarity('word', lexeme))
+            .order_by('-similarity', 'word').values_list('word', flat=True).first()
+        )
+        if corrections[lexeme] is None:
+            return None
+
+    # Rebuilt with the websearch_to_tsquery grammar: words ANDed, `or` between runs of them
+    alternatives = [[]]
+    for token in tokens:
+        if token.lower() == 'or':
+            alternatives.append([])
+            continue
+        negated = token.startswith('-')
+        text = token.lstrip('-')
+        if text.startswith('"'):
+            query = SearchQuery(text.strip('"'), config=LISTING_SEARCH_CONFIG, search_type='phrase')
+        elif word_lexemes[text]:
+            # Already stemmed, the 'simple' configuration keeps the words as they are
+            corrected = [corrections.get(lexeme, lexeme) for lexeme in word_lexemes[text]]
+            query = SearchQuery(" & ".join(map(_quote_lexeme, corrected)), config='simple', search_type='raw')
+        else:
+            continue  # Stop words and punctuation
+        alternatives[-1].append(~query if negated else query)
+
+    alternatives = [reduce(operator.and_, queries) for queries in alternatives if queries]
+    return reduce(operator.or_, alternatives) if alternatives else None
+
+def record_search_terms(listing):
+    """Add a saved listing's words to the spelling vocabulary."""
+    lexemes = Func(F('search_vector'), function='tsvector_to_array', output_field=ArrayField(TextField()))
+    words = (
+        Listing.objects.filter(pk=listing.pk)
+        .annotate(word=Func(lexemes, function='unnest', output_field=TextField()))
+        .values_list('word', flat=True)
+    )
+    ListingSearchTerm.objects.bulk_create([ListingSearchTerm(word=word) for word in words], ignore_conflicts=True)
+
+def rebuild_search_terms():
+    """Rebuild the spelling vocabulary from every listing, dropping words of deleted listings. Returns the word count."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {ListingSearchTerm._meta.db_table}")
+        cursor.execute(
+            f"INSERT INTO {ListingSearchTerm._meta.db_table} (word) "
+            f"SELECT word FROM ts_stat('SELECT search_vector FROM {Listing._meta.db_table}')"
+        )
+        return cursor.rowcount
@@ -3,6 +3,10 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from .models import MarketplaceUser, Listing, ListingPicture, Group, Review, Favorites, Conversation, Message, RoommateUser, GroupInvitation, ListingInteraction
 from .utils import send_verification_email
+from .geo import encode_geohash
+from .popularity import sync_listing
+from .pagination import MessageHistoryPagination
+from .unread import read_cursors
 import os
 
 # Utility functions for image validation and saving
@@ -271,19 +275,41 @@ class ListingPictureSerializer(serializers.ModelSerializer):
             'image': {'required': True},
         }
 
-class ListingSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Lets list endpoints return a subset of fields (?fields=id,price,city).
+    The requested names come from the serializer context, so nested listing serializers are trimmed too.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if not requested:
+            return fields
+
+        unknown = sorted(set(requested) - set(fields))
+        if unknown:
+            raise ValidationError({"fields": f"Unknown field(s): {', '.join(unknown)}."})
+        return {name: field for name, field in fields.items() if name in requested}
+
+class ListingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)  # Include owner details
     pictures = ListingPictureSerializer(many=True)  # Include pictures
     property_type =  serializers.CharField(source='get_property_type_display')
     payment_type = serializers.CharField(source='get_payment_type_display')
     laundry_type = serializers.CharField(source='get_laundry_type_display')
     verification_status =  serializers.CharField(source='get_verification_status_display')
+    distance_km = serializers.SerializerMethodField()  # Only set on radius searches
 
     class Meta:
         model = Listing
-        fields = '__all__'
+        exclude = ['search_vector', 'search_text']
 
-class ListingBasicSerializer(serializers.ModelSerializer):
+    def get_distance_km(self, obj):
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 2) if distance is not None else None
+
+class ListingBasicSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     pictures = ListingPictureSerializer(many=True)
     owner = UserSerializer(read_only=True)
     property_type = serializers.CharField(source='get_property_type_display')
@@ -302,6 +328,41 @@ class ListingBasicSerializer(serializers.ModelSerializer):
             return ListingPictureSerializer(primary).data
         return None
 
+class ListingCardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Compact listing for search result cards: no owner profile and only the primary picture."""
+    property_type = serializers.CharField(source='get_property_type_display')
+    primary_picture = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()  # Only set on radius searches
+
+    class Meta:
+        model = Listing
+        fields = [
+            'id', 'owner', 'price', 'property_type', 'bedrooms', 'bathrooms', 'sqft_area',
+            'street_address', 'city', 'postal_code', 'latitude', 'longitude', 'move_in_date',
+            'primary_picture', 'distance_km'
+        ]
+
+    def get_primary_picture(self, obj):
+        # listing_card_queryset() prefetches only the primary picture
+        pictures = getattr(obj, 'primary_pictures', None)
+        if pictures is None:
+            pictures = [picture for picture in obj.pictures.all() if picture.is_primary]
+        if pictures:
+            return ListingPictureSerializer(pictures[0], context=self.context).data
+        return None
+
+    def get_distance_km(self, obj):
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 2) if distance is not None else None
+
+class ListingClusterSerializer(serializers.Serializer):
+    cell = serializers.CharField()
+    latitude = serializers.FloatField()  # Centroid of the listings in the cell
+    longitude = serializers.FloatField()
+    count = serializers.IntegerField()
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+
 class ListingPostingSerializer(serializers.ModelSerializer):
     price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
     bedrooms = serializers.IntegerField(min_value=0)
@@ -337,6 +398,7 @@ class ListingPostingSerializer(serializers.ModelSerializer):
         # Remove pictures from validated_data
         pictures_data = validated_data.pop('pictures', [])
         validated_data['created_at'] = now()
+        validated_data['geohash'] = encode_geohash(validated_data.get('latitude'), validated_data.get('longitude'))
         listing = Listing.objects.create(**validated_data)
 
         # Save images using your existing logic
@@ -361,7 +423,9 @@ class ListingPostingSerializer(serializers.ModelSerializer):
         # Update other listing fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+        instance.geohash = encode_geohash(instance.latitude, instance.longitude)
         instance.save()
+        sync_listing(instance)
 
         images = self.context['request'].FILES.getlist('pictures')
         front_image = self.context['request'].FILES.get('front_image')
@@ -475,40 +539,71 @@ class FavoritesSerializer(serializers.ModelSerializer):
             'user': {'read_only': True},
         }
 
+class FavoritesCardSerializer(FavoritesSerializer):
+    favorite_listings = ListingCardSerializer(many=True, read_only=True)
+
 class ConversationSerializer(serializers.ModelSerializer):
+    """Conversation metadata and its last message, message history is paged by ConversationMessagesView."""
     listing = ListingBasicSerializer(read_only=True)  # Include listing details
     last_message = serializers.SerializerMethodField()  # Add the last message in the conversation
-    messages = serializers.SerializerMethodField()  # Add all messages in the conversation
+    unread_count = serializers.SerializerMethodField()
     isGroup = serializers.SerializerMethodField() 
     participants = UserBasicSerializer(many=True, read_only=True)
 
     class Meta:
         model = Conversation
-        fields = ['id', 'participants', 'listing', 'last_updated', 'last_message', 'messages', 'isGroup']
+        fields = ['id', 'participants', 'listing', 'last_updated', 'last_message', 'unread_count', 'isGroup']
 
     def get_last_message(self, obj):
-        last_message = obj.get_last_message()
+        # Prefetched by inbox_queryset()
+        last_messages = getattr(obj, 'last_messages', None)
+        last_message = last_messages[0] if last_messages else None
+        if last_messages is None:
+            last_message = obj.get_last_message()
         if last_message:
             return MessageSerializer(last_message, context=self.context).data
         return None
 
-    def get_messages(self, obj):
-        messages = obj.messages.order_by('timestamp')  # Order by timestamp ascending
-        return MessageSerializer(messages, many=True, context=self.context).data
+    def get_unread_count(self, obj):
+        # Annotated by ConversationListView, counted here for single conversations
+        unread_count = getattr(obj, 'unread_count', None)
+        if unread_count is not None:
+            return unread_count
+        request = self.context.get('request')
+        if not request:
+            return 0
+        read_state = obj.read_states.filter(user=request.user).first()
+        return read_state.unread_count if read_state else 0
     
     def get_isGroup(self, obj):
-        # A conversation is a group if its participants match any group's members for the same listing
-        from .models import Group, RoommateUser
-        participant_ids = set(obj.participants.values_list("id", flat=True))
-        groups = Group.objects.filter(listing=obj.listing)
-        for group in groups:
-            group_member_user_ids = set(group.members.values_list("user__id", flat=True))
-            if participant_ids == group_member_user_ids and len(participant_ids) > 1:
-                return True
-        return False
+        # Group chats are linked to their group when they are started
+        return obj.group_id is not None
+
+class ConversationDetailSerializer(ConversationSerializer):
+    """A conversation with its most recent page of messages, older ones are fetched with ?before=<message id>."""
+    messages = serializers.SerializerMethodField()
+
+    class Meta(ConversationSerializer.Meta):
+        fields = ConversationSerializer.Meta.fields + ['messages']
+
+    def get_messages(self, obj):
+        latest = obj.messages.select_related('sender__roommate_profile').order_by('-timestamp', '-id')
+        messages = list(latest[:MessageHistoryPagination.page_size])[::-1]  # Oldest first
+        return MessageSerializer(messages, many=True, context=self.context).data
+
+class MessageSearchResultSerializer(serializers.ModelSerializer):
+    """A search hit: the message's conversation and a snippet of its content, matches wrapped in <mark></mark>."""
+    sender = UserBasicSerializer(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ['id', 'conversation', 'sender', 'timestamp', 'snippet', 'rank']
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)  # Include sender details
+    read = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
@@ -518,9 +613,20 @@ class MessageSerializer(serializers.ModelSerializer):
             'content': {'required': True},
             'sender': {'read_only': True},
             'timestamp': {'read_only': True},
-            'read': {'read_only': True},
         }
 
+    def get_read(self, obj):
+        # Read by the requesting user: sent by them or at/before their read cursor
+        request = self.context.get('request')
+        if not request or not request.user.is_authenticated:
+            return False
+        if obj.sender_id == request.user.id:
+            return True
+        if 'read_cursors' not in self.context:
+            # Loaded once and shared by every message serialized in this response
+            self.context['read_cursors'] = read_cursors(request.user)
+        return obj.id <= self.context['read_cursors'].get(obj.conversation_id, 0)
+
     def create(self, validated_data):
         validated_data['sender'] = self.context['request'].user
         return super().create(validated_data)
\ No newline at end of file
@@ -0,0 +1,95 @@
+from django.db import IntegrityError, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .autocomplete import location_autocomplete
+from .models import Conversation, Listing, Message, messages_bulk_created
+from .realtime import publish_message
+from .search import record_search_terms
+from .unread import add_readers, count_new_messages, remove_readers
+
+def refresh_participant_key(conversation_ids):
+    """Recompute Conversation.participant_key after participants were added or removed."""
+    participants = {}
+    for conversation_id, user_id in (Conversation.participants.through.objects
+                                     .filter(conversation_id__in=conversation_ids)
+                                     .values_list('conversation_id', 'marketplaceuser_id')):
+        participants.setdefault(conversation_id, []).append(user_id)
+
+    for conversation_id in conversation_ids:
+        key = Conversation.participant_key_for(participants.get(conversation_id, []))
+        try:
+            with transaction.atomic():
+                Conversation.objects.filter(id=conversation_id).update(participant_key=key)
+        except IntegrityError:
+            # Another conversation on the listing already has exactly these participants (e.g. after
+            # someone left a group chat), keep this one but without a key so it is not matched
+            Conversation.objects.filter(id=conversation_id).update(participant_key=None)
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        refresh_participant_key([instance.pk])
+    elif pk_set:
+        # user.conversations.add(...) / remove(...): pk_set holds the conversation ids
+        refresh_participant_key(sorted(pk_set))
+
+    # Every participant has a read cursor (ConversationReadState)
+    if action == 'post_add':
+        if not reverse:
+            add_readers(instance.pk, pk_set)
+        else:
+            for conversation_id in pk_set:
+                add_readers(conversation_id, [instance.pk])
+    elif action == 'post_remove':
+        if not reverse:
+            remove_readers([instance.pk], pk_set)
+        else:
+            remove_readers(pk_set, [instance.pk])
+    elif not reverse:
+        remove_readers(conversation_ids=[instance.pk])
+    else:
+        remove_readers(user_ids=[instance.pk])
+
+@receiver(post_save, sender=Message)
+def message_created(sender, instance, created, **kwargs):
+    if created:
+        count_new_messages([instance])
+        # Push new messages to the participants' open streams (MessageStreamView)
+        publish_message(instance)
+
+@receiver(messages_bulk_created, sender=Message)
+def messages_created(sender, messages, **kwargs):
+    # Message.objects.bulk_create() skips post_save
+    count_new_messages(messages)
+    for message in messages:
+        publish_message(message)
+
+@receiver(pre_save, sender=Listing)
+def listing_saving(sender, instance, **kwargs):
+    # Remember where an edited listing was, to move it in the autocomplete index if its city or postal code changed
+    instance._previous_location = None
+    if not instance._state.adding and instance.pk:
+        instance._previous_location = (
+            Listing.objects.filter(pk=instance.pk).values_list('city', 'postal_code').first()
+        )
+
+@receiver(post_save, sender=Listing)
+def listing_saved(sender, instance, created, **kwargs):
+    # Keep the vocabulary that misspelled search words are corrected against (ListingSearchTerm)
+    record_search_terms(instance)
+
+    location = (instance.city, instance.postal_code)
+    previous = None if created else getattr(instance, '_previous_location', None)
+    if created or (previous and previous != location):
+        def update_autocomplete():
+            if previous:
+                location_autocomplete.update(*previous, delta=-1)
+            location_autocomplete.update(*location)
+        transaction.on_commit(update_autocomplete)
+
+@receiver(post_delete, sender=Listing)
+def listing_deleted(sender, instance, **kwargs):
+    location = (instance.city, instance.postal_code)
+    transaction.on_commit(lambda: location_autocomplete.update(*location, delta=-1))
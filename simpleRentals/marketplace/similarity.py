@@ -0,0 +1,83 @@
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, FloatField, Sum, Value, When
+from .features import SIMILARITY_FIELDS, listing_content_matrix
+from .recommender import ModelRegistry, top_n_indices
+
+# Relative weight of each attribute once standardized, location and price matter most for "similar"
+FIELD_WEIGHTS = {'price': 2.0, 'latitude': 2.0, 'longitude': 2.0, 'bedrooms': 1.5}
+CO_INTERACTION_WEIGHT = 0.5  # Weight of the "users who interacted with this also interacted with" part
+CO_INTERACTION_COMPONENTS = 16
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+class SimilarityIndex:
+    """Array-backed item vectors (unit length), queried with brute-force cosine similarity."""
+
+    def __init__(self, listing_ids, vectors):
+        order = np.argsort(listing_ids)
+        self.listing_ids = np.asarray(listing_ids, dtype=np.int64)[order]
+        self.vectors = np.ascontiguousarray(vectors[order], dtype=np.float32)
+
+    def __len__(self):
+        return len(self.listing_ids)
+
+    def similar(self, listing_id, limit=10):
+        """Return [(listing_id, similarity), ...] for the listings closest to listing_id, best first."""
+        position = np.searchsorted(self.listing_ids, listing_id)
+        if position >= len(self.listing_ids) or self.listing_ids[position] != listing_id:
+            return []
+
+        scores = self.vectors @ self.vectors[position]
+        top = [i for i in top_n_indices(scores, limit + 1) if i != position][:limit]
+        return [(int(self.listing_ids[i]), float(scores[i])) for i in top]
+
+def _content_vectors(listings):
+    listing_ids, matrix = listing_content_matrix(listings)
+    std = matrix.std(axis=0)
+    standardized = (matrix - matrix.mean(axis=0)) / np.where(std > 0, std, 1)
+    weights = np.array([FIELD_WEIGHTS.get(field, 1.0) for field in SIMILARITY_FIELDS])
+    return listing_ids, _normalize_rows(standardized * weights)
+
+def _co_interaction_vectors(listing_ids, interactions):
+    """Low rank listing embeddings from the listing x user interaction matrix (truncated SVD)."""
+    from scipy.sparse import csr_matrix
+    from sklearn.decomposition import TruncatedSVD
+
+    pairs = list(
+        interactions.values('listing_id', 'user_id').annotate(weight=Sum(Case(
+            When(interaction_type='favourite', then=Value(1.0)), default=Value(0.5), output_field=FloatField()
+        ))).values_list('listing_id', 'user_id', 'weight')
+    )
+    vectors = np.zeros((len(listing_ids), 0))
+    if not pairs:
+        return vectors
+
+    pair_listings, pair_users, weights = (np.array(column) for column in zip(*pairs))
+    user_ids, user_columns = np.unique(pair_users, return_inverse=True)
+    rows = np.searchsorted(listing_ids, pair_listings)
+    known = (rows < len(listing_ids)) & (listing_ids[np.minimum(rows, len(listing_ids) - 1)] == pair_listings)
+
+    components = min(CO_INTERACTION_COMPONENTS, len(user_ids) - 1, len(listing_ids) - 1)
+    if components < 1:
+        return vectors
+
+    matrix = csr_matrix(
+        (weights[known].astype(np.float64), (rows[known], user_columns[known])),
+        shape=(len(listing_ids), len(user_ids)),
+    )
+    return _normalize_rows(TruncatedSVD(n_components=components).fit_transform(matrix))
+
+def build_similarity_index(listings, interactions):
+    """Build a SimilarityIndex from listing attributes and co-interaction data."""
+    listing_ids, content = _content_vectors(listings.order_by('id'))
+    if not len(listing_ids):
+        return SimilarityIndex(listing_ids, content)
+
+    co_interaction = _co_interaction_vectors(listing_ids, interactions)
+    vectors = np.hstack([content, CO_INTERACTION_WEIGHT * co_interaction])
+    return SimilarityIndex(listing_ids, _normalize_rows(vectors))
+
+similarity_registry = ModelRegistry(settings.SIMILARITY_INDEX_PATH)
@@ -2,9 +2,10 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
-from marketplace.models import MarketplaceUser, Listing, Conversation, Message
+from marketplace.models import MarketplaceUser, Listing, Conversation, Message, RoommateUser, Group
+from marketplace.tests.query_counts import QueryCountMixin
 
-class TestConversationListView(APITestCase):
+class TestConversationListView(QueryCountMixin, APITestCase):
     def setUp(self):
         self.user = MarketplaceUser.objects.create_user(
             username="alice", email="alice@example.com", password="pass1234"
@@ -30,6 +31,7 @@ class TestConversationListView(APITestCase):
             city="Testville",
             postal_code="12345"
         )
+        self.listing = listing
         self.conversation = Conversation.objects.create(listing=listing)
         self.conversation.participants.add(self.user, self.other_user)
         self.url = reverse('conversation_list')
@@ -43,4 +45,57 @@ class TestConversationListView(APITestCase):
     def test_list_conversations_unauthenticated(self):
         self.client.logout()
         response = self.client.get(self.url)
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    def add_group_conversation(self, index):
+        """A group of self.user and a new roommate, its conversation and a couple of messages."""
+        roommates = [
+            RoommateUser.objects.get_or_create(user=user, defaults={
+                'description': "Looking", 'move_in_date': "2025-08-01", 'occupation': 'S', 'gender_preference': 'O'
+            })[0]
+            for user in (self.user, MarketplaceUser.objects.create_user(
+                username=f"member{index}", email=f"member{index}@example.com", password="pass1234"
+            ))
+        ]
+        group = Group.objects.create(name=f"Group {index}", listing=self.listing, owner=roommates[0], move_in_date="2025-09-01")
+        group.members.add(*roommates)
+
+        conversation = Conversation.objects.create(listing=self.listing, group=group)
+        conversation.participants.add(*(roommate.user for roommate in roommates))
+        for content in ("Hi", "Hello"):
+            Message.objects.create(conversation=conversation, sender=roommates[1].user, content=content)
+        return conversation
+
+    def test_inbox_fields(self):
+        group_conversation = self.add_group_conversation(0)
+        Message.objects.create(conversation=self.conversation, sender=self.user, content="Mine")
+
+        response = self.client.get(self.url)
+
+        conversations = {c['id']: c for c in response.data}
+        self.assertTrue(conversations[group_conversation.id]['isGroup'])
+        self.assertEqual(conversations[group_conversation.id]['unread_count'], 2)
+        self.assertEqual(conversations[group_conversation.id]['last_message']['content'], "Hello")
+        self.assertFalse(conversations[self.conversation.id]['isGroup'])
+        self.assertEqual(conversations[self.conversation.id]['unread_count'], 0)
+
+    def test_inbox_query_count_is_constant(self):
+        Message.objects.create(conversation=self.conversation, sender=self.other_user, content="Hi")
+        self.add_group_conversation(0)
+
+        # Conversations (+ unread counter subquery, listing and owner joined), participants, listing pictures,
+        # last messages and the user's read cursors
+        self.assertConstantQueries(
+            lambda: self.client.get(self.url),
+            lambda: [self.add_group_conversation(i) for i in range(1, 4)],
+            expected=5,
+        )
+
+    def test_inbox_is_not_paged(self):
+        conversations = [self.add_group_conversation(i) for i in range(25)]
+        Message.objects.create(conversation=conversations[0], sender=self.other_user, content="Latest")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data), 26)
+        self.assertNotIn('Link', response.headers)
+        self.assertEqual(response.data[0]['id'], conversations[0].id)
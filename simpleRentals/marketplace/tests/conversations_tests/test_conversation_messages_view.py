@@ -0,0 +1,93 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from marketplace.models import MarketplaceUser, Listing, Conversation, Message
+
+class TestConversationMessagesView(APITestCase):
+    def setUp(self):
+        self.user = MarketplaceUser.objects.create_user(
+            username="alice", email="alice@example.com", password="pass1234"
+        )
+        self.other_user = MarketplaceUser.objects.create_user(
+            username="bob", email="bob@example.com", password="pass1234"
+        )
+        listing = Listing.objects.create(
+            owner=self.other_user,
+            price=1200.00,
+            property_type="A",
+            payment_type="C",
+            bedrooms=2,
+            bathrooms=1,
+            sqft_area=800,
+            laundry_type="I",
+            parking_spaces=1,
+            heating=True,
+            ac=True,
+            move_in_date="2025-08-01",
+            description="Sample listing",
+            street_address="123 Main St",
+            city="Testville",
+            postal_code="12345"
+        )
+        self.conversation = Conversation.objects.create(listing=listing)
+        self.conversation.participants.add(self.user, self.other_user)
+        self.messages = [
+            Message.objects.create(conversation=self.conversation, sender=self.other_user, content=f"Message {i}")
+            for i in range(5)
+        ]
+        self.url = reverse('conversation_messages', args=[self.conversation.id])
+        self.client.force_authenticate(user=self.user)
+
+    def ids(self, response):
+        return [m['id'] for m in response.data]
+
+    def test_latest_page(self):
+        response = self.client.get(self.url, {'limit': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Latest messages, oldest first, with a link to the older ones
+        self.assertEqual(self.ids(response), [self.messages[3].id, self.messages[4].id])
+        self.assertIn(f'before={self.messages[3].id}', response.headers['Link'])
+        self.assertNotIn('rel="next"', response.headers['Link'])
+
+    def test_messages_before(self):
+        response = self.client.get(self.url, {'before': self.messages[3].id, 'limit': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ids(response), [self.messages[1].id, self.messages[2].id])
+        self.assertIn(f'after={self.messages[2].id}', response.headers['Link'])
+
+        response = self.client.get(self.url, {'before': self.messages[1].id, 'limit': 2})
+        self.assertEqual(self.ids(response), [self.messages[0].id])
+        self.assertNotIn('rel="prev"', response.headers['Link'])
+
+    def test_messages_after(self):
+        response = self.client.get(self.url, {'after': self.messages[1].id, 'limit': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ids(response), [self.messages[2].id, self.messages[3].id])
+        self.assertIn(f'after={self.messages[3].id}', response.headers['Link'])
+
+    def test_unknown_anchor(self):
+        other = Conversation.objects.create(listing=self.conversation.listing)
+        foreign = Message.objects.create(conversation=other, sender=self.user, content="Elsewhere")
+
+        response = self.client.get(self.url, {'before': foreign.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_messages_not_a_participant(self):
+        user3 = MarketplaceUser.objects.create_user(
+            username="charlie", email="charlie@example.com", password="pass1234"
+        )
+        self.client.force_authenticate(user=user3)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_conversation_list_has_no_history(self):
+        response = self.client.get(reverse('conversation_list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        conversation = response.data[0]
+        self.assertNotIn('messages', conversation)
+        self.assertEqual(conversation['last_message']['id'], self.messages[4].id)
+        self.assertEqual(conversation['unread_count'], 5)
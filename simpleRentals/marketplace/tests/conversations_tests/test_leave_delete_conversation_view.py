@@ -41,6 +41,13 @@ class TestLeaveAndDeleteConversationViews(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertNotIn(self.user, self.conversation.participants.all())
 
+    def test_restart_conversation_after_leaving(self):
+        self.client.post(self.leave_url)
+
+        response = self.client.post(reverse('start_conversation', args=[self.conversation.listing_id]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(response.data['id'], self.conversation.id)
+
     def test_delete_conversation_as_only_participant(self):
         self.conversation.participants.remove(self.other_user)
         response = self.client.delete(self.delete_url)
@@ -2,7 +2,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
-from marketplace.models import MarketplaceUser, Listing, Conversation, Message
+from marketplace.models import MarketplaceUser, Listing, Conversation, Message, RoommateUser, Group
 
 class TestStartConversationView(APITestCase):
     def setUp(self):
@@ -50,4 +50,89 @@ class TestStartConversationView(APITestCase):
         conversation.participants.set([self.tenant, self.landlord])
 
         response = self.client.post(self.url)
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def create_group(self, *names):
+        roommates = [
+            RoommateUser.objects.create(
+                user=MarketplaceUser.objects.create_user(username=name, email=f"{name}@example.com", password="pass1234"),
+                description="Looking", move_in_date="2025-08-01", occupation='S', gender_preference='O'
+            )
+            for name in names
+        ]
+        group = Group.objects.create(name="Group", listing=self.listing, owner=roommates[0], move_in_date="2025-09-01")
+        group.members.add(*roommates)
+        return group, roommates
+
+    def test_start_group_conversation_links_group(self):
+        group, roommates = self.create_group("carol", "dave")
+        self.client.force_authenticate(user=roommates[0].user)
+
+        # Matched on the participants when the group is not given
+        response = self.client.post(self.url, {'participants': [r.user.id for r in roommates]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['isGroup'])
+        self.assertEqual(Conversation.objects.get(id=response.data['id']).group, group)
+
+    def test_start_conversation_for_given_group(self):
+        group, roommates = self.create_group("carol", "dave")
+        self.client.force_authenticate(user=roommates[1].user)
+
+        payload = {'participants': [r.user.id for r in roommates], 'group': group.id}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Conversation.objects.get(id=response.data['id']).group, group)
+
+        # One chat per group
+        group.members.add(self.create_group("erin")[1][0])
+        payload['participants'].append(MarketplaceUser.objects.get(username="erin").id)
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_start_conversation_for_someone_elses_group(self):
+        group, roommates = self.create_group("carol", "dave")
+
+        # Not a member
+        response = self.client.post(
+            self.url, {'participants': [r.user.id for r in roommates], 'group': group.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # A member, but not with the whole group
+        self.client.force_authenticate(user=roommates[0].user)
+        response = self.client.post(self.url, {'participants': [self.tenant.id], 'group': group.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Conversation.objects.filter(group=group).exists())
+
+    def test_start_conversation_for_invalid_group(self):
+        response = self.client.post(self.url, {'participants': [self.landlord.id], 'group': 'abc'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, {'participants': [self.landlord.id], 'group': 999999}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_start_duplicate_group_conversation(self):
+        other = MarketplaceUser.objects.create_user(username="carol", email="carol@example.com", password="pass1234")
+
+        response = self.client.post(self.url, {'participants': [other.id, self.tenant.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Same people in a different order (the sender is added implicitly)
+        response = self.client.post(self.url, {'participants': [other.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Conversation.objects.filter(listing=self.listing).count(), 1)
+
+    def test_participant_key_follows_participants(self):
+        conversation = Conversation.objects.create(listing=self.listing)
+        conversation.participants.set([self.tenant, self.landlord])
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.participant_key, Conversation.participant_key_for([self.landlord.id, self.tenant.id]))
+
+        conversation.participants.remove(self.landlord)
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.participant_key, Conversation.participant_key_for([self.tenant.id]))
+
+        # The tenant and landlord can now start a new 1-on-1 conversation
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -1,7 +1,7 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from marketplace.models import MarketplaceUser, Listing, Group, RoommateUser
+from marketplace.models import MarketplaceUser, Listing, Group, RoommateUser, Conversation
 from datetime import date
 
 class TestGroupEditDeleteViews(APITestCase):
@@ -62,3 +62,13 @@ class TestGroupEditDeleteViews(APITestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.delete(self.url_delete)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_delete_group_deletes_its_conversation(self):
+        group_chat = Conversation.objects.create(listing=self.listing, group=self.group)
+        other_chat = Conversation.objects.create(listing=self.listing)
+        self.client.force_authenticate(user=self.user)
+
+        self.client.delete(self.url_delete)
+
+        self.assertFalse(Conversation.objects.filter(id=group_chat.id).exists())
+        self.assertTrue(Conversation.objects.filter(id=other_chat.id).exists())
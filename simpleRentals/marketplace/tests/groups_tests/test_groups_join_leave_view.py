@@ -1,7 +1,7 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from marketplace.models import MarketplaceUser, Listing, Group, RoommateUser
+from marketplace.models import MarketplaceUser, Listing, Group, RoommateUser, Conversation
 from datetime import date
 
 class TestGroupJoinLeaveViews(APITestCase):
@@ -68,3 +68,18 @@ class TestGroupJoinLeaveViews(APITestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.put(self.url_leave)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_join_and_leave_update_group_conversation_only(self):
+        landlord = MarketplaceUser.objects.create_user(username="landlord", email="landlord@rentals.com", password="pass1234")
+        group_chat = Conversation.objects.create(listing=self.listing, group=self.group)
+        other_chat = Conversation.objects.create(listing=self.listing)
+        other_chat.participants.add(self.user, landlord)
+        self.client.force_authenticate(user=self.user)
+
+        self.client.put(self.url_join)
+        self.assertIn(self.user, group_chat.participants.all())
+
+        self.client.put(self.url_leave)
+        self.assertNotIn(self.user, group_chat.participants.all())
+        # Conversations outside the group are left alone
+        self.assertIn(self.user, other_chat.participants.all())
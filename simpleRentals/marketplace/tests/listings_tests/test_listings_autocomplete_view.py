@@ -0,0 +1,88 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from marketplace.autocomplete import location_autocomplete
+from marketplace.models import MarketplaceUser, Listing
+
+class TestListingAutocompleteView(APITestCase):
+    def setUp(self):
+        self.user = MarketplaceUser.objects.create_user(
+            username="lister", email="lister@example.com", password="pass1234"
+        )
+        self.url = reverse('listing_autocomplete')
+        self.add_listing("Waterloo", "N2L 3G1")
+        self.add_listing("Waterloo", "N2L 6R5")
+        self.add_listing("waterloo ", "N2J 1A1")
+        self.add_listing("Watford", "N0M 2S0")
+        self.add_listing("Toronto", "M5V 2T6")
+        location_autocomplete.reset()
+        self.addCleanup(location_autocomplete.reset)
+
+    def add_listing(self, city, postal_code):
+        return Listing.objects.create(
+            owner=self.user,
+            price=1200.00,
+            property_type="A",
+            payment_type="C",
+            bedrooms=2,
+            bathrooms=1,
+            sqft_area=800,
+            laundry_type="I",
+            parking_spaces=1,
+            heating=True,
+            ac=True,
+            move_in_date="2025-08-01",
+            description="Sample listing",
+            street_address="123 Main St",
+            city=city,
+            postal_code=postal_code
+        )
+
+    def test_city_prefix_most_listings_first(self):
+        response = self.client.get(self.url, {'q': 'wat'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'type': 'city', 'value': 'Waterloo', 'count': 3},
+            {'type': 'city', 'value': 'Watford', 'count': 1},
+        ])
+
+    def test_postal_code_prefix(self):
+        response = self.client.get(self.url, {'q': 'n2'})
+        self.assertEqual(response.data, [
+            {'type': 'postal_code', 'value': 'N2L', 'count': 2},
+            {'type': 'postal_code', 'value': 'N2J', 'count': 1},
+        ])
+
+        response = self.client.get(self.url, {'q': 'N2L 3G1'})
+        self.assertEqual(response.data, [{'type': 'postal_code', 'value': 'N2L', 'count': 2}])
+
+    def test_answered_without_queries(self):
+        self.client.get(self.url, {'q': 'wat'})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'q': 'tor', 'limit': 1})
+        self.assertEqual(response.data, [{'type': 'city', 'value': 'Toronto', 'count': 1}])
+
+    def test_follows_created_edited_and_deleted_listings(self):
+        self.client.get(self.url, {'q': 'wat'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            listing = self.add_listing("Watford", "N0M 1A0")
+        response = self.client.get(self.url, {'q': 'watf'})
+        self.assertEqual(response.data, [{'type': 'city', 'value': 'Watford', 'count': 2}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.city = "Toronto"
+            listing.save()
+        response = self.client.get(self.url, {'q': 'watf'})
+        self.assertEqual(response.data, [{'type': 'city', 'value': 'Watford', 'count': 1}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.filter(city="Watford").delete()
+        response = self.client.get(self.url, {'q': 'watf'})
+        self.assertEqual(response.data, [])
+
+    def test_query_required(self):
+        response = self.client.get(self.url, {'q': ' '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
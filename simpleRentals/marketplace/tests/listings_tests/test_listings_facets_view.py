@@ -0,0 +1,81 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from marketplace.models import MarketplaceUser, Listing
+
+class TestListingFacetView(APITestCase):
+    def setUp(self):
+        self.user = MarketplaceUser.objects.create_user(
+            username="lister", email="lister@example.com", password="pass1234"
+        )
+        self.url = reverse('listing_facets')
+        self.add_listing(price=900, property_type="A", bedrooms=1, furnished=True, ac=True)
+        self.add_listing(price=1400, property_type="A", bedrooms=2, ac=True, heat=True)
+        self.add_listing(price=1800, property_type="H", bedrooms=3, fridge=True)
+        self.add_listing(price=3200, property_type="C", bedrooms=7, ac=True, fridge=True)
+        self.add_listing(price=1000, property_type="A", bedrooms=1, city="Toronto")
+
+    def add_listing(self, city="Waterloo", **fields):
+        values = dict(
+            owner=self.user,
+            price=1200.00,
+            property_type="A",
+            payment_type="C",
+            bedrooms=2,
+            bathrooms=1,
+            sqft_area=800,
+            laundry_type="I",
+            parking_spaces=1,
+            move_in_date="2025-08-01",
+            description="Sample listing",
+            street_address="123 Main St",
+            city=city,
+            postal_code="N2L 3G1"
+        )
+        values.update(fields)
+        return Listing.objects.create(**values)
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'location': 'waterloo'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['property_type'], {'H': 1, 'A': 2, 'C': 1, 'T': 0, 'O': 0})
+        self.assertEqual(response.data['bedrooms'], {'0': 0, '1': 1, '2': 1, '3': 1, '4': 0, '5': 0, '6+': 1})
+        self.assertEqual(response.data['furnished'], {'true': 1, 'false': 3})
+        self.assertEqual(response.data['amenities'], {'ac': 3, 'fridge': 2, 'heating': 0, 'internet': 0})
+        self.assertEqual(response.data['utilities'], {'heat': 1, 'hydro': 0, 'water': 0})
+
+    def test_option_counts_ignore_their_own_filter(self):
+        response = self.client.get(self.url, {'location': 'waterloo', 'property_type': 'A', 'amenities[]': ['ac']})
+
+        self.assertEqual(response.data['total'], 2)
+        # Other property types are counted as if picked instead of Apartment
+        self.assertEqual(response.data['property_type'], {'H': 0, 'A': 2, 'C': 1, 'T': 0, 'O': 0})
+        # Amenities add up, so they are counted on top of the current selection
+        self.assertEqual(response.data['amenities'], {'ac': 2, 'fridge': 0, 'heating': 0, 'internet': 0})
+        self.assertEqual(response.data['bedrooms']['2'], 1)
+
+    def test_price_histogram(self):
+        response = self.client.get(
+            self.url, {'location': 'waterloo', 'max_price': 1500, 'price_buckets': '0,1000,2000'}
+        )
+
+        self.assertEqual(response.data['total'], 2)
+        # The price range and histogram are not narrowed by the price filter itself
+        self.assertEqual(float(response.data['price']['min']), 900)
+        self.assertEqual(float(response.data['price']['max']), 3200)
+        self.assertEqual(
+            [(float(bucket['min']), bucket['max'] and float(bucket['max']), bucket['count'])
+             for bucket in response.data['price']['histogram']],
+            [(0, 1000, 1), (1000, 2000, 2), (2000, None, 1)]
+        )
+
+    def test_invalid_price_buckets(self):
+        response = self.client.get(self.url, {'location': 'waterloo', 'price_buckets': '2000,1000'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_scope_required(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -3,6 +3,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
 from marketplace.models import MarketplaceUser, Listing, ListingPicture
+from marketplace.geo import encode_geohash
 
 class ListingTests(APITestCase):
     def setUp(self):
@@ -35,6 +36,8 @@ class ListingTests(APITestCase):
             "street_address": "456 Elm St",
             "city": "Newville",
             "postal_code": "67890",
+            "latitude": 43.4723,
+            "longitude": -80.5449,
             "front_image": image1,
             "pictures": [image2, image3, image4]
         }
@@ -42,6 +45,8 @@ class ListingTests(APITestCase):
         response = self.client.post(self.post_url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIn('id', response.data)
+        listing = Listing.objects.get(id=response.data['id'])
+        self.assertEqual(listing.geohash, encode_geohash(43.4723, -80.5449))
 
     def test_create_listing_invalid(self):
         image1 = SimpleUploadedFile('test_image1.jpg', b'file_content', content_type='image/jpeg')
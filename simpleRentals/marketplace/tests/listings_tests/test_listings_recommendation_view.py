@@ -0,0 +1,363 @@
+import os
+import subprocess
+import sys
+import tempfile
+import joblib
+import multiprocessing
+from unittest.mock import patch
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from django.test import TransactionTestCase
+from rest_framework.test import APITestCase
+from datetime import timedelta
+from django.utils import timezone
+from marketplace.models import MarketplaceUser, Listing, ListingInteraction, ListingRecommendation, Favorites, RecommenderModelVersion, ListingPopularity, PopularityEpoch
+import numpy as np
+from marketplace.recommender import ModelRegistry, rank_listings_for_users
+from marketplace.tests.query_counts import QueryCountMixin
+from marketplace.popularity import decayed_weight, popularity_epoch, price_band, POPULARITY_HALF_LIFE_DAYS
+from marketplace.features import FEATURE_COLUMNS, scoring_matrix, interaction_training_data, interaction_training_chunks, encode_location
+
+class RecommenderRegistryTests(APITestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "recommender.pkl")
+        self.registry = ModelRegistry(self.path, check_interval=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_missing_model(self):
+        self.assertIsNone(self.registry.get())
+
+    def test_model_loaded_once_and_hot_reloaded(self):
+        self.registry.save({"version": 1})
+        first = self.registry.get()
+        self.assertEqual(first, {"version": 1})
+        # Unchanged file: the cached object is reused, not unpickled again
+        self.assertIs(self.registry.get(), first)
+
+        # Another process writes a new model
+        joblib.dump({"version": 2}, self.path)
+        os.utime(self.path, ns=(self.registry.version + 10**9, self.registry.version + 10**9))
+        self.assertEqual(self.registry.get(), {"version": 2})
+
+class RankListingsForUsersTests(APITestCase):
+    class PriceModel:
+        """Scores rows by listing price, rounded so some listings tie."""
+        def __init__(self):
+            self.calls = []
+
+        def predict(self, features):
+            self.calls.append(len(features))
+            return np.round(features[:, 4] / 500)
+
+    def test_chunked_predict_matches_single_call(self):
+        rng = np.random.default_rng(0)
+        user_ids = np.arange(1, 7)
+        # Columns used by the budget rules: 2 = budget_min, 3 = budget_max (0 = no maximum)
+        user_matrix = np.zeros((6, 4))
+        user_matrix[:, 2] = [0, 1000, 1500, 0, 3000, 2000]
+        user_matrix[:, 3] = [0, 2500, 1800, 1500, 2000, 0]
+        listing_ids = np.arange(101, 141)
+        listing_matrix = np.column_stack([rng.integers(500, 4000, 40), rng.random(40)])
+        favourites = {2: {101, 102, 103}}
+
+        single = rank_listings_for_users(
+            self.PriceModel(), user_ids, user_matrix, favourites, listing_ids, listing_matrix, 5, max_rows=10_000
+        )
+        model = self.PriceModel()
+        chunked = rank_listings_for_users(
+            model, user_ids, user_matrix, favourites, listing_ids, listing_matrix, 5, max_rows=7
+        )
+
+        self.assertEqual(chunked, single)
+        self.assertEqual(chunked[5], [])  # Empty budget range
+        self.assertEqual(len(chunked[1]), 5)
+        self.assertLessEqual(max(model.calls), 7)
+
+class ListingRecommendationTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.user = MarketplaceUser.objects.create_user(
+            username="renter", email="renter@example.com", password="pass1234",
+            budget_min=1000, budget_max=2500, preferred_location="Waterloo"
+        )
+        self.owner = MarketplaceUser.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('listing_recommendations')
+
+        self.listings = [
+            Listing.objects.create(
+                owner=self.owner, price=price, property_type="A", payment_type="C",
+                bedrooms=2, bathrooms=1, sqft_area=800, laundry_type=laundry, parking_spaces=1,
+                heating=True, ac=ac, move_in_date="2025-08-01", description="Sample listing",
+                street_address="123 Main St", city="Waterloo", postal_code="N2J2X5",
+                latitude=43.47, longitude=-80.54
+            )
+            for price, laundry, ac in [(1200, "I", True), (1500, "S", False), (2000, "N", True), (9000, "I", True)]
+        ]
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(os.path.join(self.tmp_dir.name, "recommender.pkl"), check_interval=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_training_and_serving_features_match(self):
+        interaction = ListingInteraction.objects.create(user=self.user, listing=self.listings[1], interaction_type="favourite")
+
+        X, y = interaction_training_data(ListingInteraction.objects.filter(id=interaction.id))
+        ids, features = scoring_matrix(self.user, Listing.objects.filter(id=self.listings[1].id))
+
+        self.assertEqual(X.shape, (1, len(FEATURE_COLUMNS)))
+        self.assertEqual(list(y), [1.0])
+        self.assertEqual(list(ids), [self.listings[1].id])
+        self.assertEqual(X.tolist(), features.tolist())
+        self.assertEqual(features[0][FEATURE_COLUMNS.index('laundry_type')], 1)
+
+    def test_recommendations_in_budget(self):
+        for listing in self.listings[:2]:
+            ListingInteraction.objects.create(user=self.user, listing=listing, interaction_type="click")
+
+        with patch("marketplace.management.commands.train_recommender.recommender_registry", self.registry), \
+                patch("marketplace.views.recommender_registry", self.registry):
+            call_command("train_recommender", stdout=open(os.devnull, "w"))
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(l['id'] for l in response.data),
+            sorted(l.id for l in self.listings[:3])
+        )
+
+    def test_recommendations_without_model(self):
+        ListingInteraction.objects.create(user=self.owner, listing=self.listings[2], interaction_type="favourite")
+        ListingInteraction.objects.create(user=self.owner, listing=self.listings[1], interaction_type="click")
+        ListingInteraction.objects.create(user=self.owner, listing=self.listings[3], interaction_type="favourite")
+        call_command("refresh_popularity", stdout=open(os.devnull, "w"))
+
+        with patch("marketplace.views.recommender_registry", self.registry):
+            response = self.client.get(self.url)
+
+        # Most popular first, narrowed to the user's city and budget bands
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['id'] for l in response.data], [self.listings[2].id, self.listings[1].id])
+
+    def test_recommendations_cold_start_without_interactions(self):
+        with patch("marketplace.views.recommender_registry", self.registry):
+            response = self.client.get(self.url)
+
+        # Nothing to rank by yet, newest listings are returned
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['id'] for l in response.data], [l.id for l in reversed(self.listings)])
+
+    def test_popularity_counters_follow_interactions(self):
+        self.client.post(reverse('interaction_send', args=[self.listings[0].id]), {"interaction": "click"})
+        self.client.post(reverse('interaction_send', args=[self.listings[0].id]), {"interaction": "favourite"})
+
+        popularity = ListingPopularity.objects.get(listing=self.listings[0])
+        self.assertEqual((popularity.clicks, popularity.favourites), (1, 1))
+        self.assertEqual((popularity.city, popularity.price_band), ("waterloo", price_band(1200)))
+
+        # A full rebuild from ListingInteraction gives the same counters, measured from a new epoch
+        live_score = popularity.score
+        old_epoch = popularity_epoch()
+        call_command("refresh_popularity", stdout=open(os.devnull, "w"))
+        popularity.refresh_from_db()
+        rescale = 2 ** ((old_epoch - popularity_epoch()).total_seconds() / 86400 / POPULARITY_HALF_LIFE_DAYS)
+        self.assertEqual((popularity.clicks, popularity.favourites), (1, 1))
+        self.assertAlmostEqual(popularity.score, live_score * rescale, delta=live_score * rescale * 1e-6)
+
+        # Later interactions add to the rebased score on the same scale
+        self.client.post(reverse('interaction_send', args=[self.listings[0].id]), {"interaction": "click"})
+        rebuilt_score = popularity.score
+        popularity.refresh_from_db()
+        self.assertAlmostEqual(popularity.score, rebuilt_score + decayed_weight("click", timezone.now(), popularity_epoch()), delta=1e-3)
+
+    def test_refresh_popularity_rebases_epoch(self):
+        # Decades after the epoch the increments no longer fit in a float
+        PopularityEpoch.objects.update(epoch=timezone.now() - timedelta(days=365 * 30))
+        with self.assertRaises(OverflowError):
+            decayed_weight("click", timezone.now(), popularity_epoch())
+
+        call_command("refresh_popularity", stdout=open(os.devnull, "w"))
+
+        self.assertLess(timezone.now() - popularity_epoch(), timedelta(days=1))
+        response = self.client.post(reverse('interaction_send', args=[self.listings[0].id]), {"interaction": "click"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Within a day of the epoch, a click weighs about 1
+        self.assertLess(ListingPopularity.objects.get(listing=self.listings[0]).score, 2.0)
+
+    def test_popularity_decays_over_time(self):
+        now = timezone.now()
+        self.assertAlmostEqual(
+            decayed_weight("click", now - timedelta(days=POPULARITY_HALF_LIFE_DAYS)) / decayed_weight("click", now), 0.5
+        )
+        self.assertEqual(decayed_weight("favourite", now), decayed_weight("click", now) * 3)
+
+    def test_recommendations_unauthenticated(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_recommendations_stores_top_n(self):
+        for listing in self.listings[:2]:
+            ListingInteraction.objects.create(user=self.user, listing=listing, interaction_type="click")
+        favourites = Favorites.objects.create(user=self.user)
+        favourites.favorite_listings.add(self.listings[0])
+
+        with patch("marketplace.management.commands.train_recommender.recommender_registry", self.registry), \
+                patch("marketplace.management.commands.refresh_recommendations.recommender_registry", self.registry):
+            call_command("train_recommender", stdout=open(os.devnull, "w"))
+            call_command("refresh_recommendations", "--top-n", "2", "--batch-size", "1", stdout=open(os.devnull, "w"))
+
+        stored = ListingRecommendation.objects.filter(user=self.user).order_by('rank')
+        self.assertEqual([r.rank for r in stored], [0, 1])
+        # Favourited and out of budget listings are never recommended
+        self.assertTrue({r.listing_id for r in stored} <= {self.listings[1].id, self.listings[2].id})
+        self.assertGreaterEqual(stored[0].score, stored[1].score)
+
+    def test_recommendations_served_from_precomputed_table(self):
+        ListingRecommendation.objects.create(user=self.user, listing=self.listings[2], rank=0, score=0.9)
+        ListingRecommendation.objects.create(user=self.user, listing=self.listings[0], rank=1, score=0.7)
+
+        with patch("marketplace.views.recommender_registry", self.registry):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['id'] for l in response.data], [self.listings[2].id, self.listings[0].id])
+
+    def test_precomputed_recommendations_query_count_is_constant(self):
+        ListingRecommendation.objects.create(user=self.user, listing=self.listings[2], rank=0, score=0.9)
+
+        # Recommended listings (owners joined) + pictures
+        with patch("marketplace.views.recommender_registry", self.registry):
+            self.assertConstantQueries(
+                lambda: self.client.get(self.url),
+                lambda: ListingRecommendation.objects.create(user=self.user, listing=self.listings[0], rank=1, score=0.7),
+                expected=2,
+            )
+
+    def test_stale_recommendations_fall_back_to_live_scoring(self):
+        ListingRecommendation.objects.create(
+            user=self.user, listing=self.listings[2], rank=0, score=0.9,
+            computed_at=timezone.now() - timedelta(days=7)
+        )
+
+        with patch("marketplace.views.recommender_registry", self.registry):
+            response = self.client.get(self.url)
+
+        # No fresh entry and no trained model, popular (here newest) listings are served instead
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(self.listings))
+
+    def test_location_encoding_is_stable_across_processes(self):
+        script = "from marketplace.features import encode_location; print(encode_location('Waterloo'))"
+        outputs = {
+            subprocess.run(
+                [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                env={**os.environ, "PYTHONHASHSEED": seed},
+            ).stdout.strip()
+            for seed in ("1", "2")
+        }
+        self.assertEqual(outputs, {str(encode_location("Waterloo"))})
+        self.assertEqual(encode_location("  waterloo "), encode_location("Waterloo"))
+        self.assertEqual(encode_location(None), 0)
+
+    def test_training_data_streamed_in_chunks(self):
+        for listing in self.listings:
+            ListingInteraction.objects.create(user=self.user, listing=listing, interaction_type="click")
+
+        chunks = list(interaction_training_chunks(ListingInteraction.objects.all(), chunk_size=3))
+        X, y = interaction_training_data(ListingInteraction.objects.all())
+
+        self.assertEqual([len(chunk_y) for _, chunk_y in chunks], [3, 1])
+        self.assertEqual(sum((chunk_X.tolist() for chunk_X, _ in chunks), []), X.tolist())
+
+        with patch("marketplace.management.commands.train_recommender.recommender_registry", self.registry):
+            call_command("train_recommender", "--chunk-size", "2", "--n-jobs", "2", stdout=open(os.devnull, "w"))
+        self.assertEqual(self.registry.get().n_features_in_, len(FEATURE_COLUMNS))
+
+    def test_incremental_training_from_watermark(self):
+        ListingInteraction.objects.create(user=self.user, listing=self.listings[0], interaction_type="click")
+        ListingInteraction.objects.create(user=self.user, listing=self.listings[1], interaction_type="favourite")
+
+        with patch("marketplace.management.commands.train_recommender.recommender_registry", self.registry):
+            call_command("train_recommender", "--trees", "10", stdout=open(os.devnull, "w"))
+            ListingInteraction.objects.create(user=self.user, listing=self.listings[2], interaction_type="click")
+            call_command("train_recommender", "--incremental", "--trees-per-run", "5", stdout=open(os.devnull, "w"))
+            # Nothing new since the last watermark: no new version
+            call_command("train_recommender", "--incremental", stdout=open(os.devnull, "w"))
+
+        full, incremental = RecommenderModelVersion.objects.order_by('version')
+        self.assertEqual((full.mode, full.interactions_trained, full.n_estimators), ('F', 2, 10))
+        self.assertEqual((incremental.mode, incremental.interactions_trained, incremental.n_estimators), ('I', 1, 15))
+        self.assertEqual(incremental.last_interaction_id, ListingInteraction.objects.latest('id').id)
+        self.assertEqual(len(self.registry.get().estimators_), 15)
+        self.assertTrue(os.path.exists(self.registry.artifact_path(full.artifact)))
+
+    def test_old_versions_pruned(self):
+        ListingInteraction.objects.create(user=self.user, listing=self.listings[0], interaction_type="click")
+
+        def artifacts():
+            return sorted(name for name in os.listdir(self.tmp_dir.name) if name.startswith("recommender-v"))
+
+        with patch("marketplace.management.commands.train_recommender.recommender_registry", self.registry):
+            for _ in range(3):
+                call_command("train_recommender", "--trees", "5", stdout=open(os.devnull, "w"))
+            # The live model and the previous one, for rollback
+            self.assertEqual(
+                list(RecommenderModelVersion.objects.order_by('version').values_list('version', flat=True)), [2, 3]
+            )
+            self.assertEqual(artifacts(), ["recommender-v2.pkl", "recommender-v3.pkl"])
+
+            call_command("train_recommender", "--trees", "5", "--keep-versions", "1", stdout=open(os.devnull, "w"))
+
+        self.assertEqual(list(RecommenderModelVersion.objects.values_list('version', flat=True)), [4])
+        self.assertEqual(artifacts(), ["recommender-v4.pkl"])
+        self.assertIsNotNone(self.registry.get())
+
+class RefreshRecommendationsWorkersTests(TransactionTestCase):
+    """Worker processes only see committed data, so this runs outside a test transaction."""
+
+    def setUp(self):
+        self.user = MarketplaceUser.objects.create_user(
+            username="renter", email="renter@example.com", password="pass1234", budget_min=1000, budget_max=2500
+        )
+        owner = MarketplaceUser.objects.create_user(username="owner", email="owner@example.com", password="pass1234")
+        self.listings = [
+            Listing.objects.create(
+                owner=owner, price=price, property_type="A", payment_type="C",
+                bedrooms=2, bathrooms=1, sqft_area=800, laundry_type="I", parking_spaces=1,
+                move_in_date="2025-08-01", description="Sample listing",
+                street_address="123 Main St", city="Waterloo", postal_code="N2J2X5"
+            )
+            for price in (1200, 1500, 2000)
+        ]
+        for listing in self.listings[:2]:
+            ListingInteraction.objects.create(user=self.user, listing=listing, interaction_type="click")
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(os.path.join(self.tmp_dir.name, "recommender.pkl"), check_interval=0)
+        self.start_method = multiprocessing.get_start_method(allow_none=True)
+
+    def tearDown(self):
+        multiprocessing.set_start_method(self.start_method, force=True)
+        self.tmp_dir.cleanup()
+
+    def test_workers_whatever_the_default_start_method(self):
+        # Spawned workers would import the models before Django is set up
+        multiprocessing.set_start_method('spawn', force=True)
+
+        with patch("marketplace.management.commands.train_recommender.recommender_registry", self.registry), \
+                patch("marketplace.management.commands.refresh_recommendations.recommender_registry", self.registry):
+            call_command("train_recommender", stdout=open(os.devnull, "w"))
+            call_command(
+                "refresh_recommendations", "--top-n", "2", "--batch-size", "1", "--workers", "2",
+                stdout=open(os.devnull, "w")
+            )
+
+        self.assertEqual(ListingRecommendation.objects.filter(user=self.user).count(), 2)
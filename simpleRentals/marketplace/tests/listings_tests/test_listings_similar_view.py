@@ -0,0 +1,70 @@
+import os
+import tempfile
+from unittest.mock import patch
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from marketplace.models import MarketplaceUser, Listing, ListingInteraction
+from marketplace.recommender import ModelRegistry
+
+class ListingSimilarTests(APITestCase):
+    def setUp(self):
+        self.owner = MarketplaceUser.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        self.renter = MarketplaceUser.objects.create_user(
+            username="renter", email="renter@example.com", password="pass1234"
+        )
+
+        def create_listing(price, bedrooms, lat, lng):
+            return Listing.objects.create(
+                owner=self.owner, price=price, property_type="A", payment_type="C",
+                bedrooms=bedrooms, bathrooms=1, sqft_area=700 + 100 * bedrooms, laundry_type="I",
+                parking_spaces=1, move_in_date="2025-08-01", description="Sample listing",
+                street_address="123 Main St", city="Waterloo", postal_code="N2J2X5",
+                latitude=lat, longitude=lng
+            )
+
+        self.base = create_listing(1500, 2, 43.4723, -80.5449)
+        self.close_match = create_listing(1550, 2, 43.4730, -80.5440)
+        self.far_match = create_listing(4000, 5, 43.6426, -79.3871)
+        ListingInteraction.objects.create(user=self.renter, listing=self.base, interaction_type="click")
+        ListingInteraction.objects.create(user=self.renter, listing=self.close_match, interaction_type="favourite")
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(os.path.join(self.tmp_dir.name, "similarity_index.pkl"), check_interval=0)
+        self.url = reverse('similar_listings', args=[self.base.id])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_similar_listings(self):
+        with patch("marketplace.management.commands.build_similarity_index.similarity_registry", self.registry), \
+                patch("marketplace.views.similarity_registry", self.registry):
+            call_command("build_similarity_index", stdout=open(os.devnull, "w"))
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['id'] for l in response.data], [self.close_match.id, self.far_match.id])
+
+    def test_similar_listings_without_index(self):
+        with patch("marketplace.views.similarity_registry", self.registry):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_similar_listings_unknown_listing(self):
+        with patch("marketplace.management.commands.build_similarity_index.similarity_registry", self.registry), \
+                patch("marketplace.views.similarity_registry", self.registry):
+            call_command("build_similarity_index", stdout=open(os.devnull, "w"))
+            # Deleted after the index was built, so the index still knows it
+            deleted_id = self.far_match.id
+            self.far_match.delete()
+
+            response = self.client.get(reverse('similar_listings', args=[deleted_id]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+            response = self.client.get(reverse('similar_listings', args=[deleted_id + 1000]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,10 +1,15 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
-from marketplace.models import MarketplaceUser, Listing, ListingPicture
+from marketplace.models import MarketplaceUser, Listing, ListingPicture, ListingSearchTerm, Favorites
+from marketplace.geo import encode_geohash, bbox_cell_count, zoom_to_precision, MAX_CLUSTER_CELLS, MAX_ZOOM
+from marketplace.tests.query_counts import QueryCountMixin
 
-class ListingTests(APITestCase):
+class ListingTests(QueryCountMixin, APITestCase):
     def setUp(self):
         self.user = MarketplaceUser.objects.create_user(
             username="lister", email="lister@example.com", password="pass1234"
@@ -57,3 +62,312 @@ class ListingTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIsInstance(response.data, list)
+
+    def test_view_listing_list_with_radius(self):
+        # Waterloo, ~2km from the search origin
+        self.listing.latitude = 43.4723
+        self.listing.longitude = -80.5449
+        self.listing.save()
+        # Toronto, well outside the radius
+        Listing.objects.create(
+            owner=self.user, price=1500.00, property_type="A", payment_type="C",
+            bedrooms=1, bathrooms=1, sqft_area=600, laundry_type="S", parking_spaces=0,
+            move_in_date="2025-08-01", description="Far away", street_address="1 Yonge St",
+            city="Toronto", postal_code="M5E1E5", latitude=43.6426, longitude=-79.3871
+        )
+
+        url = reverse('viewAllListings')
+        response = self.client.get(url, {'lat': 43.4643, 'lng': -80.5204, 'radius': 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['id'] for l in response.data], [self.listing.id])
+        self.assertAlmostEqual(response.data[0]['distance_km'], 2.2, delta=0.2)
+
+    def test_view_listing_list_with_bbox(self):
+        self.listing.latitude = 43.4723
+        self.listing.longitude = -80.5449
+        self.listing.geohash = encode_geohash(43.4723, -80.5449)
+        self.listing.save()
+
+        url = reverse('viewAllListings')
+        response = self.client.get(url, {'bbox': '43.44,-80.56,43.49,-80.48'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['id'] for l in response.data], [self.listing.id])
+
+        response = self.client.get(url, {'bbox': '43.60,-79.50,43.70,-79.30'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_view_listing_list_with_invalid_bbox(self):
+        url = reverse('viewAllListings')
+        response = self.client.get(url, {'bbox': '43.49,-80.56,43.44'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_listing_clusters(self):
+        coords = [(43.4723, -80.5449, 1200), (43.4688, -80.5235, 1800), (43.6426, -79.3871, 2500)]
+        self.listing.delete()
+        for lat, lng, price in coords:
+            Listing.objects.create(
+                owner=self.user, price=price, property_type="A", payment_type="C",
+                bedrooms=1, bathrooms=1, sqft_area=600, laundry_type="S", parking_spaces=0,
+                move_in_date="2025-08-01", description="Clustered", street_address="1 King St",
+                city="Waterloo", postal_code="N2J2X5", latitude=lat, longitude=lng,
+                geohash=encode_geohash(lat, lng)
+            )
+
+        url = reverse('listing_clusters')
+        response = self.client.get(url, {'bbox': '43.0,-81.0,44.0,-79.0', 'zoom': 8})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        clusters = sorted(response.data['clusters'], key=lambda c: c['count'])
+        self.assertEqual([c['count'] for c in clusters], [1, 2])
+        self.assertEqual(clusters[1]['min_price'], "1200.00")
+        self.assertEqual(clusters[1]['max_price'], "1800.00")
+        self.assertAlmostEqual(clusters[1]['latitude'], (43.4723 + 43.4688) / 2)
+
+        # Zoomed all the way out, everything falls into one cell
+        response = self.client.get(url, {'bbox': '43.0,-81.0,44.0,-79.0', 'zoom': 1})
+        self.assertEqual([c['count'] for c in response.data['clusters']], [3])
+
+    def test_listing_clusters_bounded_for_large_bbox(self):
+        url = reverse('listing_clusters')
+        response = self.client.get(url, {'bbox': '-90,-180,90,180', 'zoom': MAX_ZOOM})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Not the zoom level's street-level cells, the world at that precision would be one row per listing
+        precision = response.data['precision']
+        self.assertLess(precision, zoom_to_precision(MAX_ZOOM))
+        self.assertLessEqual(bbox_cell_count(-90, -180, 90, 180, precision), MAX_CLUSTER_CELLS)
+
+        # A small viewport keeps the zoom level's precision
+        response = self.client.get(url, {'bbox': '43.4720,-80.5450,43.4730,-80.5440', 'zoom': MAX_ZOOM})
+        self.assertEqual(response.data['precision'], zoom_to_precision(MAX_ZOOM))
+
+    def test_listing_clusters_requires_zoom(self):
+        url = reverse('listing_clusters')
+        response = self.client.get(url, {'bbox': '43.0,-81.0,44.0,-79.0'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def add_listings(self, count):
+        listings = []
+        for i in range(count):
+            # A different owner per listing, so per-owner queries would show up too
+            owner = MarketplaceUser.objects.create_user(
+                username=f"owner{i}", email=f"owner{i}@example.com", password="pass1234"
+            )
+            listing = Listing.objects.create(
+                owner=owner, price=1000 + i, property_type="A", payment_type="C",
+                bedrooms=1, bathrooms=1, sqft_area=600, laundry_type="S", parking_spaces=0,
+                move_in_date="2025-08-01", description="Extra listing", street_address="1 King St",
+                city="Testville", postal_code="12345"
+            )
+            ListingPicture.objects.create(listing=listing, image="listing_pictures/a.jpg", is_primary=True)
+            ListingPicture.objects.create(listing=listing, image="listing_pictures/b.jpg")
+            listings.append(listing)
+        return listings
+
+    def test_listing_list_query_count_is_constant(self):
+        # Listings (owners joined) + pictures, however many listings match
+        self.assertConstantQueries(
+            lambda: self.client.get(self.list_url, {'location': 'Testville'}),
+            lambda: self.add_listings(5),
+            expected=2,
+        )
+
+    def test_favourites_query_count_is_constant(self):
+        favourites = Favorites.objects.create(user=self.user)
+        favourites.favorite_listings.add(self.listing)
+
+        # Favorites row + favourited listings (owners joined) + pictures
+        self.assertConstantQueries(
+            lambda: self.client.get(reverse('favourites_list')),
+            lambda: favourites.favorite_listings.add(*self.add_listings(5)),
+            expected=3,
+        )
+
+    def test_listing_list_card_view(self):
+        ListingPicture.objects.create(listing=self.listing, image="listing_pictures/a.jpg")
+        primary = ListingPicture.objects.create(listing=self.listing, image="listing_pictures/b.jpg", is_primary=True)
+
+        response = self.client.get(self.list_url, {'location': 'Testville', 'view': 'card'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        card = response.data[0]
+        self.assertNotIn('description', card)
+        self.assertEqual(card['owner'], self.user.id)
+        self.assertEqual(card['primary_picture']['id'], primary.id)
+
+    def test_listing_list_card_query_count_is_constant(self):
+        # Listings + primary pictures, no owner join
+        self.assertConstantQueries(
+            lambda: self.client.get(self.list_url, {'location': 'Testville', 'view': 'card'}),
+            lambda: self.add_listings(5),
+            expected=2,
+        )
+
+    def test_listing_list_sparse_fields(self):
+        response = self.client.get(self.list_url, {'location': 'Testville', 'fields': 'id,price'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': self.listing.id, 'price': "1200.00"}])
+
+        response = self.client.get(self.list_url, {'location': 'Testville', 'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.list_url, {'location': 'Testville', 'view': 'tiny'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_favourites_card_view(self):
+        favourites = Favorites.objects.create(user=self.user)
+        favourites.favorite_listings.add(self.listing)
+
+        response = self.client.get(reverse('favourites_list'), {'view': 'card', 'fields': 'id,city'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['favorite_listings'], [{'id': self.listing.id, 'city': "Testville"}])
+
+    def follow_pages(self, params):
+        """Walk a paginated listing search through its Link headers, returning the ids of each page."""
+        pages = []
+        response = self.client.get(self.list_url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([l['id'] for l in response.data])
+            links = response.headers.get('Link', '')
+            next_url = next((link.split(';')[0].strip('<> ') for link in links.split(',') if 'rel="next"' in link), None)
+            if not next_url:
+                return pages
+            response = self.client.get(next_url)
+
+    def test_listing_list_keyset_pagination(self):
+        listings = [self.listing] + self.add_listings(4)
+
+        pages = self.follow_pages({'location': 'Testville', 'page_size': 2})
+
+        # Newest first, every listing exactly once
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), [l.id for l in reversed(listings)])
+
+    def test_listing_list_page_size_is_capped(self):
+        self.add_listings(3)
+        with patch("marketplace.pagination.ListingPagination.max_page_size", 2):
+            response = self.client.get(self.list_url, {'location': 'Testville', 'page_size': 1000})
+
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('rel="next"', response.headers['Link'])
+
+    def test_listing_radius_pagination_nearest_first(self):
+        coords = [(43.50, -80.52), (43.4643, -80.5204), (43.48, -80.52)]
+        self.listing.delete()
+        listings = [
+            Listing.objects.create(
+                owner=self.user, price=1000, property_type="A", payment_type="C",
+                bedrooms=1, bathrooms=1, sqft_area=600, laundry_type="S", parking_spaces=0,
+                move_in_date="2025-08-01", description="Nearby", street_address="1 King St",
+                city="Waterloo", postal_code="N2J2X5", latitude=lat, longitude=lng
+            )
+            for lat, lng in coords
+        ]
+
+        pages = self.follow_pages({'lat': 43.4643, 'lng': -80.5204, 'radius': 10, 'page_size': 2})
+
+        self.assertEqual(sum(pages, []), [listings[1].id, listings[2].id, listings[0].id])
+
+    def add_searchable(self, street_address, city, postal_code, description):
+        return Listing.objects.create(
+            owner=self.user, price=1000, property_type="A", payment_type="C",
+            bedrooms=1, bathrooms=1, sqft_area=600, laundry_type="S", parking_spaces=0,
+            move_in_date="2025-08-01", description=description, street_address=street_address,
+            city=city, postal_code=postal_code
+        )
+
+    def test_listing_search_ranks_address_above_description(self):
+        in_description = self.add_searchable("5 Queen St", "Toronto", "M5H2N2", "Short walk to Waterloo park")
+        in_city = self.add_searchable("1 King St", "Waterloo", "N2J2X5", "Bright room")
+
+        response = self.client.get(self.list_url, {'q': 'waterloo'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['id'] for l in response.data], [in_city.id, in_description.id])
+        self.assertNotIn('search_vector', response.data[0])
+
+    def test_listing_search_description_words(self):
+        furnished = self.add_searchable("5 Queen St", "Toronto", "M5H2N2", "Fully furnished basement, close to the subway")
+        self.add_searchable("1 King St", "Waterloo", "N2J2X5", "Bright room")
+
+        response = self.client.get(self.list_url, {'q': 'furnishing subway'})
+        self.assertEqual([l['id'] for l in response.data], [furnished.id])
+
+    def test_listing_search_tolerates_typos(self):
+        toronto = self.add_searchable("5 Queen St", "Toronto", "M5H2N2", "Bright room")
+
+        response = self.client.get(self.list_url, {'q': 'Torronto'})
+        self.assertEqual([l['id'] for l in response.data], [toronto.id])
+
+    def test_listing_search_corrects_each_word(self):
+        furnished = self.add_searchable("5 Queen St", "Toronto", "M5H2N2", "Fully furnished basement, close to the subway")
+        self.add_searchable("1 King St", "Toronto", "N2J2X5", "Bright room")
+
+        response = self.client.get(self.list_url, {'q': 'furnishd torronto'})
+        self.assertEqual([l['id'] for l in response.data], [furnished.id])
+
+    def test_listing_search_corrects_typos_keeping_negation(self):
+        self.add_searchable("5 Queen St", "Toronto", "M5H2N2", "Fully furnished basement")
+        bright = self.add_searchable("1 King St", "Toronto", "N2J2X5", "Bright room")
+
+        response = self.client.get(self.list_url, {'q': 'torronto -basement'})
+        self.assertEqual([l['id'] for l in response.data], [bright.id])
+
+    def test_listing_search_repeated_dashes(self):
+        self.add_searchable("5 Queen St", "Toronto", "M5H2N2", "Fully furnished basement")
+        bright = self.add_searchable("1 King St", "Toronto", "N2J2X5", "Bright room")
+
+        response = self.client.get(self.list_url, {'q': 'torronto --basment'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['id'] for l in response.data], [bright.id])
+
+        response = self.client.get(self.list_url, {'q': '--cheep'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_listing_search_corrects_typos_keeping_or(self):
+        basement = self.add_searchable("5 Queen St", "Toronto", "M5H2N2", "Fully furnished basement")
+        bright = self.add_searchable("1 King St", "Toronto", "N2J2X5", "Bright room")
+
+        response = self.client.get(self.list_url, {'q': 'basment or bright'})
+        self.assertEqual(sorted(l['id'] for l in response.data), sorted([basement.id, bright.id]))
+
+        response = self.client.get(self.list_url, {'q': '"furnished basement" or brigth'})
+        self.assertEqual(sorted(l['id'] for l in response.data), sorted([basement.id, bright.id]))
+
+    def test_refresh_search_terms_drops_deleted_words(self):
+        listing = self.add_searchable("5 Queen St", "Toronto", "M5H2N2", "Penthouse")
+        self.assertTrue(ListingSearchTerm.objects.filter(word='penthous').exists())
+
+        listing.delete()
+        call_command('refresh_search_terms', stdout=StringIO())
+
+        self.assertFalse(ListingSearchTerm.objects.filter(word='penthous').exists())
+        self.assertTrue(ListingSearchTerm.objects.filter(word='testvill').exists())
+
+    def test_listing_search_pagination(self):
+        listings = [self.add_searchable(f"{i} King St", "Waterloo", "N2J2X5", "Bright room") for i in range(5)]
+
+        pages = self.follow_pages({'q': 'waterloo', 'page_size': 2})
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sorted(sum(pages, [])), sorted(l.id for l in listings))
+
+    def test_listing_search_pagination_by_rank(self):
+        # Ranks are float4, the cursor must keep them exact or boundary rows show up on two pages
+        listings = [
+            self.add_searchable(f"{i} King St", "Toronto", "M5H2N2", "Bright room" + " bright" * i) for i in range(8)
+        ]
+
+        pages = self.follow_pages({'q': 'bright', 'page_size': 2})
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 2])
+        self.assertEqual(sum(pages, []), [l.id for l in reversed(listings)])
+
+    def test_listing_location_matches_postal_code(self):
+        response = self.client.get(self.list_url, {'location': '1234'})
+        self.assertEqual([l['id'] for l in response.data], [self.listing.id])
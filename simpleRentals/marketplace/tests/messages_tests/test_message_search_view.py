@@ -0,0 +1,105 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from marketplace.models import MarketplaceUser, Listing, Conversation, Message
+
+class TestMessageSearchView(APITestCase):
+    def setUp(self):
+        self.user = MarketplaceUser.objects.create_user(
+            username="alice", email="alice@example.com", password="pass1234"
+        )
+        self.other_user = MarketplaceUser.objects.create_user(
+            username="bob", email="bob@example.com", password="pass1234"
+        )
+        self.listing = Listing.objects.create(
+            owner=self.other_user,
+            price=1200.00,
+            property_type="A",
+            payment_type="C",
+            bedrooms=2,
+            bathrooms=1,
+            sqft_area=800,
+            laundry_type="I",
+            parking_spaces=1,
+            heating=True,
+            ac=True,
+            move_in_date="2025-08-01",
+            description="Sample listing",
+            street_address="123 Main St",
+            city="Testville",
+            postal_code="12345"
+        )
+        self.conversation = Conversation.objects.create(listing=self.listing)
+        self.conversation.participants.add(self.user, self.other_user)
+        self.url = reverse('message_search')
+        self.client.force_authenticate(user=self.user)
+
+    def send(self, content, conversation=None, sender=None):
+        return Message.objects.create(
+            conversation=conversation or self.conversation, sender=sender or self.other_user, content=content
+        )
+
+    def test_ranked_hits_with_snippet(self):
+        once = self.send("Is parking included with the unit?")
+        twice = self.send("Parking: one spot. Street parking is free after 6pm.")
+        self.send("The laundry is in the basement.")
+
+        response = self.client.get(self.url, {'q': 'parking'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([hit['id'] for hit in response.data], [twice.id, once.id])
+        self.assertEqual(response.data[1]['conversation'], self.conversation.id)
+        self.assertIn('<mark>parking</mark>', response.data[1]['snippet'])
+
+    def test_matches_word_forms(self):
+        message = self.send("We are moving in September.")
+
+        response = self.client.get(self.url, {'q': 'move'})
+        self.assertEqual([hit['id'] for hit in response.data], [message.id])
+
+    def test_only_own_conversations(self):
+        stranger = MarketplaceUser.objects.create_user(
+            username="charlie", email="charlie@example.com", password="pass1234"
+        )
+        private = Conversation.objects.create(listing=self.listing)
+        private.participants.add(self.other_user, stranger)
+        self.send("Secret deposit details", conversation=private)
+
+        response = self.client.get(self.url, {'q': 'deposit'})
+        self.assertEqual(response.data, [])
+
+    def test_pages_through_hits(self):
+        messages = [self.send(f"Viewing slot number {i}") for i in range(5)]
+
+        seen = []
+        response = self.client.get(self.url, {'q': 'viewing', 'page_size': 2})
+        while True:
+            seen += [hit['id'] for hit in response.data]
+            link = response.headers.get('Link', '')
+            if 'rel="next"' not in link:
+                break
+            next_url = [part for part in link.split(', ') if 'rel="next"' in part][0]
+            response = self.client.get(next_url[next_url.index('<') + 1:next_url.index('>')])
+
+        self.assertEqual(sorted(seen), sorted(message.id for message in messages))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_pages_through_hits_of_different_ranks(self):
+        # Ranks are float4, the cursor must keep them exact or boundary rows show up on two pages
+        messages = [self.send("Viewing " * (i + 1) + f"slot number {i}") for i in range(5)]
+
+        seen = []
+        response = self.client.get(self.url, {'q': 'viewing', 'page_size': 2})
+        while True:
+            seen += [hit['id'] for hit in response.data]
+            link = response.headers.get('Link', '')
+            if 'rel="next"' not in link:
+                break
+            next_url = [part for part in link.split(', ') if 'rel="next"' in part][0]
+            response = self.client.get(next_url[next_url.index('<') + 1:next_url.index('>')])
+
+        self.assertEqual(seen, [message.id for message in reversed(messages)])
+
+    def test_query_required(self):
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,125 @@
+import json
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from marketplace.models import MarketplaceUser, Listing, Conversation
+from marketplace.realtime import InProcessBroker
+
+def read_events(response):
+    """Read an event stream until it closes (REALTIME_STREAM_MAX_SECONDS), returning the decoded events."""
+    chunks = [chunk.decode() for chunk in response.streaming_content]
+    return [json.loads(chunk.split("data: ", 1)[1]) for chunk in chunks if chunk.startswith("event:")]
+
+class TestInProcessBroker(APITestCase):
+    def test_publish_reaches_only_subscribers(self):
+        broker = InProcessBroker()
+        alice, bob = broker.subscribe(1), broker.subscribe(2)
+
+        broker.publish([1], {'type': 'message', 'id': 1})
+
+        self.assertEqual(alice.get(timeout=0), {'type': 'message', 'id': 1})
+        self.assertIsNone(bob.get(timeout=0))
+
+        broker.unsubscribe(alice)
+        broker.publish([1], {'type': 'message', 'id': 2})
+        self.assertIsNone(alice.get(timeout=0))
+
+    def test_slow_subscriber_keeps_latest_events(self):
+        broker = InProcessBroker(max_events=2)
+        subscription = broker.subscribe(1)
+
+        for i in range(3):
+            broker.publish([1], {'type': 'message', 'id': i})
+
+        self.assertEqual([subscription.get(timeout=0)['id'] for _ in range(2)], [1, 2])
+
+# The test client is WSGI, where streams have to be allowed explicitly
+@override_settings(REALTIME_KEEPALIVE_SECONDS=0.05, REALTIME_STREAM_MAX_SECONDS=0.3, REALTIME_STREAM_WSGI=True)
+class TestMessageStreamView(APITestCase):
+    def setUp(self):
+        self.user = MarketplaceUser.objects.create_user(
+            username="alice", email="alice@example.com", password="pass1234"
+        )
+        self.other_user = MarketplaceUser.objects.create_user(
+            username="bob", email="bob@example.com", password="pass1234"
+        )
+        self.listing = Listing.objects.create(
+            owner=self.other_user,
+            price=1200.00,
+            property_type="A",
+            payment_type="C",
+            bedrooms=2,
+            bathrooms=1,
+            sqft_area=800,
+            laundry_type="I",
+            parking_spaces=1,
+            heating=True,
+            ac=True,
+            move_in_date="2025-08-01",
+            description="Sample listing",
+            street_address="123 Main St",
+            city="Testville",
+            postal_code="12345"
+        )
+        self.conversation = Conversation.objects.create(listing=self.listing)
+        self.conversation.participants.add(self.user, self.other_user)
+        self.url = reverse('message_stream')
+
+    def get_ticket(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(reverse('message_stream_ticket'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['ticket']
+
+    def open_stream(self, user):
+        response = APIClient().get(self.url, {'ticket': self.get_ticket(user)}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response
+
+    def test_sent_message_is_pushed_to_participants(self):
+        stream = self.open_stream(self.user)
+
+        self.client.force_authenticate(user=self.other_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('send_message', args=[self.conversation.id]), {"content": "Still available?"})
+
+        [event] = read_events(stream)
+        self.assertEqual(event['conversation'], self.conversation.id)
+        self.assertEqual(event['message']['content'], "Still available?")
+
+    def test_started_conversation_is_pushed_to_landlord(self):
+        tenant = MarketplaceUser.objects.create_user(username="carol", email="carol@example.com", password="pass1234")
+        stream = self.open_stream(self.other_user)
+
+        self.client.force_authenticate(user=tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('start_conversation', args=[self.listing.id]))
+
+        [event] = read_events(stream)
+        self.assertEqual(event['message']['sender']['id'], tenant.id)
+
+    def test_stream_requires_authentication(self):
+        response = APIClient().get(self.url, {'ticket': "not-a-ticket"}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Access tokens are not accepted in the URL, they would outlive the logs they end up in
+        token = RefreshToken.for_user(self.user).access_token
+        response = APIClient().get(self.url, {'token': str(token)}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_ticket(self):
+        ticket = self.get_ticket(self.user)
+
+        with override_settings(REALTIME_TICKET_MAX_AGE=-1):
+            response = APIClient().get(self.url, {'ticket': ticket}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(REALTIME_STREAM_WSGI=False)
+    def test_no_streams_under_wsgi(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('message_stream_ticket'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -1,8 +1,10 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
-from marketplace.models import MarketplaceUser, Listing, Conversation, Message
+from marketplace.models import MarketplaceUser, Listing, Conversation, ConversationReadState, Message
 
 class TestSendMessageView(APITestCase):
     def setUp(self):
@@ -30,6 +32,7 @@ class TestSendMessageView(APITestCase):
             city="Testville",
             postal_code="12345"
         )
+        self.listing = listing
         self.conversation = Conversation.objects.create(listing=listing)
         self.conversation.participants.add(self.user, self.other_user)
         self.url = reverse('send_message', args=[self.conversation.id])
@@ -47,3 +50,34 @@ class TestSendMessageView(APITestCase):
         ))
         response = self.client.post(self.url, {"content": "Should not work"})
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_send_updates_conversation_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {"content": "Hello!"})
+
+        conversation_updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "marketplace_conversation"')]
+        self.assertEqual(len(conversation_updates), 1)
+        self.assertIn('"last_updated"', conversation_updates[0])
+        self.assertNotIn('"listing_id"', conversation_updates[0])
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_updated, Message.objects.get(id=response.data['id']).timestamp)
+
+    def test_bulk_create_keeps_conversations_current(self):
+        other = Conversation.objects.create(listing=self.listing)
+        other.participants.add(self.user, self.other_user)
+
+        messages = Message.objects.bulk_create([
+            Message(conversation=self.conversation, sender=self.other_user, content="One"),
+            Message(conversation=self.conversation, sender=self.user, content="Two"),
+            Message(conversation=other, sender=self.other_user, content="Three"),
+        ])
+
+        self.conversation.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.conversation.last_updated, messages[1].timestamp)
+        self.assertEqual(other.last_updated, messages[2].timestamp)
+        unread = dict(
+            ConversationReadState.objects.filter(conversation=self.conversation).values_list('user_id', 'unread_count')
+        )
+        self.assertEqual(unread, {self.user.id: 1, self.other_user.id: 1})
+        self.assertEqual(ConversationReadState.objects.get(conversation=other, user=self.user).unread_count, 1)
@@ -2,7 +2,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
-from marketplace.models import MarketplaceUser, Listing, Conversation, Message
+from marketplace.models import MarketplaceUser, Listing, Conversation, ConversationReadState, Message
 
 class TestUnreadMessagesListView(APITestCase):
     def setUp(self):
@@ -30,6 +30,7 @@ class TestUnreadMessagesListView(APITestCase):
             city="Testville",
             postal_code="12345"
         )
+        self.listing = listing
         self.conversation = Conversation.objects.create(listing=listing)
         self.conversation.participants.add(self.user, self.other_user)
         Message.objects.create(conversation=self.conversation, sender=self.other_user, content="Unread")
@@ -39,4 +40,58 @@ class TestUnreadMessagesListView(APITestCase):
     def test_unread_messages_list(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(len(response.data) >= 1)
\ No newline at end of file
+        self.assertTrue(len(response.data) >= 1)
+
+    def read_state(self, user, conversation=None):
+        return ConversationReadState.objects.get(conversation=conversation or self.conversation, user=user)
+
+    def test_counters_follow_new_messages(self):
+        Message.objects.create(conversation=self.conversation, sender=self.other_user, content="Again")
+        Message.objects.create(conversation=self.conversation, sender=self.user, content="Mine")
+
+        self.assertEqual(self.read_state(self.user).unread_count, 2)
+        self.assertEqual(self.read_state(self.other_user).unread_count, 1)
+
+    def test_group_read_state_is_per_participant(self):
+        carol = MarketplaceUser.objects.create_user(
+            username="carol", email="carol@example.com", password="pass1234"
+        )
+        group_chat = Conversation.objects.create(listing=self.listing)
+        group_chat.participants.add(self.user, self.other_user, carol)
+        message = Message.objects.create(conversation=group_chat, sender=self.other_user, content="Hi both")
+
+        # Alice opens the chat, Carol has not yet
+        self.client.get(reverse('conversation_detail', args=[group_chat.id]))
+
+        self.assertEqual(self.read_state(self.user, group_chat).unread_count, 0)
+        self.assertEqual(self.read_state(self.user, group_chat).last_read_id, message.id)
+        self.assertEqual(self.read_state(carol, group_chat).unread_count, 1)
+        self.client.force_authenticate(user=carol)
+        response = self.client.get(self.url)
+        self.assertEqual([m['id'] for m in response.data], [message.id])
+        self.assertFalse(response.data[0]['read'])
+
+    def test_reading_clears_unread_list(self):
+        self.client.get(reverse('conversation_detail', args=[self.conversation.id]))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, [])
+        conversation = self.client.get(reverse('conversation_list')).data[0]
+        self.assertEqual(conversation['unread_count'], 0)
+        self.assertTrue(conversation['last_message']['read'])
+
+    def test_replying_marks_read(self):
+        self.client.post(reverse('send_message', args=[self.conversation.id]), {"content": "Hi Bob"})
+
+        self.assertEqual(self.read_state(self.user).unread_count, 0)
+        self.assertEqual(self.read_state(self.other_user).unread_count, 1)
+
+    def test_new_participant_starts_with_history_read(self):
+        carol = MarketplaceUser.objects.create_user(
+            username="carol", email="carol@example.com", password="pass1234"
+        )
+        self.conversation.participants.add(carol)
+        self.assertEqual(self.read_state(carol).unread_count, 0)
+
+        self.conversation.participants.remove(carol)
+        self.assertFalse(ConversationReadState.objects.filter(user=carol).exists())
@@ -0,0 +1,27 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+class QueryCountMixin:
+    """
+    Test mixin asserting an endpoint runs a fixed number of queries, whatever the size of its result.
+
+    The request is made once, `grow()` adds more rows to the result, and the request is made again.
+    Both runs must take exactly `expected` queries, so an N+1 shows up as soon as a row is added.
+    """
+
+    def count_queries(self, request):
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+        self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+        return len(context.captured_queries), context.captured_queries
+
+    def assertConstantQueries(self, request, grow, expected):
+        for run in ("before", "after"):
+            if run == "after":
+                grow()
+            count, queries = self.count_queries(request)
+            self.assertEqual(
+                count, expected,
+                f"{count} queries {run} adding rows, expected {expected}:\n" +
+                "\n".join(query['sql'] for query in queries)
+            )
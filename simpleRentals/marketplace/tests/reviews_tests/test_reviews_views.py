@@ -46,3 +46,14 @@ class TestReviewListView(APITestCase):
         url = reverse('view_review', kwargs={'pk': 999})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_profile_review_totals(self):
+        Review.objects.create(reviewer=self.user1, reviewee=self.user2, rating=5, reviewee_role='L')
+
+        response = self.client.get(reverse('profile', kwargs={'pk': self.user2.id}))
+        self.assertEqual(response.data['review_count'], 2)
+        self.assertEqual(response.data['average_rating'], 4.5)
+
+        response = self.client.get(reverse('profile', kwargs={'pk': self.user1.id}))
+        self.assertEqual(response.data['review_count'], 0)
+        self.assertIsNone(response.data['average_rating'])
@@ -0,0 +1,58 @@
+from collections import Counter
+from django.db.models import Case, F, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from .models import ConversationReadState, Message
+
+# Unread state lives in ConversationReadState, one row per participant and conversation.
+# A new message bumps the other participants' counters, reading a conversation moves the reader's cursor
+# to its newest message. Both are a single UPDATE, whatever the length of the conversation.
+
+def add_readers(conversation_id, user_ids):
+    """Start new participants with everything already in the conversation marked as read."""
+    latest = Message.objects.filter(conversation_id=conversation_id).aggregate(latest=Max('id'))['latest'] or 0
+    ConversationReadState.objects.bulk_create(
+        [ConversationReadState(conversation_id=conversation_id, user_id=user_id, last_read_id=latest)
+         for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+
+def remove_readers(conversation_ids=None, user_ids=None):
+    read_states = ConversationReadState.objects.all()
+    if conversation_ids is not None:
+        read_states = read_states.filter(conversation_id__in=conversation_ids)
+    if user_ids is not None:
+        read_states = read_states.filter(user_id__in=user_ids)
+    read_states.delete()
+
+def count_new_messages(messages):
+    """Count new messages as unread for every participant but their sender, with one UPDATE per conversation."""
+    senders = {}
+    for message in messages:
+        counts = senders.setdefault(message.conversation_id, Counter())
+        counts[message.sender_id] += 1
+
+    for conversation_id, counts in senders.items():
+        total = sum(counts.values())
+        # Each participant gets the new messages they did not send themselves
+        increment = Case(
+            *[When(user_id=user_id, then=Value(total - sent)) for user_id, sent in counts.items() if sent < total],
+            default=Value(total),
+        )
+        (ConversationReadState.objects
+         .filter(conversation_id=conversation_id)
+         .exclude(user_id__in=[user_id for user_id, sent in counts.items() if sent == total])
+         .update(unread_count=F('unread_count') + increment))
+
+def mark_read(conversation, user):
+    """Move the user's cursor to the conversation's newest message."""
+    latest = (
+        Message.objects.filter(conversation=OuterRef('conversation_id'))
+        .order_by().values('conversation').annotate(latest=Max('id')).values('latest')
+    )
+    ConversationReadState.objects.filter(conversation=conversation, user=user).update(
+        last_read_id=Greatest(F('last_read_id'), Coalesce(Subquery(latest), 0)), unread_count=0
+    )
+
+def read_cursors(user):
+    """conversation id -> id of the last message the user has read, for all of the user's conversations."""
+    return dict(ConversationReadState.objects.filter(user=user).values_list('conversation_id', 'last_read_id'))
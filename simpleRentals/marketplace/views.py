@@ -5,26 +5,42 @@ from django.contrib.auth.decorators import *
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from .serializers import *
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from django.utils.timezone import now
-from django.db.models import Q
+from django.db.models import Avg, Count, F, Q, FloatField, prefetch_related_objects
+from django.db.models.functions import Cast
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
 from django.core.exceptions import PermissionDenied
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
-from math import radians, cos, sin, asin, sqrt
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.db import IntegrityError, transaction
 from .tokens import email_verification_token
 from .utils import send_verification_email
 from .utils import send_password_reset_email
-from sklearn.ensemble import RandomForestRegressor
-import joblib
-import numpy as np
-
-from .models import Listing, ListingPicture, Conversation, Message, MarketplaceUser, Review, Favorites
+from .geo import filter_within_radius, filter_within_bbox, parse_bbox, cluster_listings, cluster_precision, MAX_ZOOM
+from .recommender import recommender_registry, top_n_indices, DEFAULT_BUDGET_MAX
+from .features import scoring_matrix
+from .similarity import similarity_registry
+from .popularity import popular_listings, record_interaction
+from .search import filter_location, search_listings
+from .autocomplete import location_autocomplete
+from .facets import listing_facets, listing_filter_conditions, parse_price_buckets
+from .pagination import ListingPagination, ReviewPagination, MessagePagination, MessageHistoryPagination, MessageSearchPagination
+from .realtime import get_broker, event_stream, async_event_stream, stream_ticket, streams_supported, EventStreamRenderer
+from .authentication import StreamTicketAuthentication
+from .querysets import listing_queryset, listing_card_queryset, prefetch_listings, inbox_queryset
+from .unread import mark_read
+
+from .models import Listing, ListingPicture, Conversation, Message, MarketplaceUser, Review, Favorites, ListingInteraction, MESSAGE_SEARCH_CONFIG
 
 import os
 
@@ -105,6 +121,8 @@ class UserProfileView(generics.RetrieveAPIView):
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         data = self.get_serializer(instance).data
+        # Review totals, so profile pages can show the rating while paging through the reviews themselves
+        data.update(instance.received_reviews.aggregate(review_count=Count('id'), average_rating=Avg('rating')))
 
         return Response(data)
 
@@ -208,6 +226,37 @@ class PasswordResetConfirmView(APIView):
         
 ### LISTING SECTION - START ###
 # API views for listing management
+
+class ListingRepresentationMixin:
+    """
+    For views returning lists of listings: ?view=card returns compact ListingCardSerializer cards,
+    ?fields=id,price,... returns only the requested listing fields.
+    """
+    card_serializer_class = ListingCardSerializer
+
+    def use_cards(self):
+        view = self.request.query_params.get('view', 'full')
+        if view not in ('full', 'card'):
+            raise ValidationError({"view": "view must be 'full' or 'card'."})
+        return view == 'card'
+
+    def get_serializer_class(self):
+        if self.use_cards():
+            return self.card_serializer_class
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.request.query_params.get('fields')
+        if fields:
+            context['fields'] = [name.strip() for name in fields.split(',') if name.strip()]
+        return context
+
+    def get_listing_queryset(self, queryset=None):
+        """Listings loaded with exactly what the chosen serializer reads."""
+        if self.use_cards():
+            return listing_card_queryset(queryset)
+        return listing_queryset(queryset)
     
 class ListingDeleteView(generics.DestroyAPIView):
     serializer_class = ListingSerializer
@@ -241,9 +290,34 @@ class ListingDetailView(generics.RetrieveAPIView):
 
     def get_object(self):
         # Get the listing and ensure it belongs to the logged-in user
-        listing = get_object_or_404(Listing, id=self.kwargs['pk'])
+        listing = get_object_or_404(listing_queryset(), id=self.kwargs['pk'])
         return listing
 
+class ListingSimilarView(ListingRepresentationMixin, generics.ListAPIView):
+    """API view to return the listings most similar to a listing, from the precomputed similarity index."""
+    serializer_class = ListingSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None  # Already capped by `limit`
+    max_limit = 50
+
+    def get_queryset(self):
+        try:
+            limit = min(int(self.request.query_params.get('limit', 10)), self.max_limit)
+        except ValueError:
+            raise ValidationError({"limit": "limit must be a number."})
+
+        # An unknown listing is a 404, not an empty list of similar ones
+        get_object_or_404(Listing.objects.only('id'), id=self.kwargs['pk'])
+
+        index = similarity_registry.get()
+        if index is None:
+            return []
+
+        # Scoring is pure NumPy, the database is only hit to check the listing and load the winning ones
+        similar_ids = [listing_id for listing_id, _ in index.similar(self.kwargs['pk'], limit)]
+        id_order = {id_: index for index, id_ in enumerate(similar_ids)}
+        return sorted(self.get_listing_queryset().filter(id__in=similar_ids), key=lambda l: id_order[l.id])
+
 class ListingPostingView(generics.CreateAPIView):
     """API view to handle listing posting."""
     serializer_class = ListingPostingSerializer
@@ -253,100 +327,175 @@ class ListingPostingView(generics.CreateAPIView):
         # The `context` is already passed to the serializer by DRF
         serializer.save(owner=self.request.user)  # The `owner` is set in the serializer's `create()` method
 
-class ListingListView(generics.ListAPIView):
+def apply_listing_filters(queryset, filters):
+    """Apply the attribute filters shared by the listing search endpoints (price, rooms, amenities...)."""
+    owner = filters.get('owner')
+    if owner:
+        queryset = queryset.filter(owner_id=owner)
+
+    # Price range, rooms, property type, furnished / pets / shareable, amenities[] and utilities[]
+    return queryset.filter(*listing_filter_conditions(filters).values())
+
+def filter_listing_scope(queryset, filters):
+    """Narrow a listing search to its location, text query, coordinates or map viewport (at least one is required)."""
+    location = filters.get('location')
+    terms = filters.get('q', '').strip()
+    owner = filters.get('owner')
+    lat = filters.get('lat')
+    lng = filters.get('lng')
+    radius = float(filters.get('radius', 5))
+    bbox = get_bbox(filters)
+
+    if not location and not terms and not owner and not (lat and lng) and not bbox:
+        raise ValidationError(
+            {"Location/Owner": "A location, search query, owner, coordinates or bbox are required to filter listings. Please provide at least one."}
+        )
+
+    if terms:
+        # Ranked text search over address, city, postal code and description, e.g. ?q=furnished near campus
+        queryset = search_listings(queryset, terms)
+
+    if bbox:
+        # Map viewport: geohash prefix lookups, e.g. ?bbox=minLat,minLng,maxLat,maxLng
+        queryset = filter_within_bbox(queryset, *bbox)
+
+    elif lat and lng:
+        # Bounding box prefilter + great-circle distance, all done by the database
+        queryset = filter_within_radius(queryset, float(lat), float(lng), radius)
+
+    elif location:
+        queryset = filter_location(queryset, location)
+
+    return queryset
+
+def get_bbox(filters):
+    """Parse the ?bbox=minLat,minLng,maxLat,maxLng query param, or return None if absent."""
+    bbox = filters.get('bbox')
+    if not bbox:
+        return None
+    try:
+        return parse_bbox(bbox)
+    except ValueError:
+        raise ValidationError({"bbox": "bbox must be 'minLat,minLng,maxLat,maxLng'."})
+
+class ListingListView(ListingRepresentationMixin, generics.ListAPIView):
     """API view to handle listing list based on filters, including radius search."""
     serializer_class = ListingSerializer
     permission_classes = [AllowAny]
+    pagination_class = ListingPagination
 
-    def haversine_distance(self, lat1, lon1, lat2, lon2):
-        """Calculate distance between two lat/lng points (in km)."""
-        R = 6371  # Earth radius in km
-        dlat = radians(lat2 - lat1)
-        dlon = radians(lon2 - lon1)
-        a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-        c = 2 * asin(sqrt(a))
-        return R * c
+    @property
+    def cursor_ordering(self):
+        # Radius searches are paged nearest first, text searches best match first, everything else newest first
+        filters = self.request.query_params
+        if filters.get('lat') and filters.get('lng') and not get_bbox(filters):
+            return ('distance_km', 'id')
+        if filters.get('q', '').strip():
+            return ('-rank', '-id')
+        return None
 
     def get_queryset(self):
         filters = self.request.query_params
-        location = filters.get('location')
-        owner = filters.get('owner')
-        lat = filters.get('lat')
-        lng = filters.get('lng')
-        radius = float(filters.get('radius', 5))
-        
+        return filter_listing_scope(apply_listing_filters(self.get_listing_queryset(), filters), filters)
+    
+class ListingClusterView(APIView):
+    """API view to return map clusters (centroid, count, price range) for a bbox and zoom level."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        filters = request.query_params
+        bbox = get_bbox(filters)
+        if not bbox:
+            raise ValidationError({"bbox": "A bbox is required to cluster listings."})
+
+        try:
+            zoom = int(filters.get('zoom', ''))
+        except ValueError:
+            raise ValidationError({"zoom": "A zoom level is required."})
+        if not 0 <= zoom <= MAX_ZOOM:
+            raise ValidationError({"zoom": f"The zoom level must be between 0 and {MAX_ZOOM}."})
+
+        # The zoom level's precision, coarser if the bbox would span more than MAX_CLUSTER_CELLS cells
+        precision = cluster_precision(zoom, *bbox)
+        queryset = filter_within_bbox(apply_listing_filters(Listing.objects.all(), filters), *bbox)
+        clusters = cluster_listings(queryset, precision)
+
+        return Response({
+            "zoom": zoom,
+            "precision": precision,
+            "clusters": ListingClusterSerializer(clusters, many=True).data,
+        })
+    
+class ListingFacetView(APIView):
+    """API view to return the filter panel counts and price histogram for a listing search (same params as viewAll)."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        filters = request.query_params
         queryset = Listing.objects.all()
+        if filters.get('owner'):
+            queryset = queryset.filter(owner_id=filters.get('owner'))
+        queryset = filter_listing_scope(queryset, filters)
 
-        if not location and not owner and not (lat and lng):
-            raise ValidationError(
-                {"Location/Owner": "A location, owner, or coordinates are required to filter listings. Please provide at least one."}
-            )
+        price_buckets = settings.LISTING_PRICE_BUCKETS
+        if filters.get('price_buckets'):
+            # Histogram boundaries, e.g. ?price_buckets=0,1000,1500,2000 (the last bucket is open ended)
+            try:
+                price_buckets = parse_price_buckets(filters.get('price_buckets'))
+            except ValueError as e:
+                raise ValidationError({"price_buckets": str(e)})
 
-        if owner:
-            queryset = queryset.filter(owner_id=owner)
-
-        min_price = filters.get('min_price')
-        max_price = filters.get('max_price')
-        bedrooms = filters.get('bedrooms')
-        bathrooms = filters.get('bathrooms')
-        property_type = filters.get('property_type')
-        furnished = filters.get('furnished')
-        pet_friendly = filters.get('pet_friendly')
-        shareable = filters.get('shareable')
-
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-        if bedrooms:
-            queryset = queryset.filter(bedrooms=bedrooms)
-        if bathrooms:
-            queryset = queryset.filter(bathrooms=bathrooms)
-        if property_type:
-            queryset = queryset.filter(property_type=property_type)
-        if furnished:
-            queryset = queryset.filter(furnished=furnished.lower() in ["true", "1"])
-        if pet_friendly:
-            queryset = queryset.filter(pet_friendly=pet_friendly.lower() in ["true", "1"])
-        if shareable:
-            queryset = queryset.filter(shareable=shareable.lower() in ["true", "1"])
-
-        amenities = self.request.query_params.getlist('amenities[]')
-        if amenities:
-            for amenity in [a.strip().lower() for a in amenities]:
-                if amenity in ['ac', 'fridge', 'heating', 'internet']:
-                    queryset = queryset.filter(**{amenity: True})
-
-        utilities = self.request.query_params.getlist('utilities[]')
-        if utilities:
-            for utility in [u.strip().lower() for u in utilities]:
-                if utility in ['heat', 'hydro', 'water']:
-                    queryset = queryset.filter(**{utility: True})
-        
-        if lat and lng:
-            lat, lng = float(lat), float(lng)
-            queryset = queryset.filter(latitude__isnull=False, longitude__isnull=False)
-            filtered_ids = []
-            for listing in queryset:
-                distance = self.haversine_distance(lat, lng, listing.latitude, listing.longitude)
-                if distance <= radius:
-                    filtered_ids.append(listing.id)
-            queryset = queryset.filter(id__in=filtered_ids)
-
-        elif location:
-            queryset = queryset.filter(
-                Q(street_address__icontains=location) | Q(city__icontains=location)
-            )
+        # Every count in one aggregate query
+        return Response(listing_facets(queryset, filters, price_buckets))
+    
+class ListingAutocompleteView(APIView):
+    """API view to suggest cities and postal code prefixes as the user types, e.g. ?q=wat"""
+    permission_classes = [AllowAny]
+    max_limit = 20
 
-        return queryset
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({"q": "A search prefix is required."})
+
+        try:
+            limit = min(int(request.query_params.get('limit', 8)), self.max_limit)
+        except ValueError:
+            raise ValidationError({"limit": "The limit must be a number."})
+        if limit < 1:
+            raise ValidationError({"limit": "The limit must be at least 1."})
+
+        # Answered from the in-memory prefix index, no database query
+        return Response(location_autocomplete.suggest(query, limit))
     
-class ListingRecommendationList(generics.ListAPIView):
+class ListingRecommendationList(ListingRepresentationMixin, generics.ListAPIView):
     serializer_class = ListingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = None  # A ranked top-N list
 
     def get_queryset(self):
         user = self.request.user
-        model = joblib.load('ml_model/recommender.pkl')
+
+        # Top-N list stored by `manage.py refresh_recommendations`, read with one indexed query
+        fresh_since = now() - settings.RECOMMENDATIONS_MAX_AGE
+        precomputed = list(
+            self.get_listing_queryset().filter(
+                recommendations__user=user,
+                recommendations__computed_at__gte=fresh_since
+            ).exclude(favorited_by__user=user).order_by('recommendations__rank')
+        )
+        if precomputed:
+            return precomputed
+
+        return self.score_live(user)
+
+    def score_live(self, user):
+        """Fallback for users without a fresh precomputed list: score their in-budget listings now."""
+        model = recommender_registry.get()
+
+        # Cold start: without a model, a budget or any history the model's features are meaningless
+        if model is None or user.budget_max is None or not ListingInteraction.objects.filter(user=user).exists():
+            return popular_listings(user)
 
         try:
             favorites = Favorites.objects.get(user=user)
@@ -356,59 +505,24 @@ class ListingRecommendationList(generics.ListAPIView):
 
         # Filter listings in budget and not already favourited
         budget_min = user.budget_min or 0
-        budget_max = user.budget_max or 1_000_000
+        budget_max = user.budget_max or DEFAULT_BUDGET_MAX
 
         listings = Listing.objects.filter(
             price__gte=budget_min,
             price__lte=budget_max
         ).exclude(id__in=favourited_ids)
 
-        feature_rows = []
-        listing_ids = []
-
-        for listing in listings:
-            feature_rows.append([
-                user.id,
-                hash(user.preferred_location or ""),
-                float(user.budget_min or 0),
-                float(user.budget_max or 0),
-                float(listing.price),
-                listing.latitude or 0,
-                listing.longitude or 0,
-                int(listing.pet_friendly),
-                 # Amenities and Utilities
-                int(listing.heating),
-                int(listing.ac),
-                int(listing.fridge),
-                {'I': 2, 'S': 1, 'N': 0}.get(listing.laundry_type, -1),
-                int(listing.heat),
-                int(listing.hydro),
-                int(listing.water),
-                int(listing.internet),
-                int(listing.furnished),
-                int(listing.shareable)
-            ])
-            listing_ids.append(listing.id)
-
-        if not feature_rows:
-            self.recommended_ids = []
-            return Listing.objects.none()
-
-        scores = model.predict(np.array(feature_rows))
-        top_indices = np.argsort(scores)[::-1][:10]
-        self.recommended_ids = [listing_ids[i] for i in top_indices]
-
-        return Listing.objects.filter(id__in=self.recommended_ids)
+        listing_ids, features = scoring_matrix(user, listings)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
+        if not len(listing_ids):
+            return []
 
-        # Ensure order matches score ranking
-        id_order = {id_: index for index, id_ in enumerate(self.recommended_ids)}
-        sorted_queryset = sorted(queryset, key=lambda l: id_order[l.id])
+        scores = model.predict(features)
+        recommended_ids = [int(listing_ids[i]) for i in top_n_indices(scores, 10)]
 
-        serializer = self.get_serializer(sorted_queryset, many=True)
-        return Response(serializer.data)
+        # Ensure order matches score ranking
+        id_order = {id_: index for index, id_ in enumerate(recommended_ids)}
+        return sorted(self.get_listing_queryset().filter(id__in=recommended_ids), key=lambda l: id_order[l.id])
     
 class ListingInteractionCreateView(generics.CreateAPIView):
     serializer_class = ListingInteractionSerializer
@@ -428,15 +542,18 @@ class ListingInteractionCreateView(generics.CreateAPIView):
         if listing.owner.id == user.id:
             return
 
-        serializer.save(user=user, listing=listing, interaction_type=interaction)
+        # Keep the popularity counters used for cold-start recommendations up to date
+        record_interaction(serializer.save(user=user, listing=listing, interaction_type=interaction))
 
     
-class FavouritesRetrieveView(generics.RetrieveAPIView):
+class FavouritesRetrieveView(ListingRepresentationMixin, generics.RetrieveAPIView):
     serializer_class = FavoritesSerializer
+    card_serializer_class = FavoritesCardSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
         favourite, _ = Favorites.objects.get_or_create(user=self.request.user)
+        prefetch_related_objects([favourite], prefetch_listings('favorite_listings', self.get_listing_queryset()))
         return favourite
 
 class FavouriteDeleteView(APIView):
@@ -482,14 +599,16 @@ class ConversationListView(generics.ListAPIView):
     """API view to handle conversation list."""
     serializer_class = ConversationSerializer
     permission_classes = [IsAuthenticated] 
+    # The whole inbox in one response: it is ordered by last activity, which a new message changes, so cursor
+    # pages would skip or repeat conversations. inbox_queryset loads it with a fixed number of queries.
+    pagination_class = None
 
     def get_queryset(self):
-        user = self.request.user
-        return Conversation.objects.filter(participants=user).order_by('-last_updated')
+        return inbox_queryset(self.request.user).order_by('-last_updated', '-id')
     
 class ConversationDetailView(generics.RetrieveAPIView):
-    """API view to retrieve conversation details."""
-    serializer_class = ConversationSerializer
+    """API view to retrieve conversation details, with the latest page of messages."""
+    serializer_class = ConversationDetailSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
@@ -499,11 +618,23 @@ class ConversationDetailView(generics.RetrieveAPIView):
         if self.request.user not in conversation.participants.all():
             raise PermissionDenied("You do not have permission to view this conversation.")
 
-        # Mark all unread messages as read (except the ones the user sent)
-        conversation.messages.filter(read=False).exclude(sender=self.request.user).update(read=True)
+        # Move the user's read cursor to the newest message
+        mark_read(conversation, self.request.user)
 
         return conversation
     
+class ConversationMessagesView(generics.ListAPIView):
+    """API view to page through a conversation's message history (?before=<id> / ?after=<id>)."""
+    serializer_class = MessageSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = MessageHistoryPagination
+
+    def get_queryset(self):
+        conversation = get_object_or_404(
+            Conversation.objects.filter(participants=self.request.user), id=self.kwargs['pk']
+        )
+        return conversation.messages.select_related('sender__roommate_profile')
+
 class StartConversationView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -513,19 +644,16 @@ class StartConversationView(APIView):
         # If 'participants' is provided in the request, treat as group conversation
         participant_ids = request.data.get("participants")
         if participant_ids and isinstance(participant_ids, list):
-            # Check if a conversation with these participants and this listing already exists
-            existing = Conversation.objects.filter(listing=listing)
-            for conv in existing:
-                conv_participants = set(conv.participants.values_list("id", flat=True))
-                if set(participant_ids) == conv_participants:
-                    raise ValidationError("A conversation for this group and listing already exists.")
-
-            conversation = Conversation.objects.create(listing=listing)
-            users = MarketplaceUser.objects.filter(id__in=participant_ids)
-            conversation.participants.add(*users)
-            # Optionally, add the sender if not already in the list
-            if request.user.id not in participant_ids:
-                conversation.participants.add(request.user)
+            users = list(MarketplaceUser.objects.filter(id__in=participant_ids))
+            # Add the sender if not already in the list
+            user_ids = {user.id for user in users} | {request.user.id}
+
+            # Link the chat to its roommate group, so group membership changes find it directly
+            group = self.find_group(listing, request.data.get("group"), user_ids)
+            conversation = self.create_conversation(
+                listing, user_ids, group, "A conversation for this group and listing already exists."
+            )
+            conversation.participants.add(*users, request.user)
 
             Message.objects.create(
                 conversation=conversation,
@@ -539,18 +667,10 @@ class StartConversationView(APIView):
         if listing.owner == request.user:
             raise ValidationError("You cannot start a conversation with yourself.")
 
-        # Check if a 1-on-1 conversation already exists between user and landlord for this listing
-        existing = Conversation.objects.filter(listing=listing)
-        for conv in existing:
-            conv_participants = list(conv.participants.values_list("id", flat=True))
-            if (
-                len(conv_participants) == 2 and
-                request.user.id in conv_participants and
-                listing.owner.id in conv_participants
-            ):
-                raise ValidationError("A conversation for this listing already exists between you and the landlord.")
-
-        conversation = Conversation.objects.create(listing=listing)
+        conversation = self.create_conversation(
+            listing, {request.user.id, listing.owner_id}, None,
+            "A conversation for this listing already exists between you and the landlord."
+        )
         conversation.participants.add(request.user, listing.owner)
 
         Message.objects.create(
@@ -561,6 +681,39 @@ class StartConversationView(APIView):
 
         serializer = ConversationSerializer(conversation, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def create_conversation(self, listing, user_ids, group, duplicate_error):
+        """
+        Create the conversation with its participant fingerprint already set. The (listing, participant_key)
+        unique constraint turns a duplicate, even from two concurrent requests, into a validation error.
+        """
+        try:
+            with transaction.atomic():
+                return Conversation.objects.create(
+                    listing=listing, group=group, participant_key=Conversation.participant_key_for(user_ids)
+                )
+        except IntegrityError:
+            raise ValidationError(duplicate_error)
+
+    def find_group(self, listing, group_id, participant_ids):
+        """
+        The listing's group this chat belongs to: the one given, else the one whose members are the participants.
+        A group gets one chat, started by its members with exactly its members.
+        """
+        if group_id:
+            try:
+                group = Group.objects.prefetch_related('members').get(id=int(group_id), listing=listing)
+            except (TypeError, ValueError, Group.DoesNotExist):
+                raise ValidationError({"group": "This listing has no such group."})
+            if participant_ids != {member.user_id for member in group.members.all()}:
+                raise ValidationError({"group": "A group chat must be started by the group's members, with all of them."})
+            if group.conversations.exists():
+                raise ValidationError({"group": "This group already has a conversation."})
+            return group
+        for group in Group.objects.filter(listing=listing, conversations__isnull=True).prefetch_related('members'):
+            if participant_ids == {member.user_id for member in group.members.all()}:
+                return group
+        return None
     
 class ConversationDeleteView(generics.DestroyAPIView):
     serializer_class = GroupSerializer
@@ -585,7 +738,8 @@ class ConversationLeaveView(APIView):
     def post(self, request, pk):
         conversation = get_object_or_404(Conversation, id=pk, participants=request.user)
         conversation.participants.remove(request.user)
-        conversation.save()
+        # Only bump last_updated, the participants_changed signal already rewrote participant_key
+        conversation.save(update_fields=['last_updated'])
         return Response({"detail": "You have left the conversation."}, status=status.HTTP_200_OK)
 
 class SendMessageView(generics.CreateAPIView):
@@ -596,15 +750,12 @@ class SendMessageView(generics.CreateAPIView):
     def perform_create(self, serializer):
         conversation = get_object_or_404(Conversation.objects.filter(participants=self.request.user), id=self.kwargs['pk'])
 
-        # Save the message and associate it with the conversation
-        serializer.save(conversation=conversation, sender=self.request.user)
-
-        # Update last_updated field
-        conversation.last_updated = now()
-        conversation.save(update_fields=['last_updated'])
+        with transaction.atomic():
+            # Message.save also moves the conversation's last_updated
+            serializer.save(conversation=conversation, sender=self.request.user)
 
-        # Mark all unread messages as read after sending a message
-        conversation.messages.filter(read=False).exclude(sender=self.request.user).update(read=True)
+            # Replying marks the conversation as read
+            mark_read(conversation, self.request.user)
 
 class MessageEditView(generics.UpdateAPIView):
     serializer_class = MessageSerializer
@@ -616,16 +767,77 @@ class MessageEditView(generics.UpdateAPIView):
             raise PermissionDenied("You do not have permission to edit this message.")
         return message
 
+class MessageStreamTicketView(APIView):
+    """Issue a short-lived ticket to open the message stream with (EventSource cannot send the JWT header)."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not streams_supported(request._request):
+            return Response(
+                {"detail": "Live updates are not available on this server."}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response({"ticket": stream_ticket(request.user), "expires_in": settings.REALTIME_TICKET_MAX_AGE})
+
+class MessageStreamView(APIView):
+    """
+    Server-Sent Events stream of the user's new messages, replacing polling of conversations/ and messages.
+    Authenticated with a ?ticket= from MessageStreamTicketView.
+    """
+    authentication_classes = [StreamTicketAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    def get(self, request):
+        # A WSGI worker would be held for the whole stream
+        if not streams_supported(request._request):
+            return Response(
+                {"detail": "Live updates are not available on this server."}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        subscription = get_broker().subscribe(request.user.id)
+        stream = async_event_stream if isinstance(request._request, ASGIRequest) else event_stream
+        response = StreamingHttpResponse(stream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Don't let a proxy buffer the stream
+        return response
+
+class MessageSearchView(generics.ListAPIView):
+    """Full-text search over the messages of the user's conversations (?q=), best matches first."""
+    serializer_class = MessageSearchResultSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = MessageSearchPagination
+
+    def get_queryset(self):
+        terms = self.request.query_params.get('q', '').strip()
+        if not terms:
+            raise ValidationError({"q": "A search query is required."})
+
+        # Matched through the GIN index on Message.search_vector, web search syntax ("quoted phrases", -excluded, or)
+        query = SearchQuery(terms, config=MESSAGE_SEARCH_CONFIG, search_type='websearch')
+        return (
+            Message.objects.filter(conversation__participants=self.request.user, search_vector=query)
+            .annotate(
+                # ts_rank is float4, read back as a rounded string: the cursor needs the exact float8 value
+                rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+                snippet=SearchHeadline(
+                    'content', query, config=MESSAGE_SEARCH_CONFIG,
+                    start_sel='<mark>', stop_sel='</mark>', max_words=30, min_words=10,
+                ),
+            )
+            .select_related('sender')
+        )
+
 class UnreadMessagesListView(generics.ListAPIView):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MessagePagination
 
     def get_queryset(self):
         user = self.request.user
+        # Messages past the user's read cursor in each of their conversations
         return Message.objects.filter(
-            read=False,
-            conversation__participants=user
-        ).exclude(sender=user).order_by('-timestamp')
+            conversation__read_states__user=user,
+            id__gt=F('conversation__read_states__last_read_id'),
+        ).exclude(sender=user).select_related('sender__roommate_profile').order_by('-timestamp')
 
 ### CONVERSATION SECTION - END ###
 
@@ -636,6 +848,7 @@ class UnreadMessagesListView(generics.ListAPIView):
 class ReviewListView(generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ReviewPagination
 
     def get_queryset(self):
         filters = self.request.query_params
@@ -870,15 +1083,9 @@ class GroupJoinView(generics.UpdateAPIView):
         group.members.add(roommate_user)
         group.save()
 
-        # Find a conversation for this group/listing with all current members as participants
-        conversations = Conversation.objects.filter(listing=group.listing)
-        for conv in conversations:
-            participant_ids = set(conv.participants.values_list("id", flat=True))
-            group_member_user_ids = set([m.user.id for m in group.members.all()])
-            # If this conversation matches the group members, add the user if not present
-            if group_member_user_ids.issubset(participant_ids) or participant_ids.issubset(group_member_user_ids):
-                if request.user.id not in participant_ids:
-                    conv.participants.add(request.user)
+        # Add the new member to the group's chat
+        for conversation in group.conversations.all():
+            conversation.participants.add(request.user)
 
         serializer = self.get_serializer(group)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -897,11 +1104,9 @@ class GroupLeaveView(generics.UpdateAPIView):
         # Remove user from group members
         group.members.remove(roommate_user)
         group.save()
-        conversations = Conversation.objects.filter(listing=group.listing)
-        for conv in conversations:
-            participant_ids = set(conv.participants.values_list("id", flat=True))
-            if request.user.id in participant_ids:
-                conv.participants.remove(request.user)
+        # Remove the user from the group's chat
+        for conversation in group.conversations.all():
+            conversation.participants.remove(request.user)
         serializer = self.get_serializer(group)
         return Response({"detail": "You have left the group.", "group": serializer.data}, status=status.HTTP_200_OK)
     
@@ -935,15 +1140,8 @@ class GroupDeleteView(generics.DestroyAPIView):
         return group
     
     def perform_destroy(self, instance):
-        # Find conversations for this listing where all participants are group members
-        group_member_user_ids = set(instance.members.values_list("user__id", flat=True))
-        conversations = Conversation.objects.filter(listing=instance.listing)
-        for conv in conversations:
-            participant_ids = set(conv.participants.values_list("id", flat=True))
-            # If the conversation participants match the group members, delete it
-            if participant_ids == group_member_user_ids:
-                conv.delete()
-        # Now delete the group itself
+        # Delete the group's chat, then the group itself
+        instance.conversations.all().delete()
         instance.delete()
     
 class GroupManageView(generics.UpdateAPIView):
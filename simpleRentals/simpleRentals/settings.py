@@ -41,8 +41,8 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DeFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
-    "PAGE_SIZE": 10,
+    "DEFAULT_PAGINATION_CLASS": "marketplace.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
 }
 
 SIMPLE_JWT = {
@@ -66,6 +66,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     'rest_framework_simplejwt.token_blacklist', 
     "corsheaders"
@@ -193,6 +194,9 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
     "Cache-Control",
 ]
 
+# Paginated list endpoints send their next/previous page cursors in the Link header
+CORS_EXPOSE_HEADERS = ["Link"]
+
 # EMAIL
 # EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"   # For development
 #For production, use SMTP settings: 
@@ -208,5 +212,28 @@ DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER)
 # URL for frontend in verification links
 FRONTEND_URL = "http://localhost:5173"
 
+# Recommender model written by `manage.py train_recommender`, cached in memory by marketplace.recommender
+RECOMMENDER_MODEL_PATH = BASE_DIR / "ml_model" / "recommender.pkl"
+# Precomputed recommendations older than this are ignored and the user is scored live instead
+RECOMMENDATIONS_MAX_AGE = timedelta(hours=24)
+# Item-to-item index written by `manage.py build_similarity_index`
+SIMILARITY_INDEX_PATH = BASE_DIR / "ml_model" / "similarity_index.pkl"
+# Each process updates its autocomplete index on its own listing changes and reloads it this often for the rest
+AUTOCOMPLETE_REFRESH_SECONDS = 300
+# Default price histogram of the listing filter panel (bucket lower bounds, the last bucket is open ended)
+LISTING_PRICE_BUCKETS = [0, 500, 1000, 1500, 2000, 2500, 3000, 4000]
+
+# Push channel for new messages (marketplace.realtime). The in-process broker only reaches streams
+# open in the same server process, multi-process deployments plug in a shared one here.
+REALTIME_BROKER = os.getenv("REALTIME_BROKER", "marketplace.realtime.InProcessBroker")
+REALTIME_KEEPALIVE_SECONDS = 15
+# Streams are closed after this long (the browser reconnects), so workers are not held indefinitely
+REALTIME_STREAM_MAX_SECONDS = 300
+# Streams hold a whole worker under WSGI, so they are only served by the ASGI app (simpleRentals.asgi) unless
+# this is set, e.g. REALTIME_STREAM_WSGI=True for `manage.py runserver`
+REALTIME_STREAM_WSGI = os.getenv("REALTIME_STREAM_WSGI", "False") == "True"
+# Lifetime of the ticket a browser opens its stream with, passed in the URL as EventSource cannot send headers
+REALTIME_TICKET_MAX_AGE = 30
+
 # STATIC ROOT FIX
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
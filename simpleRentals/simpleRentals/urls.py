@@ -27,12 +27,20 @@ urlpatterns = [
     path("conversations/leave/<int:pk>", views.ConversationLeaveView.as_view(), name="conversation_leave"),
     path('listing/<int:pk>/start_conversation', views.StartConversationView.as_view(), name='start_conversation'), # pk = listing id
     path('conversations/<int:pk>/send_message/', views.SendMessageView.as_view(), name='send_message'), # pk = conversation id
+    path('conversations/<int:pk>/messages/', views.ConversationMessagesView.as_view(), name='conversation_messages'), # pk = conversation id
     path("messages", views.UnreadMessagesListView.as_view(), name="unread_messages"),
+    path("messages/stream/ticket", views.MessageStreamTicketView.as_view(), name="message_stream_ticket"),
+    path("messages/stream", views.MessageStreamView.as_view(), name="message_stream"),
+    path("messages/search", views.MessageSearchView.as_view(), name="message_search"),
     path("messages/<int:pk>", views.MessageEditView.as_view(), name="edit_messages"),
     path("listings/", views.listings_home, name="listings_home"),
     path("listings/viewAll", views.ListingListView.as_view(), name="viewAllListings"),
+    path("listings/clusters", views.ListingClusterView.as_view(), name="listing_clusters"),
+    path("listings/facets", views.ListingFacetView.as_view(), name="listing_facets"),
+    path("listings/autocomplete", views.ListingAutocompleteView.as_view(), name="listing_autocomplete"),
     path("listings/add", views.ListingPostingView.as_view(), name="post_listing"),
     path("listings/<int:pk>", views.ListingDetailView.as_view(), name="view_listing"), # pk = listing id
+    path("listings/<int:pk>/similar", views.ListingSimilarView.as_view(), name="similar_listings"), # pk = listing id
     path("listings/edit/<int:pk>", views.ListingEditView.as_view(), name="edit_listing"), # pk = listing id
     path("listings/delete/<int:pk>", views.ListingDeleteView.as_view(), name="delete_listing"), # pk = listing id
     path("listings/<int:pk>/groups", views.GroupListView.as_view(), name="viewAllGroups"), # pk - listing id